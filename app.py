@@ -1,29 +1,54 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response, send_file, send_from_directory, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response, send_file, send_from_directory, abort, g, has_request_context, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from datetime import datetime, timedelta, date
-from collections import defaultdict
+from collections import defaultdict, namedtuple, OrderedDict
+from itertools import islice
+from operator import attrgetter
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import make_transient_to_detached
+from time import monotonic
 import os
-import pandas as pd
 import plotly
-import plotly.express as px
 import plotly.graph_objects as go
 import json
-import io
+import base64
+import heapq
 import sqlite3
+import subprocess
+import threading
 import uuid
-import shutil
+import numpy as np
 import werkzeug.security as security
 from werkzeug.utils import secure_filename
 from image_processor import parse_image_for_time_entries
+from sqlite_tuning import load_sqlite_pragmas, install_sqlite_tuning
+from database_config import get_database_url, libpq_url, day_expression, week_expression, month_expression, \
+    epoch_expression
+from order_search import install_search_index, search_order_ids
+from labor_import import iter_labor_entries, import_file_type, chunked
+from report_export import ExportColumn, EXPORT_FORMATS, csv_chunks, jsonl_chunks, xlsx_file, write_export
+from columnar_export import pyarrow_available, COLUMNAR_FORMATS, ORDER_COLUMNS, ROW_GROUP_SIZE, columnar_chunks, write_columnar
+from export_jobs import ExportJobQueue, ExportQueueFull
+from timesheet_pdf import render_weekly_timesheet
+from order_snapshot import OrderSnapshot, SNAPSHOT_COLUMNS, DIMENSIONS, PERIODS
 from dateutil import parser
 from functools import wraps
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here'
 current_dir = os.path.dirname(os.path.abspath(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(current_dir, 'time_tracker.db')
+# SQLite file by default; set DATABASE_URL to run on PostgreSQL (see database_config.py)
+app.config['SQLALCHEMY_DATABASE_URI'] = get_database_url(current_dir)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))  # Seconds a logged-in user stays cached
+app.config['REPORT_CACHE_TTL'] = int(os.environ.get('REPORT_CACHE_TTL', 300))  # Seconds a cached report result stays fresh
+app.config['REPORT_CACHE_SIZE'] = int(os.environ.get('REPORT_CACHE_SIZE', 256))  # Cached report results kept (LRU)
+app.config['EXPORT_WORKERS'] = int(os.environ.get('EXPORT_WORKERS', 2))  # Background export threads
+app.config['EXPORT_MAX_PENDING'] = int(os.environ.get('EXPORT_MAX_PENDING', 20))  # Queued + running exports allowed
+app.config['EXPORT_JOB_RETENTION'] = int(os.environ.get('EXPORT_JOB_RETENTION', 3600))  # Seconds a finished export is kept
+app.config['ORDER_SNAPSHOT_TTL'] = int(os.environ.get('ORDER_SNAPSHOT_TTL', 3600))  # Seconds between full reloads of the analytics snapshot
+app.config['REPORTS_USE_SNAPSHOT'] = os.environ.get('REPORTS_USE_SNAPSHOT', '') == 'true'  # Productivity/time trends read the snapshot, not the rollup
 
 # Initialize Flask-Login
 login_manager = LoginManager()
@@ -47,6 +72,77 @@ if not os.path.exists(UPLOAD_FOLDER):
 
 db = SQLAlchemy(app)
 
+# Apply SQLite pragmas (WAL, busy_timeout, cache/mmap sizes) to every connection
+# Override with SQLITE_JOURNAL_MODE, SQLITE_BUSY_TIMEOUT, etc. (see sqlite_tuning.py)
+app.config['SQLITE_PRAGMAS'] = load_sqlite_pragmas()
+with app.app_context():
+    install_sqlite_tuning(db.engine, app.config['SQLITE_PRAGMAS'])
+
+def backup_sqlite_database(source_path, target_path):
+    """Copy a SQLite database with the online backup API.
+    
+    Unlike a file copy this includes pages still in the WAL and is safe while other connections write.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def run_postgres_tool(args):
+    """Run pg_dump/pg_restore, raising with the tool's own error message on failure"""
+    result = subprocess.run(args, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f'{args[0]} exited with status {result.returncode}')
+    return result.stdout
+
+def backup_extension():
+    """File extension of backups for the configured database backend"""
+    return '.db' if db.engine.dialect.name == 'sqlite' else '.dump'
+
+def backup_database(target_path):
+    """Write a backup of the configured database to target_path.
+    
+    SQLite uses the online backup API, PostgreSQL a pg_dump custom-format archive.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        backup_sqlite_database(db.engine.url.database, target_path)
+    else:
+        run_postgres_tool(['pg_dump', '--format=custom', '--no-owner', '--file', target_path,
+                           '--dbname', libpq_url(app.config['SQLALCHEMY_DATABASE_URI'])])
+
+def restore_database(source_path):
+    """Replace the configured database's contents with a backup made by backup_database"""
+    # Release pooled connections first so nothing holds locks on the tables being replaced
+    db.session.remove()
+    db.engine.dispose()
+    
+    if db.engine.dialect.name == 'sqlite':
+        # Test if it's a valid SQLite database
+        conn = sqlite3.connect(source_path)
+        conn.execute('PRAGMA schema_version')
+        conn.close()
+        
+        # Replace the current database contents with the uploaded one (WAL-safe)
+        backup_sqlite_database(source_path, db.engine.url.database)
+    else:
+        # Listing the archive fails fast on anything that isn't a pg_dump file
+        run_postgres_tool(['pg_restore', '--list', source_path])
+        run_postgres_tool(['pg_restore', '--clean', '--if-exists', '--no-owner', '--single-transaction',
+                           '--dbname', libpq_url(app.config['SQLALCHEMY_DATABASE_URI']), source_path])
+    
+    # Drop connections opened during the restore so they reopen against the restored data
+    db.engine.dispose()
+    # Tables, rollups and search indexes (with their SQLite sync triggers) the backup may not have
+    initialize_database()
+    settings_cache['snapshot'] = (None, {}, {})
+    invalidate_user_cache()
+    invalidate_report_cache()
+    order_snapshot.invalidate()
+    update_heatmaps(None)
+
 # Role-based access control decorators
 def admin_required(f):
     @wraps(f)
@@ -77,9 +173,51 @@ def inject_app_settings():
     settings = AppSetting.get_all()
     return {'app_settings': settings}
 
+# Users loaded by Flask-Login: {user_id: (expires_at, detached User snapshot)}
+user_cache = {}
+user_cache_lock = threading.Lock()
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """Load the logged-in user, from the user cache when fresh"""
+    user_id = int(user_id)
+    with user_cache_lock:
+        cached = user_cache.get(user_id)
+    
+    if cached is None or cached[0] < monotonic():
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        
+        # Keep a detached copy of the column values, never an instance bound to this request's session
+        snapshot = User(**{column.key: getattr(user, column.key) for column in User.__mapper__.column_attrs})
+        make_transient_to_detached(snapshot)
+        cached = (monotonic() + app.config['USER_CACHE_TTL'], snapshot)
+        with user_cache_lock:
+            user_cache[user_id] = cached
+    
+    # Attach a per-request copy without a SELECT, so routes can still modify and commit current_user
+    return db.session.merge(cached[1], load=False)
+
+def invalidate_user_cache(user_id=None):
+    """Drop one user (or, with no id, every user) from the user cache after their row changes"""
+    with user_cache_lock:
+        if user_id is None:
+            user_cache.clear()
+        else:
+            user_cache.pop(user_id, None)
+
+# Request-local memo for values derived from the current user
+def request_memo(key, compute):
+    """Compute a value once per request and reuse it (stored on flask.g)"""
+    memo = g.setdefault('request_memo', {})
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+def current_user_scope():
+    """user_id filter for the dashboard APIs: None (everyone) for admins, otherwise the current user's team"""
+    return request_memo('user_scope', lambda: None if current_user.is_admin else current_user.id)
 
 # Models
 class User(UserMixin, db.Model):
@@ -113,6 +251,26 @@ class User(UserMixin, db.Model):
             return f"{self.first_name} {self.last_name}"
         return self.username
     
+    @staticmethod
+    def find_by_employee_name(name):
+        """Find the user an order's employee_name refers to (username or "First Last")"""
+        full_name = User.first_name + ' ' + User.last_name
+        return User.query.filter(db.or_(User.username == name, full_name == name)).order_by(User.id).first()
+    
+    @staticmethod
+    def manager_chain(user_id):
+        """Ids of user_id and everyone above them, following User.manager_id as it stands in the session.
+        
+        Unlike the user_access closure this sees unflushed reassignments, so edits can be checked
+        before UserAccess.rebuild() runs.
+        """
+        manager_ids = dict(db.session.query(User.id, User.manager_id).all())  # Autoflushes pending edits
+        chain = []
+        while user_id in manager_ids and user_id not in chain:
+            chain.append(user_id)
+            user_id = manager_ids[user_id]
+        return chain
+    
     def update_login_timestamp(self):
         self.last_login = datetime.now()
         db.session.commit()
@@ -122,14 +280,59 @@ class User(UserMixin, db.Model):
         # Admin can access anyone
         if self.is_admin:
             return True
-            
-        # Manager can access their employees
-        if self.is_manager:
-            # Check if the user is one of this manager's employees
-            return self.employees.filter_by(id=user_id).first() is not None
-            
-        # Users can only access themselves
-        return self.id == user_id
+        
+        # Managers can access everyone below them; users can only access themselves.
+        # Data not linked to any user (user_id None) is admin-only
+        return user_id is not None and int(user_id) in self.team_user_ids()
+    
+    def team_user_ids(self):
+        """Ids of this user and everyone reporting to them directly or indirectly (one query per request)"""
+        def load():
+            rows = db.session.query(UserAccess.descendant_id).filter(UserAccess.ancestor_id == self.id)
+            return {descendant_id for (descendant_id,) in rows} | {self.id}
+        
+        if has_request_context():
+            return request_memo(('team_user_ids', self.id), load)
+        return load()
+
+class UserAccess(db.Model):
+    """Manager→employee closure table: one row per (manager, anyone below them) pair.
+    
+    Every user also has a depth 0 row for themselves, so "my orders" and "my
+    team's orders" are the same indexed join on ancestor_id.
+    """
+    __tablename__ = 'user_access'
+    ancestor_id = db.Column(db.Integer, primary_key=True)
+    descendant_id = db.Column(db.Integer, primary_key=True)
+    depth = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_user_access_descendant', 'descendant_id'),
+    )
+    
+    @staticmethod
+    def rebuild():
+        """Recompute the closure from User.manager_id.
+        
+        Call after users are added, reassigned or deleted (after a flush). Does not commit.
+        """
+        manager_ids = dict(db.session.query(User.id, User.manager_id).all())
+        
+        rows = []
+        for user_id in manager_ids:
+            ancestor_id, depth, seen = user_id, 0, set()
+            # Walk up the manager chain; stop at a missing manager or a cycle
+            while ancestor_id in manager_ids and ancestor_id not in seen:
+                rows.append({'ancestor_id': ancestor_id, 'descendant_id': user_id, 'depth': depth})
+                seen.add(ancestor_id)
+                ancestor_id = manager_ids[ancestor_id]
+                depth += 1
+        
+        UserAccess.query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(UserAccess.__table__.insert(), rows)
+        mark_all_reports_stale()  # Team-scoped results may now cover different users
+        return len(rows)
 
 
 class AppSetting(db.Model):
@@ -142,71 +345,132 @@ class AppSetting(db.Model):
     description = db.Column(db.String(255), nullable=True)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
+    @staticmethod
+    def convert(value, value_type):
+        """Convert a stored string to its typed value (None, or a value that no longer parses, gives None)"""
+        if value is None:
+            return None
+        try:
+            if value_type == 'int':
+                return int(value)
+            elif value_type == 'float':
+                return float(value)
+            elif value_type == 'bool':
+                return value.lower() == 'true'
+            elif value_type == 'json':
+                return json.loads(value)
+        except ValueError:
+            return None
+        return value
+    
+    @staticmethod
+    def cached():
+        """Typed settings as (values, values by section), reloaded in one query whenever the version changes"""
+        version = AppSettingVersion.current()
+        cached_version, values, sections = settings_cache['snapshot']
+        
+        if cached_version != version:
+            values, sections = {}, defaultdict(dict)
+            for setting in AppSetting.query.all():
+                value = AppSetting.convert(setting.value, setting.value_type)
+                values[setting.key] = value
+                sections[setting.section][setting.key] = value
+            # Swap in the whole snapshot at once so other threads never see a half-built cache
+            settings_cache['snapshot'] = (version, values, sections)
+        
+        return values, sections
+    
     @staticmethod
     def get(key, default=None):
         """Get a setting value by key"""
-        setting = AppSetting.query.filter_by(key=key).first()
-        
-        if not setting:
-            return default
-            
-        # Convert value based on type
-        if setting.value_type == 'int':
-            return int(setting.value) if setting.value is not None else default
-        elif setting.value_type == 'float':
-            return float(setting.value) if setting.value is not None else default
-        elif setting.value_type == 'bool':
-            return setting.value.lower() == 'true' if setting.value is not None else default
-        elif setting.value_type == 'json':
-            return json.loads(setting.value) if setting.value is not None else default
-        else:
-            return setting.value if setting.value is not None else default
+        values, _ = AppSetting.cached()
+        value = values.get(key)
+        return default if value is None else value
     
     @staticmethod
     def set(key, value, value_type='string', section='general', description=None):
         """Set a setting value"""
-        # Convert value to string for storage
-        if value_type == 'json' and not isinstance(value, str):
-            value = json.dumps(value)
-        elif value_type == 'bool' and isinstance(value, bool):
-            value = str(value).lower()
-        elif value is not None:
-            value = str(value)
-        
-        setting = AppSetting.query.filter_by(key=key).first()
-        if setting:
-            setting.value = value
-            setting.updated_at = datetime.now()
-        else:
-            setting = AppSetting(key=key, value=value, value_type=value_type, 
-                               section=section, description=description)
-            db.session.add(setting)
+        AppSetting.set_many(section, [(key, value, value_type)], descriptions={key: description})
+    
+    @staticmethod
+    def set_many(section, settings, descriptions=None):
+        """Set several (key, value, value_type) settings of a section in one transaction"""
+        descriptions = descriptions or {}
+        keys = [key for key, _, _ in settings]
+        existing = {setting.key: setting for setting in AppSetting.query.filter(AppSetting.key.in_(keys))}
+        
+        for key, value, value_type in settings:
+            # Convert value to string for storage
+            if value_type == 'json' and not isinstance(value, str):
+                value = json.dumps(value)
+            elif value_type == 'bool' and isinstance(value, bool):
+                value = str(value).lower()
+            elif value is not None:
+                value = str(value)
             
+            setting = existing.get(key)
+            if setting:
+                setting.value = value
+                setting.updated_at = datetime.now()
+            else:
+                setting = AppSetting(key=key, value=value, value_type=value_type,
+                                     section=section, description=descriptions.get(key))
+                db.session.add(setting)
+        
+        # Committed together with the values, so every process sees both or neither
+        AppSettingVersion.bump()
         db.session.commit()
+        settings_cache['snapshot'] = (None, {}, {})
         
     @staticmethod
     def get_all_by_section(section):
         """Get all settings for a specific section"""
-        settings = AppSetting.query.filter_by(section=section).all()
-        result = {}
-        
-        for setting in settings:
-            result[setting.key] = AppSetting.get(setting.key)
-            
-        return result
+        _, sections = AppSetting.cached()
+        return dict(sections.get(section, {}))
         
     @staticmethod
     def get_all():
         """Get all settings as a dictionary"""
-        settings = AppSetting.query.all()
-        result = {}
+        values, _ = AppSetting.cached()
+        return dict(values)
+
+# Process-wide settings cache: (version, values, values by section)
+settings_cache = {'snapshot': (None, {}, {})}
+
+class AppSettingVersion(db.Model):
+    """Single-row counter bumped with every settings write.
+    
+    Each thread/process compares it with the version its settings cache was
+    loaded at, so a change made anywhere is picked up on the next request.
+    """
+    __tablename__ = 'app_setting_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    @staticmethod
+    def current():
+        """The current version, checked once per request"""
+        if has_request_context() and 'app_setting_version' in g:
+            return g.app_setting_version
         
-        for setting in settings:
-            result[setting.key] = AppSetting.get(setting.key)
-            
-        return result
+        version = db.session.query(AppSettingVersion.version).filter_by(id=1).scalar() or 0
+        if has_request_context():
+            g.app_setting_version = version
+        return version
+    
+    @staticmethod
+    def bump():
+        """Move to a new version in the current transaction"""
+        updated = AppSettingVersion.query.filter_by(id=1).update(
+            {AppSettingVersion.version: AppSettingVersion.version + 1}, synchronize_session=False
+        )
+        if not updated:
+            db.session.add(AppSettingVersion(id=1, version=1))
+        if has_request_context():
+            g.pop('app_setting_version', None)
 
-class Order(db.Model):
+class OrderFields:
+    """Columns and helpers shared by the live order table and its archive"""
     id = db.Column(db.Integer, primary_key=True)
     order_number = db.Column(db.String(50), nullable=True)  # Used for service orders
     category = db.Column(db.String(50), nullable=True)  # For other time types
@@ -217,6 +481,7 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     notes = db.Column(db.Text, nullable=True)  # Notes/comments about the time entry
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    duration_seconds = db.Column(db.Integer, nullable=True)  # end_time - start_time, NULL while active
     
     def get_elapsed_time(self):
         if self.end_time:
@@ -235,6 +500,827 @@ class Order(db.Model):
 
     def get_status(self):
         return "Active" if not self.end_time else "Completed"
+    
+    def calculate_duration_seconds(self):
+        """Whole seconds between start and end, or None for active orders"""
+        if not self.end_time or not self.start_time:
+            return None
+        return int(round((self.end_time - self.start_time).total_seconds()))
+    
+    def get_elapsed_time_decimal(self):
+        """Get elapsed time as decimal hours"""
+        if not self.end_time:
+            duration = datetime.now() - self.start_time
+        else:
+            duration = self.end_time - self.start_time
+        return duration.total_seconds() / 3600
+
+class Order(OrderFields, db.Model):
+    """Live time entries: active timers and recent completed orders"""
+    # Indexes for the hot report/dashboard filters (keep in sync with migrate_database.py)
+    __table_args__ = (
+        db.Index('ix_order_employee_start', 'employee_name', 'start_time'),
+        db.Index('ix_order_user_start', 'user_id', 'start_time'),
+        db.Index('ix_order_start_end', 'start_time', 'end_time'),
+        # Partial indexes: completed orders by end time, and the (few) active timers
+        db.Index('ix_order_completed_end', 'end_time', sqlite_where=db.text('end_time IS NOT NULL'),
+                 postgresql_where=db.text('end_time IS NOT NULL')),
+        db.Index('ix_order_active_start', 'start_time', sqlite_where=db.text('end_time IS NULL'),
+                 postgresql_where=db.text('end_time IS NULL')),
+        # Never reuse ids: archived orders keep theirs (migrate_database.py converts existing tables)
+        {'sqlite_autoincrement': True},
+    )
+
+class ArchivedOrder(OrderFields, db.Model):
+    """Completed orders moved out of the live table by archive_completed_orders().
+    
+    Rows keep their original ids, which Order never hands out again (AUTOINCREMENT on
+    SQLite, a sequence on PostgreSQL). Report routes read it only when the requested
+    range starts before the archive cutoff (see order_partitions).
+    """
+    __tablename__ = 'order_archive'
+    __table_args__ = (
+        db.Index('ix_order_archive_start', 'start_time'),
+        db.Index('ix_order_archive_employee_start', 'employee_name', 'start_time'),
+    )
+
+@db.event.listens_for(Order, 'before_insert')
+@db.event.listens_for(Order, 'before_update')
+def set_order_duration(mapper, connection, order):
+    """Keep the stored duration in step with start/end times on every write path"""
+    order.duration_seconds = order.calculate_duration_seconds()
+
+class Employee(db.Model):
+    """Employee dimension: one row per distinct order employee_name, linked to a User when the name matches.
+    
+    Feeds the employee dropdowns and resolves Order.user_id without scanning the order table.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    
+    @staticmethod
+    def resolve(name):
+        """Get the employee row for a name, creating (and linking) it on first use"""
+        if not name:
+            return None
+        
+        employee = Employee.query.filter_by(name=name).first()
+        if employee:
+            return employee
+        
+        user = User.find_by_employee_name(name)
+        employee = Employee(name=name, user_id=user.id if user else None)
+        try:
+            # Savepoint, so a concurrent insert of the same name doesn't abort the order write
+            with db.session.begin_nested():
+                db.session.add(employee)
+        except IntegrityError:
+            employee = Employee.query.filter_by(name=name).first()
+        return employee
+    
+    @staticmethod
+    def relink():
+        """Re-resolve every employee against the users and propagate changed links to orders and rollups.
+        
+        Call after users are added, renamed or deleted. Does not commit.
+        """
+        user_ids = {}
+        for user in User.query.order_by(User.id.desc()).all():  # lowest id wins on duplicate names
+            user_ids[user.get_full_name()] = user.id
+            user_ids[user.username] = user.id
+        
+        changed = 0
+        for employee in Employee.query.all():
+            user_id = user_ids.get(employee.name)
+            if employee.user_id != user_id:
+                employee.user_id = user_id
+                for model in (Order, ArchivedOrder, DailyHours):
+                    model.query.filter_by(employee_name=employee.name).update(
+                        {model.user_id: user_id}, synchronize_session=False)
+                changed += 1
+        if changed:
+            mark_all_reports_stale()
+        return changed
+    
+    @staticmethod
+    def unlink(user_id):
+        """Clear every reference to a user that is about to be deleted (relink afterwards). Does not commit."""
+        for model in (Employee, Order, ArchivedOrder, DailyHours):
+            model.query.filter(model.user_id == user_id).update({model.user_id: None}, synchronize_session=False)
+    
+    @staticmethod
+    def names():
+        """All employee names, sorted, for filter dropdowns"""
+        return [name for (name,) in db.session.query(Employee.name).order_by(Employee.name).all()]
+
+class DailyHours(db.Model):
+    """Rollup of completed order time per employee, day and entry type/category.
+
+    Maintained in the same transaction as every Order write (see
+    before_order_write/after_order_write) so the dashboard APIs read one row
+    per day instead of every order. DailyHours.rebuild() recomputes it.
+    """
+    __tablename__ = 'daily_hours'
+    id = db.Column(db.Integer, primary_key=True)
+    employee_name = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Follows Order.user_id
+    day = db.Column(db.Date, nullable=False)
+    entry_type = db.Column(db.String(20), nullable=False, default='service_order')
+    category = db.Column(db.String(50), nullable=False, default='')  # '' for service orders
+    seconds = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('employee_name', 'day', 'entry_type', 'category', name='uq_daily_hours_key'),
+        db.Index('ix_daily_hours_day', 'day'),
+        db.Index('ix_daily_hours_user_day', 'user_id', 'day'),
+    )
+    
+    @staticmethod
+    def key_for(order):
+        """Rollup key for a completed order, or None if the order is still active"""
+        if not order.end_time:
+            return None
+        return {
+            'employee_name': order.employee_name,
+            'day': order.start_time.date(),
+            'entry_type': order.entry_type or 'service_order',
+            'category': order.category or ''
+        }
+    
+    @staticmethod
+    def adjust(order, sign=1):
+        """Add (sign=1) or remove (sign=-1) an order's time in its rollup row"""
+        key = DailyHours.key_for(order)
+        if key is None:
+            return
+        
+        seconds = order.calculate_duration_seconds() * sign
+        increment = {
+            DailyHours.seconds: DailyHours.seconds + seconds,
+            DailyHours.order_count: DailyHours.order_count + sign
+        }
+        updated = DailyHours.query.filter_by(**key).update(increment, synchronize_session=False)
+        
+        if not updated and sign > 0:
+            try:
+                # Savepoint, so a concurrent insert of the same key doesn't abort the order write
+                with db.session.begin_nested():
+                    db.session.add(DailyHours(seconds=seconds, order_count=1, user_id=order.user_id, **key))
+            except IntegrityError:
+                DailyHours.query.filter_by(**key).update(increment, synchronize_session=False)
+        elif updated and sign < 0:
+            # Drop rows that no longer have any orders behind them
+            DailyHours.query.filter_by(**key).filter(DailyHours.order_count <= 0).delete(synchronize_session=False)
+    
+    @staticmethod
+    def rebuild():
+        """Recompute every rollup row from the live and archived orders (backfill or drift repair)"""
+        DailyHours.query.delete(synchronize_session=False)
+        mark_all_reports_stale()
+        
+        orders = db.union_all(*[
+            db.select(model.employee_name, model.user_id, model.start_time, model.entry_type, model.category,
+                      model.duration_seconds, model.id).where(model.end_time.isnot(None))
+            for model in (Order, ArchivedOrder)
+        ]).subquery()
+        entry_type = db.func.coalesce(orders.c.entry_type, 'service_order')
+        category = db.func.coalesce(orders.c.category, '')
+        day = day_of(orders.c.start_time)
+        
+        rollup = db.select(
+            orders.c.employee_name, db.func.max(orders.c.user_id), day, entry_type, category,
+            db.func.sum(orders.c.duration_seconds), db.func.count(orders.c.id)
+        ).group_by(orders.c.employee_name, day, entry_type, category)
+        
+        db.session.execute(DailyHours.__table__.insert().from_select(
+            ['employee_name', 'user_id', 'day', 'entry_type', 'category', 'seconds', 'order_count'], rollup
+        ))
+        db.session.commit()
+        return DailyHours.query.count()
+    
+    @staticmethod
+    def add_totals(totals):
+        """Fold pre-aggregated order time into the rollups (bulk imports). Does not commit.
+        
+        totals maps (employee_name, day, entry_type, category) to [seconds, order_count, user_id].
+        One SELECT finds the existing rows, then one batched UPDATE and one batched INSERT.
+        """
+        if not totals:
+            return
+        
+        days = [key[1] for key in totals]
+        existing = {
+            (row.employee_name, row.day, row.entry_type, row.category): row.id
+            for row in db.session.query(DailyHours.id, DailyHours.employee_name, DailyHours.day,
+                                        DailyHours.entry_type, DailyHours.category).filter(
+                DailyHours.employee_name.in_({key[0] for key in totals}),
+                DailyHours.day >= min(days), DailyHours.day <= max(days)
+            )
+        }
+        
+        updates, inserts = [], []
+        for key, (seconds, order_count, user_id) in totals.items():
+            if key in existing:
+                updates.append({'row_id': existing[key], 'add_seconds': seconds, 'add_count': order_count})
+            else:
+                employee_name, day, entry_type, category = key
+                inserts.append({'employee_name': employee_name, 'user_id': user_id, 'day': day, 'entry_type': entry_type,
+                                'category': category, 'seconds': seconds, 'order_count': order_count})
+        
+        table = DailyHours.__table__
+        if updates:
+            db.session.execute(table.update().where(table.c.id == db.bindparam('row_id')).values(
+                seconds=table.c.seconds + db.bindparam('add_seconds'),
+                order_count=table.c.order_count + db.bindparam('add_count')
+            ), updates)
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+
+# Cached report results: {key: (expires_at, ReportScope, value)}, least recently used first.
+# Per process, like the user cache; order writes made by another process are picked up after REPORT_CACHE_TTL.
+report_cache = OrderedDict()
+report_cache_lock = threading.Lock()
+report_cache_stats = {'hits': 0, 'misses': 0, 'invalidated': 0, 'evicted': 0, 'writes': 0}
+
+class ReportScope(namedtuple('ReportScope', ('start_day', 'end_day', 'employee', 'user_ids'))):
+    """The completed orders a cached result was computed from: start day in [start_day, end_day)
+    (either bound None for open-ended), one employee name or None for everyone, and a set of user
+    ids or None for everyone. Writing an order inside the scope makes the result stale.
+    """
+    __slots__ = ()
+    
+    def covers(self, day, employee_name, user_id):
+        return ((self.start_day is None or day >= self.start_day)
+                and (self.end_day is None or day < self.end_day)
+                and (not self.employee or employee_name == self.employee)
+                and (self.user_ids is None or user_id in self.user_ids))
+
+def scope_user_ids():
+    """Ids of the users the current user's team-scoped reports read (None for admins, who see everyone)"""
+    user_id = current_user_scope()
+    if user_id is None:
+        return None
+    return request_memo('scope_user_ids', lambda: frozenset(
+        descendant_id for (descendant_id,) in db.session.query(UserAccess.descendant_id).filter_by(ancestor_id=user_id)
+    ))
+
+def cached_report(route, params, compute, start_day=None, end_day=None, employee=None, team_scoped=False):
+    """Return compute() for a report route, reusing the result of an identical earlier request.
+    
+    Results are keyed by route, params (a tuple of the parsed request parameters)
+    and the current user's scope. They are dropped when an order inside
+    [start_day, end_day) for employee (and, with team_scoped, the user's team) is
+    committed, after REPORT_CACHE_TTL seconds, or least recently used first once
+    REPORT_CACHE_SIZE results are cached. Cached values are shared between
+    requests and must not be modified.
+    """
+    key = (route, params, current_user_scope())
+    now = monotonic()
+    with report_cache_lock:
+        cached = report_cache.get(key)
+        if cached is not None and cached[0] >= now:
+            report_cache.move_to_end(key)
+            report_cache_stats['hits'] += 1
+            return cached[2]
+        report_cache_stats['misses'] += 1
+        writes = report_cache_stats['writes']
+    
+    value = compute()
+    scope = ReportScope(as_date(start_day), as_date(end_day), employee or None,
+                        scope_user_ids() if team_scoped else None)
+    
+    with report_cache_lock:
+        # Only keep the result if no order write was committed while it was being computed
+        if report_cache_stats['writes'] == writes:
+            report_cache[key] = (now + app.config['REPORT_CACHE_TTL'], scope, value)
+            report_cache.move_to_end(key)
+            while len(report_cache) > app.config['REPORT_CACHE_SIZE']:
+                report_cache.popitem(last=False)
+                report_cache_stats['evicted'] += 1
+    return value
+
+def invalidate_report_cache(changes=None):
+    """Drop cached results covering any (day, employee_name, user_id) in changes, or every result when changes is None"""
+    with report_cache_lock:
+        report_cache_stats['writes'] += 1
+        if changes is None:
+            stale = list(report_cache)
+        else:
+            stale = [key for key, (_, scope, _) in report_cache.items()
+                     if any(scope.covers(*change) for change in changes)]
+        for key in stale:
+            del report_cache[key]
+        report_cache_stats['invalidated'] += len(stale)
+
+def mark_reports_stale(day, employee_name, user_id):
+    """Queue a completed order change for invalidate_report_cache once the current transaction commits"""
+    pending = db.session.info.setdefault('stale_reports', set())
+    if pending is not None:
+        pending.add((day, employee_name, user_id))
+
+def mark_all_reports_stale():
+    """Queue dropping every cached report result (and reloading the analytics snapshot) once the current transaction commits"""
+    db.session.info['stale_reports'] = None
+    db.session.info['snapshot_orders'] = None
+    db.session.info['heatmap_changes'] = None
+
+# Calendar heatmaps: {user scope: HeatmapEntry} with one slot per day of the last HEATMAP_DAYS days.
+# Committed order writes add their seconds to the matching slot of every cached heatmap in place, so
+# a heatmap is only rebuilt when the day rolls over, after REPORT_CACHE_TTL, or after bulk changes.
+HEATMAP_DAYS = 366
+HEATMAP_THRESHOLDS = (2, 4, 6)  # Hours at which a day moves up to levels 2, 3 and 4 (any time is level 1)
+HeatmapEntry = namedtuple('HeatmapEntry', ('start_day', 'expires_at', 'user_ids', 'seconds'))
+heatmap_cache = {}
+heatmap_cache_lock = threading.Lock()
+heatmap_cache_stats = {'hits': 0, 'misses': 0, 'updates': 0, 'writes': 0}
+
+def calendar_heatmap_seconds():
+    """(start_day, float array of completed seconds per day from start_day to today) in the current user's scope"""
+    scope = current_user_scope()
+    start_day = date.today() - timedelta(days=HEATMAP_DAYS - 1)
+    now = monotonic()
+    with heatmap_cache_lock:
+        cached = heatmap_cache.get(scope)
+        if cached is not None and cached.start_day == start_day and cached.expires_at >= now:
+            heatmap_cache_stats['hits'] += 1
+            return start_day, cached.seconds.copy()
+        heatmap_cache_stats['misses'] += 1
+        writes = heatmap_cache_stats['writes']
+    
+    # Sum completed time per day from the daily rollup; admins see everyone, others their team
+    seconds = np.zeros(HEATMAP_DAYS)
+    rows = rollup_query([DailyHours.day, db.func.sum(DailyHours.seconds)], start_day,
+                        start_day + timedelta(days=HEATMAP_DAYS), scope).group_by(DailyHours.day)
+    for day, day_seconds in rows:
+        seconds[(as_date(day) - start_day).days] = day_seconds or 0
+    
+    with heatmap_cache_lock:
+        # As in cached_report: a write committed meanwhile may be missing from these totals
+        if heatmap_cache_stats['writes'] == writes:
+            heatmap_cache[scope] = HeatmapEntry(start_day, now + app.config['REPORT_CACHE_TTL'],
+                                                scope_user_ids(), seconds.copy())
+    return start_day, seconds
+
+def mark_heatmap_change(day, user_id, seconds):
+    """Queue adding seconds to day in the cached heatmaps covering user_id once the current transaction commits"""
+    pending = db.session.info.setdefault('heatmap_changes', [])
+    if pending is not None:
+        pending.append((day, user_id, seconds))
+
+def update_heatmaps(changes):
+    """Apply committed (day, user_id, seconds) changes to the cached heatmaps in place, or drop them all for None"""
+    with heatmap_cache_lock:
+        heatmap_cache_stats['writes'] += 1
+        if changes is None:
+            heatmap_cache.clear()
+            return
+        for entry in heatmap_cache.values():
+            for day, user_id, seconds in changes:
+                slot = (day - entry.start_day).days
+                if 0 <= slot < HEATMAP_DAYS and (entry.user_ids is None or user_id in entry.user_ids):
+                    entry.seconds[slot] += seconds
+                    heatmap_cache_stats['updates'] += 1
+
+@db.event.listens_for(db.session, 'after_commit')
+def invalidate_committed_reports(session):
+    # Invalidate only once the write is visible, so a concurrent miss can't re-cache the old result.
+    # Changes queued in a transaction that is rolled back are discarded with the session (at worst
+    # they invalidate a little extra on a later commit in the same request).
+    if session.in_nested_transaction():
+        return  # A released savepoint (begin_nested); the changes aren't committed yet
+    if 'stale_reports' in session.info:
+        invalidate_report_cache(session.info.pop('stale_reports'))
+    if 'snapshot_orders' in session.info:
+        order_snapshot.invalidate(session.info.pop('snapshot_orders'))
+    if 'heatmap_changes' in session.info:
+        update_heatmaps(session.info.pop('heatmap_changes'))
+
+@db.event.listens_for(db.session, 'after_soft_rollback')
+def discard_heatmap_changes(session, previous_transaction):
+    # Unlike invalidations, heatmap deltas from a rolled back transaction must never be applied.
+    # A savepoint rolling back (the IntegrityError fallbacks in DailyHours.adjust and Employee.resolve)
+    # leaves the deltas queued before it in the still open transaction, so only drop them on the outermost one
+    if previous_transaction.parent is None:
+        session.info.pop('heatmap_changes', None)
+
+# Order write hooks: call around every change to an Order, before the commit
+def before_order_write(order):
+    """Take an existing order's current values out of the rollups (and the cached reports) before it is modified"""
+    DailyHours.adjust(order, -1)
+    if order.end_time:
+        mark_reports_stale(order.start_time.date(), order.employee_name, order.user_id)
+        mark_heatmap_change(order.start_time.date(), order.user_id, -order.calculate_duration_seconds())
+
+def after_order_write(order, owner_id=None):
+    """Link the order to its employee/user and fold its (new) values into the rollups in the same transaction.
+    
+    An employee_name that matches no user leaves the order with owner_id, or with the user it already belongs to
+    (e.g. whoever started a free-text timer), so it stays in their team's listings.
+    """
+    employee = Employee.resolve(order.employee_name)
+    if employee and employee.user_id is not None:
+        order.user_id = employee.user_id
+    elif owner_id is not None:
+        order.user_id = owner_id
+    DailyHours.adjust(order, 1)
+    if order.end_time:
+        mark_reports_stale(order.start_time.date(), order.employee_name, order.user_id)
+        mark_heatmap_change(order.start_time.date(), order.user_id, order.calculate_duration_seconds())
+
+# Analytics snapshot (see order_snapshot.py): NumPy arrays of every completed order for /api/pivot.
+# Per process; orders written through the ORM here are re-read on the next pivot, new ids from anywhere
+# (bulk imports, other processes) as well, and everything is reloaded every ORDER_SNAPSHOT_TTL seconds.
+def snapshot_order_rows(ids=None, after_id=None):
+    """Completed order rows in SNAPSHOT_COLUMNS order (times as epoch seconds): every one (live and archive) when ids and
+    after_id are None, otherwise the live orders with id in ids or above after_id"""
+    models = (ArchivedOrder, Order) if ids is None and after_id is None else (Order,)
+    for model in models:
+        # Times leave the database as epoch seconds, skipping per-row datetime parsing
+        columns = [epoch_expression(getattr(model, column), db.engine.dialect.name)
+                   if column in ('start_time', 'end_time') else getattr(model, column) for column in SNAPSHOT_COLUMNS]
+        query = db.session.query(*columns).filter(model.end_time.isnot(None))
+        if after_id is not None:
+            query = query.filter(db.or_(model.id > after_id, model.id.in_(ids or [])))
+        yield from query.yield_per(ORDER_ROW_CHUNK)
+
+order_snapshot = OrderSnapshot(snapshot_order_rows, ttl=app.config['ORDER_SNAPSHOT_TTL'])
+
+@db.event.listens_for(Order, 'after_insert')
+@db.event.listens_for(Order, 'after_update')
+@db.event.listens_for(Order, 'after_delete')
+def mark_snapshot_order_stale(mapper, connection, order):
+    """Queue the written order for the analytics snapshot once the current transaction commits"""
+    pending = db.session.info.setdefault('snapshot_orders', set())
+    if pending is not None:
+        pending.add(order.id)
+
+def snapshot_totals(group_by, start_day=None, end_day=None, user_id=None, **filters):
+    """Rows of (*labels, seconds, order count) per group_by combination from the analytics snapshot,
+    like a rollup_query GROUP BY: orders starting in [start_day, end_day), optionally one user's team"""
+    user_ids = None
+    if user_id is not None:
+        user_ids = [descendant_id for (descendant_id,) in
+                    db.session.query(UserAccess.descendant_id).filter_by(ancestor_id=user_id)]
+    result = order_snapshot.pivot(group_by, start_day=start_day, end_day=end_day, user_ids=user_ids, **filters)
+    return list(zip(*result.keys, result.seconds.tolist(), result.counts.tolist()))
+
+# Archive of old completed orders
+def archive_cutoff():
+    """Date before which completed orders may live in the archive, or None if nothing was archived"""
+    value = AppSetting.get('archive_cutoff')
+    return date.fromisoformat(value) if value else None
+
+def order_partitions(start_day=None):
+    """Order models a report must read for a range starting at start_day (None means open-ended).
+    
+    Only ranges reaching back past the archive cutoff pay for reading the archive.
+    """
+    cutoff = archive_cutoff()
+    if cutoff is not None and (start_day is None or as_date(start_day) < cutoff):
+        return [Order, ArchivedOrder]
+    return [Order]
+
+def archive_completed_orders(older_than_days):
+    """Move completed orders that started more than older_than_days ago into the archive table.
+    
+    Copy and delete run in one transaction. The daily_hours rollup keeps the
+    history, so dashboards are unaffected. Returns the number of orders moved.
+    """
+    cutoff = date.today() - timedelta(days=older_than_days)
+    archivable = [Order.end_time.isnot(None), Order.start_time < day_start(cutoff)]
+    
+    columns = [column.name for column in Order.__table__.columns]
+    db.session.execute(ArchivedOrder.__table__.insert().from_select(
+        columns, db.select(*[Order.__table__.c[name] for name in columns]).where(*archivable)
+    ))
+    moved = Order.query.filter(*archivable).delete(synchronize_session=False)
+    mark_all_reports_stale()
+    
+    # Only ever move the cutoff forward; AppSetting.set commits the whole move
+    previous = archive_cutoff()
+    if previous is None or cutoff > previous:
+        AppSetting.set('archive_cutoff', cutoff.isoformat(), section='backup',
+                       description='Completed orders that started before this date are archived')
+    else:
+        db.session.commit()
+    return moved
+
+# Bulk import of labor collection exports (parsing lives in labor_import.py)
+IMPORT_BATCH_SIZE = 5000  # Rows per INSERT batch and transaction
+IMPORT_MAX_ERRORS = 500  # Per-row errors kept in the import report
+
+def insert_order_batch(entries, user_ids):
+    """Insert completed order entries with one executemany and fold them into the rollups. Does not commit.
+    
+    user_ids caches employee name -> user id across batches. Entries already stored
+    (same employee, order number and start time) are skipped, so re-importing an
+    export is safe. Returns (inserted, duplicates).
+    """
+    for name in {entry['employee_name'] for entry in entries} - user_ids.keys():
+        user_ids[name] = Employee.resolve(name).user_id
+    
+    # One indexed range query per table for the keys this batch could collide with
+    start = min(entry['start_time'] for entry in entries)
+    end = max(entry['start_time'] for entry in entries)
+    names = {entry['employee_name'] for entry in entries}
+    seen = set()
+    for model in order_partitions(start.date()):
+        seen.update(tuple(row) for row in db.session.query(model.employee_name, model.order_number, model.start_time).filter(
+            model.employee_name.in_(names), model.start_time >= start, model.start_time <= end
+        ))
+    
+    now = datetime.now()
+    rows, totals = [], {}
+    for entry in entries:
+        key = (entry['employee_name'], entry['order_number'], entry['start_time'])
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        user_id = user_ids[entry['employee_name']]
+        seconds = int(round((entry['end_time'] - entry['start_time']).total_seconds()))
+        rows.append(dict(entry, category=None, created_at=now, user_id=user_id, duration_seconds=seconds))
+        
+        rollup = totals.setdefault((entry['employee_name'], entry['start_time'].date(), entry['entry_type'], ''),
+                                   [0, 0, user_id])
+        rollup[0] += seconds
+        rollup[1] += 1
+    
+    if rows:
+        db.session.execute(Order.__table__.insert(), rows)
+        DailyHours.add_totals(totals)
+        for (employee_name, day, _, _), (seconds, _, user_id) in totals.items():
+            mark_reports_stale(day, employee_name, user_id)
+            mark_heatmap_change(day, user_id, seconds)
+    return len(rows), len(entries) - len(rows)
+
+def import_labor_entries(entries, batch_size=IMPORT_BATCH_SIZE):
+    """Bulk-import (line, entry, error) triples from labor_import.iter_labor_entries.
+    
+    Each batch commits as its own transaction, so memory stays flat and a batch
+    the database rejects only loses its own rows (reported as errors). Yields the
+    running totals dict after every batch; the last yield is the final report.
+    """
+    stats = {'rows': 0, 'imported': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+    user_ids = {}
+    
+    def record_error(line, message):
+        stats['failed'] += 1
+        if len(stats['errors']) < IMPORT_MAX_ERRORS:
+            stats['errors'].append({'line': line, 'error': message})
+    
+    for batch in chunked(entries, batch_size):
+        stats['rows'] += len(batch)
+        valid = []
+        for line, entry, error in batch:
+            if error:
+                record_error(line, error)
+            else:
+                valid.append((line, entry))
+        
+        if valid:
+            try:
+                inserted, duplicates = insert_order_batch([entry for _, entry in valid], user_ids)
+                db.session.commit()
+                stats['imported'] += inserted
+                stats['duplicates'] += duplicates
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                user_ids.clear()  # Employees created in this batch were rolled back too
+                message = f'Batch rejected by the database: {getattr(e, "orig", e)}'
+                for line, _ in valid:
+                    record_error(line, message)
+        
+        yield stats
+
+# Query helpers shared by the report and dashboard routes
+def day_start(day):
+    """Midnight at the start of the given date"""
+    return datetime.combine(day, datetime.min.time())
+
+def day_of(column):
+    """SQL expression for the calendar date of a datetime column (date() on SQLite, date_trunc on PostgreSQL)"""
+    return day_expression(column, db.engine.dialect.name)
+
+def week_of(column):
+    """SQL expression for the Monday starting the week of a date/datetime column"""
+    return week_expression(column, db.engine.dialect.name)
+
+def month_of(column):
+    """SQL expression for the first day of the month of a date/datetime column"""
+    return month_expression(column, db.engine.dialect.name)
+
+def as_date(value):
+    """Normalize a date returned by a SQL date expression (SQLite returns 'YYYY-MM-DD' strings)"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def rollup_query(columns, start_day, end_day, user_id=None):
+    """Query DailyHours columns for days in [start_day, end_day), optionally for one user and everyone below them.
+    
+    Either bound may be None for an open-ended range.
+    """
+    query = db.session.query(*columns).select_from(DailyHours)
+    if start_day is not None:
+        query = query.filter(DailyHours.day >= start_day)
+    if end_day is not None:
+        query = query.filter(DailyHours.day < end_day)
+    if user_id is not None:
+        query = query.join(UserAccess, UserAccess.descendant_id == DailyHours.user_id).filter(
+            UserAccess.ancestor_id == user_id
+        )
+    return query
+
+def team_orders_query(user_id, model=None):
+    """Orders of a user and everyone below them in the manager tree, as one indexed join.
+    
+    user_id None (see current_user_scope) means every order.
+    """
+    model = model or Order
+    if user_id is None:
+        return model.query
+    return model.query.join(UserAccess, UserAccess.descendant_id == model.user_id).filter(
+        UserAccess.ancestor_id == user_id
+    )
+
+def team_order_or_404(order_id):
+    """The live order with this id, if the current user may see it (their own or their team's; admins see all)"""
+    order = Order.query.get_or_404(order_id)
+    if not current_user.has_access_to_user(order.user_id):
+        abort(404)
+    return order
+
+def rollup_window_query(windows, user_id=None):
+    """Rollup query of (entry_type, seconds in each window...) for named [start_day, end_day) windows.
+    
+    Reads the days spanning every window once (through the day index) and sums
+    each window with a conditional SUM(CASE WHEN day in window ...).
+    """
+    start_day = min(start for start, _ in windows.values())
+    end_day = max(end for _, end in windows.values())
+    sums = [db.func.sum(db.case((db.and_(DailyHours.day >= start, DailyHours.day < end), DailyHours.seconds), else_=0))
+            for start, end in windows.values()]
+    return rollup_query([DailyHours.entry_type, *sums], start_day, end_day, user_id).group_by(DailyHours.entry_type)
+
+def rollup_window_seconds(windows, user_id=None):
+    """{window: {entry_type: seconds}} for named [start_day, end_day) windows, from one rollup query"""
+    totals = {name: {} for name in windows}
+    for entry_type, *seconds in rollup_window_query(windows, user_id):
+        for name, window_seconds in zip(windows, seconds):
+            if window_seconds:
+                totals[name][entry_type] = window_seconds
+    return totals
+
+def completed_orders_between(start_day, end_day, employee=None, model=None):
+    """Completed orders that started on or after start_day and before end_day.
+
+    Pass employee to restrict to one employee name; model selects the live table (default) or the archive.
+    """
+    model = model or Order
+    query = model.query.filter(
+        model.start_time >= day_start(start_day),
+        model.start_time < day_start(end_day),
+        model.end_time.isnot(None)
+    )
+    if employee:
+        query = query.filter(model.employee_name == employee)
+    return query
+
+def orders_in_range(model, start_date=None, end_date=None):
+    """Orders of model (live or archive) with start_time in [start_date, end_date]; either bound may be None"""
+    query = model.query
+    if start_date:
+        query = query.filter(model.start_time >= start_date)
+    if end_date:
+        query = query.filter(model.start_time <= end_date)
+    return query
+
+# Read-only order rows for reports and exports
+ORDER_ROW_FIELDS = ('id', 'order_number', 'category', 'entry_type', 'employee_name',
+                    'start_time', 'end_time', 'notes', 'duration_seconds')
+ORDER_ROW_CHUNK = 2000  # Rows fetched per round trip when streaming
+
+class OrderRow(namedtuple('OrderRow', ORDER_ROW_FIELDS)):
+    """Plain tuple projection of an order: no identity map, session or change tracking"""
+    __slots__ = ()
+    
+    @property
+    def hours(self):
+        """Stored duration in decimal hours (0 while active)"""
+        return (self.duration_seconds or 0) / 3600
+
+def order_rows(query, model):
+    """Stream an order query as OrderRows in start_time order, selecting only ORDER_ROW_FIELDS in yield_per chunks"""
+    query = query.with_entities(*[getattr(model, field) for field in ORDER_ROW_FIELDS]).order_by(model.start_time)
+    for row in query.yield_per(ORDER_ROW_CHUNK):
+        yield OrderRow._make(row)
+
+def partitioned_order_rows(build_query, start_day=None):
+    """OrderRows from every table a range starting at start_day needs, merged by start_time.
+    
+    build_query(model) returns the filtered query for one table (live or archive).
+    """
+    streams = [order_rows(build_query(model), model) for model in order_partitions(start_day)]
+    if len(streams) == 1:
+        return streams[0]
+    return heapq.merge(*streams, key=attrgetter('start_time'))
+
+def order_export_chunks(start_date=None, end_date=None, employee=None, chunk_size=ROW_GROUP_SIZE):
+    """Lists of up to chunk_size ORDER_COLUMNS tuples in start_time order, for the columnar export.
+    
+    The date range and employee filters run in the query, so only matching rows
+    leave the database; the archive (older rows) is read first when the range needs it.
+    """
+    for model in reversed(order_partitions(start_date)):
+        query = orders_in_range(model, start_date, end_date)
+        if employee:
+            query = query.filter(model.employee_name == employee)
+        statement = query.with_entities(*[getattr(model, column) for column in ORDER_COLUMNS]) \
+            .order_by(model.start_time, model.id).statement
+        yield from db.session.execute(statement.execution_options(yield_per=chunk_size)).partitions()
+
+# Keyset pagination of the order listing: newest first by (start_time, id)
+ORDER_PAGE_SIZE = 25
+ORDER_PAGE_MAX = 100
+ORDER_STATUSES = ('active', 'completed', 'all')
+
+def encode_order_cursor(order):
+    """Opaque cursor pointing just past an order in the listing"""
+    return base64.urlsafe_b64encode(f'{order.start_time.isoformat()}|{order.id}'.encode()).decode()
+
+def decode_order_cursor(cursor):
+    """(start_time, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        start_time, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(start_time), int(order_id)
+    except ValueError:  # Also covers bad base64 and non-UTF-8 bytes
+        raise ValueError('Invalid cursor')
+
+def order_page_query(model, status='active', employee=None, entry_type=None, after=None, limit=ORDER_PAGE_SIZE,
+                     user_id=None):
+    """One page of orders from model, newest first, starting after the (start_time, id) key.
+    
+    Seeks straight to the key through the start_time indexes, so deep pages cost the same as the first.
+    user_id limits the page to that user's team (see team_orders_query).
+    """
+    query = team_orders_query(user_id, model)
+    if status == 'active':
+        query = query.filter(model.end_time.is_(None))
+    elif status == 'completed':
+        query = query.filter(model.end_time.isnot(None))
+    if employee:
+        query = query.filter(model.employee_name == employee)
+    if entry_type:
+        query = query.filter(model.entry_type == entry_type)
+    if after is not None:
+        query = query.filter(db.tuple_(model.start_time, model.id) < db.tuple_(*after))
+    return query.order_by(model.start_time.desc(), model.id.desc()).limit(limit)
+
+def order_page(status='active', employee=None, entry_type=None, cursor=None, limit=ORDER_PAGE_SIZE, user_id=None):
+    """Fetch one page of the order listing as (orders, next_cursor); next_cursor is None on the last page.
+    
+    Reads at most limit + 1 rows per table: active orders are never archived,
+    other listings merge the live and archive pages.
+    """
+    after = decode_order_cursor(cursor) if cursor else None
+    models = [Order] if status == 'active' else order_partitions()
+    
+    orders = []
+    for model in models:
+        orders.extend(order_page_query(model, status, employee, entry_type, after, limit + 1, user_id).all())
+    orders.sort(key=lambda order: (order.start_time, order.id), reverse=True)
+    
+    next_cursor = encode_order_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+def order_to_dict(order):
+    """JSON representation of an order for the listing API"""
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'entry_type': order.entry_type,
+        'category': order.category,
+        'employee_name': order.employee_name,
+        'start_time': order.start_time.isoformat(),
+        'end_time': order.end_time.isoformat() if order.end_time else None,
+        'status': order.get_status(),
+        'elapsed_time': order.get_elapsed_time(),
+        'notes': order.notes
+    }
+
+def order_listing_args(args):
+    """Status/employee/type filters of the listing from request args"""
+    status = args.get('status', 'active')
+    return {
+        'status': status if status in ORDER_STATUSES else 'active',
+        'employee': args.get('employee') or None,
+        'entry_type': args.get('entry_type') or None
+    }
 
 # Authentication Routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -259,6 +1345,7 @@ def login():
         # Update last login timestamp
         user.last_login = datetime.now()
         db.session.commit()
+        invalidate_user_cache(user.id)
         
         # Log the user in
         login_user(user)
@@ -322,6 +1409,9 @@ def register():
             new_user.is_admin = True
         
         db.session.add(new_user)
+        db.session.flush()
+        Employee.relink()
+        UserAccess.rebuild()
         db.session.commit()
         
         flash('Account created successfully! You can now log in.', 'success')
@@ -342,9 +1432,94 @@ def create_default_admin():
 @app.route('/')
 @login_required
 def index():
-    active_orders = Order.query.filter_by(end_time=None).order_by(Order.start_time.desc()).all()
-    completed_orders = Order.query.filter(Order.end_time != None).order_by(Order.end_time.desc()).limit(10).all()
-    return render_template('index.html', active_orders=active_orders, completed_orders=completed_orders)
+    filters = order_listing_args(request.args)
+    scope = current_user_scope()
+    orders, next_cursor = order_page(user_id=scope, **filters)
+    
+    # Counted through the partial index; the active set itself is never loaded
+    active_count = team_orders_query(scope).filter(Order.end_time.is_(None)).count()
+    return render_template('index.html', orders=orders, next_cursor=next_cursor, filters=filters,
+                           active_count=active_count, employees=Employee.names())
+
+@app.route('/api/orders', methods=['GET'])
+@login_required
+def api_orders():
+    """Keyset-paginated order listing of the current user's team (every order for admins).
+    
+    Pass next_cursor back as cursor for the following page.
+    """
+    filters = order_listing_args(request.args)
+    limit = min(max(request.args.get('limit', ORDER_PAGE_SIZE, type=int), 1), ORDER_PAGE_MAX)
+    
+    try:
+        orders, next_cursor = order_page(cursor=request.args.get('cursor'), limit=limit, user_id=current_user_scope(),
+                                         **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result = {'orders': [order_to_dict(order) for order in orders], 'next_cursor': next_cursor}
+    if request.args.get('html'):
+        # Rendered rows for the index page's "Load more"
+        result['html'] = render_template('order_rows.html', orders=orders)
+    return jsonify(result)
+
+@app.route('/api/search', methods=['GET'])
+@login_required
+def api_search():
+    """Ranked full-text search over order numbers, employee names, categories and notes.
+    
+    Args: q (words match by prefix, e.g. SO24-023), optional start_date/end_date
+    (YYYY-MM-DD, inclusive), page and per_page. Non-admins only find their team's orders.
+    """
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', ORDER_PAGE_SIZE, type=int), 1), ORDER_PAGE_MAX)
+    
+    try:
+        start_day = date.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+        end_day = date.fromisoformat(request.args['end_date']) if request.args.get('end_date') else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    if not query:
+        return jsonify({'query': query, 'results': [], 'page': page, 'per_page': per_page, 'has_more': False})
+    
+    # Take the top of each partition down to the end of this page, then merge by score
+    offset = (page - 1) * per_page
+    connection = db.session.connection()
+    matches = []
+    for model in order_partitions(start_day):
+        ids = search_order_ids(
+            connection, model.__tablename__, query,
+            start=day_start(start_day) if start_day else None,
+            end=day_start(end_day + timedelta(days=1)) if end_day else None,
+            limit=offset + per_page + 1, team_of=current_user_scope()
+        )
+        matches.extend((score, -order_id, model) for order_id, score in ids)
+    matches.sort(key=lambda match: (match[0], match[1]))
+    page_matches = matches[offset:offset + per_page]
+    
+    # Load the page's orders in one query per table, keeping the ranked order
+    loaded = {}
+    for model in {model for _, _, model in page_matches}:
+        ids = [-negative_id for _, negative_id, match_model in page_matches if match_model is model]
+        for order in model.query.filter(model.id.in_(ids)):
+            loaded[(model, order.id)] = order
+    
+    results = []
+    for score, negative_id, model in page_matches:
+        result = order_to_dict(loaded[(model, -negative_id)])
+        result['score'] = round(score, 4)
+        result['archived'] = model is not Order
+        results.append(result)
+    
+    return jsonify({
+        'query': query,
+        'results': results,
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(matches) > offset + per_page
+    })
 
 @app.route('/add_order', methods=['GET', 'POST'])
 @login_required
@@ -431,6 +1606,8 @@ def add_order():
             )
             
         db.session.add(new_order)
+        # Non-admins own the timers they start, whatever name they typed
+        after_order_write(new_order, owner_id=current_user_scope())
         db.session.commit()
         
         if manual_time and completed:
@@ -451,9 +1628,11 @@ def add_order():
 @app.route('/complete_order/<int:order_id>', methods=['POST'])
 @login_required
 def complete_order(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = team_order_or_404(order_id)
     if not order.end_time:  # Only update if not already completed
+        before_order_write(order)
         order.end_time = datetime.now()
+        after_order_write(order)
         db.session.commit()
         flash('Order completed successfully!', 'success')
     return redirect(url_for('index'))
@@ -461,9 +1640,12 @@ def complete_order(order_id):
 @app.route('/edit_order/<int:order_id>', methods=['GET', 'POST'])
 @login_required
 def edit_order(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = team_order_or_404(order_id)
     
     if request.method == 'POST':
+        # Remove the old values from the rollups; validation failures below never commit
+        before_order_write(order)
+        
         # Get entry type
         entry_type = request.form.get('entry_type', 'service_order')
         
@@ -520,6 +1702,7 @@ def edit_order(order_id):
             # Entry is still active
             order.end_time = None
         
+        after_order_write(order)
         db.session.commit()
         
         # Show appropriate success message
@@ -535,143 +1718,287 @@ def edit_order(order_id):
 @app.route('/reports')
 @login_required
 def reports():
-    return render_template('reports.html')
+    return render_template('reports.html', columnar_export=pyarrow_available)
+
+# Order times report: chart mode by cardinality, table paged through /api/reports/order_times
+ORDER_TIMES_MODES = {'orders': 'Each order', 'order_number': 'Per order number',
+                     'top': 'Top order numbers + other', 'day': 'Per day'}
+ORDER_TIMES_DETAIL_MAX = 200  # Up to this many orders, draw one bar per order
+ORDER_TIMES_BIN_MAX = 50  # Up to this many order numbers, one bar per order number
+ORDER_TIMES_TOP_N = 25  # Otherwise the top N order numbers by hours, the rest in one "Other" bar
+ORDER_TIMES_DAY_MAX = 366  # Longer ranges are binned per week in the per-day mode
+
+def order_times_range(args):
+    """(start, end) datetimes of the report's date filters; end includes the whole end day.
+    
+    Raises ValueError or OverflowError for dates that don't parse.
+    """
+    start_date = parser.parse(args['start_date']) if args.get('start_date') else None
+    end_date = parser.parse(args['end_date']) + timedelta(days=1) if args.get('end_date') else None
+    return start_date, end_date
+
+def completed_orders_in_range(model, start_date, end_date):
+    """Completed orders of model with start_time in [start_date, end_date]"""
+    return orders_in_range(model, start_date, end_date).filter(model.end_time.isnot(None))
+
+def order_label(model):
+    """Bar label for an order: its order number, or the category for other time"""
+    return db.func.coalesce(model.order_number, model.category, 'Other Time')
+
+def order_times_cardinality(start_date, end_date):
+    """(completed orders, distinct order labels) in the range, counted in SQL.
+    
+    Labels are only counted past ORDER_TIMES_DETAIL_MAX orders, and only up to ORDER_TIMES_BIN_MAX + 1.
+    """
+    models = order_partitions(start_date)
+    order_count = sum(completed_orders_in_range(model, start_date, end_date).with_entities(db.func.count(model.id)).scalar()
+                      for model in models)
+    
+    labels = set()
+    if order_count > ORDER_TIMES_DETAIL_MAX:
+        for model in models:
+            query = completed_orders_in_range(model, start_date, end_date).with_entities(order_label(model)).distinct()
+            labels.update(label for (label,) in query.limit(ORDER_TIMES_BIN_MAX + 1))
+    return order_count, len(labels)
+
+def order_label_totals(start_date, end_date):
+    """{(label, employee): [seconds, orders]} summed per order number/category and employee"""
+    totals = defaultdict(lambda: [0, 0])
+    for model in order_partitions(start_date):
+        label = order_label(model)
+        query = completed_orders_in_range(model, start_date, end_date).with_entities(
+            label, model.employee_name, db.func.sum(model.duration_seconds), db.func.count(model.id)
+        ).group_by(label, model.employee_name)
+        for name, employee, seconds, count in query:
+            totals[(name, employee)][0] += seconds or 0
+            totals[(name, employee)][1] += count
+    return totals
+
+def order_times_bars(mode, start_date, end_date):
+    """Bars for the chart as {employee: [(x, hours, hover text), ...]}; bounded by the mode, not the range"""
+    bars = defaultdict(list)
+    
+    if mode == 'orders':
+        orders = partitioned_order_rows(lambda model: completed_orders_in_range(model, start_date, end_date), start_date)
+        for order in islice(orders, ORDER_TIMES_DETAIL_MAX):
+            bars[order.employee_name].append((
+                order.order_number or order.category or 'Other Time', round(order.hours, 2),
+                f"{order.start_time.strftime('%Y-%m-%d %H:%M')} - {order.end_time.strftime('%Y-%m-%d %H:%M')}"
+            ))
+    
+    elif mode == 'day':
+        # Daily totals come straight from the rollup; ranges over a year are binned by week
+        start_day = start_date.date() if start_date else None
+        end_day = end_date.date() if end_date else None
+        first, last = rollup_query([db.func.min(DailyHours.day), db.func.max(DailyHours.day)], start_day, end_day).one()
+        span = (as_date(last) - as_date(first)).days if first else 0
+        day = week_of(DailyHours.day) if span > ORDER_TIMES_DAY_MAX else DailyHours.day
+        
+        query = rollup_query([day, DailyHours.employee_name, db.func.sum(DailyHours.seconds),
+                              db.func.sum(DailyHours.order_count)], start_day, end_day).group_by(
+            day, DailyHours.employee_name
+        ).order_by(day)
+        for bin_start, employee, seconds, count in query:
+            bars[employee].append((as_date(bin_start).isoformat(), round((seconds or 0) / 3600, 2), f'{count} orders'))
+    
+    else:
+        by_label = defaultdict(dict)
+        for (label, employee), totals in order_label_totals(start_date, end_date).items():
+            by_label[label][employee] = totals
+        ranked = sorted(by_label, key=lambda label: (-sum(seconds for seconds, _ in by_label[label].values()), label))
+        
+        # Bars for the biggest order numbers in ranked order, everything else summed into one "Other" bar
+        kept = ranked[:ORDER_TIMES_BIN_MAX if mode == 'order_number' else ORDER_TIMES_TOP_N]
+        for label in kept:
+            for employee, (seconds, count) in sorted(by_label[label].items()):
+                bars[employee].append((label, round(seconds / 3600, 2), f'{count} orders'))
+        
+        other = defaultdict(lambda: [0, 0])
+        for label in ranked[len(kept):]:
+            for employee, (seconds, count) in by_label[label].items():
+                other[employee][0] += seconds
+                other[employee][1] += count
+        for employee, (seconds, count) in sorted(other.items()):
+            bars[employee].append((f'Other ({len(ranked) - len(kept)} order numbers)', round(seconds / 3600, 2),
+                                   f'{count} orders'))
+    
+    return bars
+
+def order_times_page(start_date, end_date, cursor=None, limit=ORDER_PAGE_SIZE):
+    """One page of the report's order table in start_time order as (rows, next_cursor)"""
+    after = decode_order_cursor(cursor) if cursor else None
+    rows = []
+    for model in order_partitions(start_date):
+        query = completed_orders_in_range(model, start_date, end_date)
+        if after is not None:
+            query = query.filter(db.tuple_(model.start_time, model.id) > db.tuple_(*after))
+        query = query.with_entities(*[getattr(model, field) for field in ORDER_ROW_FIELDS])
+        rows.extend(OrderRow._make(row) for row in query.order_by(model.start_time, model.id).limit(limit + 1))
+    rows.sort(key=lambda row: (row.start_time, row.id))
+    
+    next_cursor = encode_order_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [{
+        'order_number': row.order_number or row.category,
+        'employee_name': row.employee_name,
+        'duration': round(row.hours, 2),
+        'start_time': row.start_time.strftime('%Y-%m-%d %H:%M'),
+        'end_time': row.end_time.strftime('%Y-%m-%d %H:%M')
+    } for row in rows[:limit]], next_cursor
 
 @app.route('/reports/order_times')
 @login_required
 def order_times_report():
     # Get date range filter
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = Order.query
-    
-    # Apply filters if provided
-    if start_date:
-        start_date = parser.parse(start_date)
-        query = query.filter(Order.start_time >= start_date)
-    
-    if end_date:
-        end_date = parser.parse(end_date)
-        end_date = end_date + timedelta(days=1)  # Include the entire day
-        query = query.filter(Order.start_time <= end_date)
-    
-    orders = query.all()
-    
-    # Prepare data for plotting
-    data = []
-    for order in orders:
-        if order.end_time:  # Only include completed orders
-            duration = (order.end_time - order.start_time).total_seconds() / 3600  # hours
-            data.append({
-                'order_number': order.order_number,
-                'employee_name': order.employee_name,
-                'duration': round(duration, 2),
-                'start_time': order.start_time.strftime('%Y-%m-%d %H:%M'),
-                'end_time': order.end_time.strftime('%Y-%m-%d %H:%M')
-            })
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
-    if not df.empty:
-        # Create visualization
-        fig = px.bar(
-            df, 
-            x='order_number', 
-            y='duration',
-            color='employee_name',
-            title='Order Processing Times (Hours)',
-            labels={'duration': 'Duration (hours)', 'order_number': 'Order Number'},
-            hover_data=['start_time', 'end_time']
-        )
-        
-        # Convert plot to JSON
+    try:
+        start_date, end_date = order_times_range(request.args)
+    except (ValueError, OverflowError):
+        abort(400)
+    
+    # Pick the chart mode from the data's cardinality unless one was asked for
+    order_count, label_count = order_times_cardinality(start_date, end_date)
+    mode = request.args.get('mode', '')
+    if mode not in ORDER_TIMES_MODES:
+        if order_count <= ORDER_TIMES_DETAIL_MAX:
+            mode = 'orders'
+        elif label_count <= ORDER_TIMES_BIN_MAX:
+            mode = 'order_number'
+        else:
+            mode = 'top'
+    
+    orders, next_cursor = order_times_page(start_date, end_date)
+    graphJSON = None
+    if order_count:
+        fig = go.Figure([
+            go.Bar(x=[bar[0] for bar in employee_bars], y=[bar[1] for bar in employee_bars],
+                   hovertext=[bar[2] for bar in employee_bars], name=employee)
+            for employee, employee_bars in sorted(order_times_bars(mode, start_date, end_date).items())
+        ])
+        fig.update_layout(title=f'Order Processing Times (Hours) - {ORDER_TIMES_MODES[mode]}', barmode='stack',
+                          xaxis_title='Day' if mode == 'day' else 'Order Number', yaxis_title='Duration (hours)')
         graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        return render_template('order_times.html', graphJSON=graphJSON, orders=data)
     
-    return render_template('order_times.html', graphJSON=None, orders=[])
+    return render_template('order_times.html', graphJSON=graphJSON, orders=orders, next_cursor=next_cursor,
+                           order_count=order_count, mode=mode, modes=ORDER_TIMES_MODES)
+
+@app.route('/api/reports/order_times', methods=['GET'])
+@login_required
+def api_order_times():
+    """Keyset-paginated rows of the order times table for the same start_date/end_date filters"""
+    limit = min(max(request.args.get('limit', ORDER_PAGE_SIZE, type=int), 1), ORDER_PAGE_MAX)
+    
+    try:
+        start_date, end_date = order_times_range(request.args)
+        orders, next_cursor = order_times_page(start_date, end_date, request.args.get('cursor'), limit)
+    except (ValueError, OverflowError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'orders': orders, 'next_cursor': next_cursor})
+
+PRODUCTIVITY_BREAKDOWNS = {'entry_type': 'Time Type', 'week': 'Week'}
+
+def productivity_bar_chart(title, y_label, rows, value, stacked_by=None):
+    """Plotly bar chart JSON of value(row) per employee, stacked by stacked_by(row) when given"""
+    series = defaultdict(lambda: ([], []))
+    for row in rows:
+        names, values = series[stacked_by(row) if stacked_by else '']
+        names.append(row['employee_name'])
+        values.append(value(row))
+    
+    fig = go.Figure([go.Bar(x=names, y=values, name=str(group)) for group, (names, values) in series.items()])
+    fig.update_layout(title=title, barmode='stack', showlegend=stacked_by is not None,
+                      xaxis_title='Employee', yaxis_title=y_label)
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
 
 @app.route('/reports/employee_productivity')
 @login_required
 def employee_productivity_report():
-    # Get date range filter
+    # Get date range filter and optional breakdown (entry_type or week)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
+    breakdown = request.args.get('breakdown', '')
+    if breakdown not in PRODUCTIVITY_BREAKDOWNS:
+        breakdown = ''
     
-    query = Order.query.filter(Order.end_time != None)  # Only completed orders
+    start_day = parser.parse(start_date).date() if start_date else None
+    end_day = parser.parse(end_date).date() + timedelta(days=1) if end_date else None  # Include the entire day
     
-    # Apply filters if provided
-    if start_date:
-        start_date = parser.parse(start_date)
-        query = query.filter(Order.start_time >= start_date)
+    employee_data, breakdown_data, graphJSON1, graphJSON2 = cached_report(
+        'employee_productivity', (start_day, end_day, breakdown),
+        lambda: employee_productivity_data(start_day, end_day, breakdown), start_day, end_day
+    )
     
-    if end_date:
-        end_date = parser.parse(end_date)
-        end_date = end_date + timedelta(days=1)  # Include the entire day
-        query = query.filter(Order.start_time <= end_date)
-    
-    orders = query.all()
-    
-    # Aggregate by employee
-    employee_data = {}
-    for order in orders:
-        employee = order.employee_name
-        duration = (order.end_time - order.start_time).total_seconds() / 3600
-        
-        if employee not in employee_data:
-            employee_data[employee] = {
-                'total_hours': 0,
-                'order_count': 0,
-                'orders': []
-            }
-        
-        employee_data[employee]['total_hours'] += duration
-        employee_data[employee]['order_count'] += 1
-        employee_data[employee]['orders'].append(order.order_number)
-    
-    # Prepare for visualization
-    viz_data = []
-    for employee, data in employee_data.items():
-        viz_data.append({
+    return render_template(
+        'employee_productivity.html',
+        graphJSON1=graphJSON1,
+        graphJSON2=graphJSON2,
+        employee_data=employee_data,
+        breakdown=breakdown,
+        breakdowns=PRODUCTIVITY_BREAKDOWNS,
+        breakdown_data=breakdown_data
+    )
+
+def employee_productivity_data(start_day, end_day, breakdown):
+    """(employee_data, breakdown_data, graphJSON1, graphJSON2) for the productivity report"""
+    # One GROUP BY over the daily rollup (archived orders included), so the cost
+    # follows employees x days in the range rather than the number of orders
+    # (or one pass over the analytics snapshot with REPORTS_USE_SNAPSHOT)
+    use_snapshot = app.config['REPORTS_USE_SNAPSHOT']
+    seconds = db.func.sum(DailyHours.seconds)
+    order_count = db.func.sum(DailyHours.order_count)
+    if use_snapshot:
+        totals = sorted(snapshot_totals(('employee',), start_day, end_day))
+    else:
+        totals = rollup_query([DailyHours.employee_name, seconds, order_count], start_day, end_day).group_by(
+            DailyHours.employee_name
+        ).order_by(DailyHours.employee_name)
+    
+    employee_data = []
+    for employee, total_seconds, total_orders in totals:
+        total_hours = (total_seconds or 0) / 3600
+        employee_data.append({
             'employee_name': employee,
-            'total_hours': round(data['total_hours'], 2),
-            'order_count': data['order_count'],
-            'avg_time_per_order': round(data['total_hours'] / data['order_count'], 2) if data['order_count'] > 0 else 0
+            'total_hours': round(total_hours, 2),
+            'order_count': total_orders,
+            'avg_time_per_order': round(total_hours / total_orders, 2) if total_orders else 0
         })
     
-    df = pd.DataFrame(viz_data)
+    breakdown_data = []
+    if breakdown:
+        if use_snapshot:
+            groups = ('entry_type', 'category') if breakdown == 'entry_type' else ('week',)
+            query = sorted(snapshot_totals(('employee', *groups), start_day, end_day),
+                           key=lambda row: (tuple(group or '' for group in row[1:-2]), row[0]))
+        else:
+            groups = [DailyHours.entry_type, DailyHours.category] if breakdown == 'entry_type' else [week_of(DailyHours.day)]
+            query = rollup_query([DailyHours.employee_name, *groups, seconds, order_count], start_day, end_day).group_by(
+                DailyHours.employee_name, *groups
+            ).order_by(*groups, DailyHours.employee_name)
+        
+        for employee, *group, total_seconds, total_orders in query:
+            if breakdown == 'week':
+                label = as_date(group[0]).strftime('Week of %Y-%m-%d')
+            else:
+                entry_type, category = group
+                label = 'Service Orders' if entry_type == 'service_order' else (category or 'Other Time')
+            breakdown_data.append({
+                'employee_name': employee,
+                'group': label,
+                'total_hours': round((total_seconds or 0) / 3600, 2),
+                'order_count': total_orders
+            })
     
-    if not df.empty:
-        # Create visualizations
-        fig1 = px.bar(
-            df,
-            x='employee_name',
-            y='total_hours',
-            title='Total Hours by Employee',
-            labels={'total_hours': 'Total Hours', 'employee_name': 'Employee'}
-        )
-        
-        fig2 = px.bar(
-            df,
-            x='employee_name',
-            y='avg_time_per_order',
-            title='Average Time per Order by Employee (Hours)',
-            labels={'avg_time_per_order': 'Average Hours', 'employee_name': 'Employee'}
-        )
-        
-        # Convert plots to JSON
-        graphJSON1 = json.dumps(fig1, cls=plotly.utils.PlotlyJSONEncoder)
-        graphJSON2 = json.dumps(fig2, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        return render_template(
-            'employee_productivity.html', 
-            graphJSON1=graphJSON1,
-            graphJSON2=graphJSON2,
-            employee_data=viz_data
-        )
+    if not employee_data:
+        return [], [], None, None
     
-    return render_template('employee_productivity.html', graphJSON1=None, graphJSON2=None, employee_data=[])
+    if breakdown:
+        graphJSON1 = productivity_bar_chart(f'Total Hours by Employee and {PRODUCTIVITY_BREAKDOWNS[breakdown]}',
+                                            'Total Hours', breakdown_data, lambda row: row['total_hours'],
+                                            stacked_by=lambda row: row['group'])
+    else:
+        graphJSON1 = productivity_bar_chart('Total Hours by Employee', 'Total Hours', employee_data,
+                                            lambda row: row['total_hours'])
+    graphJSON2 = productivity_bar_chart('Average Time per Order by Employee (Hours)', 'Average Hours', employee_data,
+                                        lambda row: row['avg_time_per_order'])
+    return employee_data, breakdown_data, graphJSON1, graphJSON2
 
 @app.route('/weekly_report')
 @login_required
@@ -693,55 +2020,13 @@ def weekly_report():
     # Add one day to end_date to include the full day
     end_dt_inclusive = end_dt + timedelta(days=1)
     
-    # Query for completed orders within the date range
-    query = Order.query.filter(
-        Order.end_time.isnot(None),
-        Order.start_time >= datetime.combine(start_dt, datetime.min.time()),
-        Order.start_time < datetime.combine(end_dt_inclusive, datetime.min.time())
-    ).order_by(Order.start_time)
-    
-    # Filter by employee if specified
-    if employee:
-        query = query.filter(Order.employee_name == employee)
-    
-    # Get all entries
-    all_entries = query.all()
+    report_data, day_totals, total_hours, service_hours, other_hours = cached_report(
+        'weekly_report', (start_dt, end_dt_inclusive, employee),
+        lambda: weekly_report_data(start_dt, end_dt_inclusive, employee), start_dt, end_dt_inclusive, employee
+    )
     
     # Get list of all employees for the filter dropdown
-    employees = db.session.query(Order.employee_name).distinct().all()
-    employees = [emp[0] for emp in employees]
-    
-    # Organize entries by date
-    report_data = defaultdict(list)
-    day_totals = defaultdict(float)
-    total_hours = 0
-    service_hours = 0
-    other_hours = 0
-    
-    for entry in all_entries:
-        # Get the date part as the key
-        entry_date = entry.start_time.date()
-        
-        # Calculate hours for this entry
-        if entry.end_time:
-            duration = entry.end_time - entry.start_time
-            hours = duration.total_seconds() / 3600  # convert to hours
-            entry.hours = hours  # Add hours to the entry object for display
-            
-            # Accumulate totals
-            day_totals[entry_date] += hours
-            total_hours += hours
-            
-            # Split by entry type
-            if entry.entry_type == 'service_order':
-                service_hours += hours
-            else:
-                other_hours += hours
-        else:
-            entry.hours = 0
-        
-        # Add entry to the correct day
-        report_data[entry_date].append(entry)
+    employees = Employee.names()
     
     return render_template(
         'weekly_report.html',
@@ -756,265 +2041,344 @@ def weekly_report():
         end_date=end_date
     )
 
-@app.route('/export_weekly_report')
-@login_required
-def export_weekly_report():
-    # Get filter parameters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    employee = request.args.get('employee', '')
-    export_format = request.args.get('format', 'excel')  # Default to Excel
-    
-    # Convert string dates to datetime objects
-    start_dt = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else date.today()
-    end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else date.today()
-    
-    # Add one day to end_date to include the full day
-    end_dt_inclusive = end_dt + timedelta(days=1)
-    
-    # Query for completed orders within the date range
-    query = Order.query.filter(
-        Order.end_time.isnot(None),
-        Order.start_time >= datetime.combine(start_dt, datetime.min.time()),
-        Order.start_time < datetime.combine(end_dt_inclusive, datetime.min.time())
-    ).order_by(Order.start_time)
-    
-    # Filter by employee if specified
-    if employee:
-        query = query.filter(Order.employee_name == employee)
+def weekly_totals(start_dt, end_dt_inclusive, employee):
+    """(day, entry_type, seconds) rows for the weekly report and its exports.
+    
+    Summed in SQL from the stored durations, reading the archive too when the range reaches back into it.
+    """
+    totals = []
+    for model in order_partitions(start_dt):
+        order_day = day_of(model.start_time)
+        totals.extend(completed_orders_between(start_dt, end_dt_inclusive, employee, model).with_entities(
+            order_day, model.entry_type, db.func.sum(model.duration_seconds)
+        ).group_by(order_day, model.entry_type).all())
+    return totals
+
+def weekly_report_data(start_dt, end_dt_inclusive, employee):
+    """(report_data, day_totals, total_hours, service_hours, other_hours) for the weekly report"""
+    # Accumulate totals, split by entry type
+    day_totals = defaultdict(float)
+    total_hours = 0
+    service_hours = 0
+    other_hours = 0
     
-    # Get all entries
-    all_entries = query.all()
+    for entry_date, entry_type, seconds in weekly_totals(start_dt, end_dt_inclusive, employee):
+        hours = (seconds or 0) / 3600
+        day_totals[as_date(entry_date)] += hours
+        total_hours += hours
+        if entry_type == 'service_order':
+            service_hours += hours
+        else:
+            other_hours += hours
     
-    # Organize entries by date
+    # Organize completed entries (filtered by employee if specified) by date
     report_data = defaultdict(list)
-    day_totals = defaultdict(float)
-    
-    for entry in all_entries:
+    entries = partitioned_order_rows(
+        lambda model: completed_orders_between(start_dt, end_dt_inclusive, employee, model), start_dt
+    )
+    for entry in entries:
+        report_data[entry.start_time.date()].append(entry)
+    
+    # Plain dicts, so template lookups can't add keys to a cached result
+    return dict(report_data), dict(day_totals), total_hours, service_hours, other_hours
+
+# Streaming exports (writers live in report_export.py)
+WEEKLY_EXPORT_COLUMNS = [
+    ExportColumn('date', 'Date', 12), ExportColumn('employee', 'Employee', 15), ExportColumn('type', 'Type', 12),
+    ExportColumn('details', 'Details', 15), ExportColumn('start_time', 'Start Time', 10),
+    ExportColumn('end_time', 'End Time', 10), ExportColumn('hours', 'Hours', 10, '0.00'), ExportColumn('notes', 'Notes', 30)
+]
+WEEKLY_SUMMARY_COLUMNS = [ExportColumn('date', 'Date', 12), ExportColumn('total_hours', 'Total Hours', 15, '0.00')]
+DATA_EXPORT_COLUMNS = [
+    ExportColumn('order_number', 'order_number', 15), ExportColumn('employee_name', 'employee_name', 15),
+    ExportColumn('start_time', 'start_time', 20), ExportColumn('end_time', 'end_time', 20),
+    ExportColumn('elapsed_hours', 'elapsed_hours', 14), ExportColumn('status', 'status', 10)
+]
+
+def export_response(export_format, filename_base, sheets):
+    """Download response for export sheets [(name, columns, rows)], see report_export.py.
+    
+    CSV and JSONL stream the first sheet while its rows are read; XLSX gets every
+    sheet, built in constant memory in a temporary file before it is sent.
+    """
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'excel':
+        return send_file(xlsx_file(sheets), mimetype=mimetype, as_attachment=True,
+                         download_name=f'{filename_base}.{extension}')
+    
+    _, columns, rows = sheets[0]
+    chunks = csv_chunks(columns, rows) if export_format == 'csv' else jsonl_chunks(columns, rows)
+    response = app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment', filename=f'{filename_base}.{extension}')
+    return response
+
+def weekly_export_rows(entries, day_totals=None):
+    """Weekly export rows for OrderRows in start_time order; with day_totals, each day ends in a total row"""
+    current_day = None
+    for entry in entries:
         entry_date = entry.start_time.date()
-        if entry.end_time:
-            duration = entry.end_time - entry.start_time
-            hours = duration.total_seconds() / 3600
-            entry.hours = hours
-            day_totals[entry_date] += hours
-        else:
-            entry.hours = 0
-        report_data[entry_date].append(entry)
+        if day_totals is not None and current_day is not None and entry_date != current_day:
+            yield ('', '', '', '', '', 'Daily Total:', round(day_totals[current_day], 2), '')
+        current_day = entry_date
+        
+        yield (
+            entry_date,
+            entry.employee_name,
+            'Service Order' if entry.entry_type == 'service_order' else 'Other Time',
+            entry.order_number if entry.entry_type == 'service_order' else entry.category,
+            entry.start_time.strftime('%H:%M'),
+            entry.end_time.strftime('%H:%M') if entry.end_time else '',
+            round(entry.hours, 2),
+            entry.notes or ''
+        )
+    
+    if day_totals is not None:
+        if current_day is not None:
+            yield ('', '', '', '', '', 'Daily Total:', round(day_totals[current_day], 2), '')
+        yield ('', '', '', '', '', 'GRAND TOTAL:', round(sum(day_totals.values()), 2), '')
+
+def weekly_export_args(args):
+    """(start_dt, end_dt, employee, export_format) from weekly export request args; ValueError if invalid"""
+    export_format = args.get('format', 'excel')  # Default to Excel
+    if export_format not in EXPORT_FORMATS and export_format != 'pdf':
+        raise ValueError(f'Unknown export format: {export_format}')
     
-    # Prepare filename
+    # Convert string dates to datetime objects
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    start_dt = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else date.today()
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else date.today()
+    return start_dt, end_dt, args.get('employee', ''), export_format
+
+def weekly_report_filename(start_dt, end_dt, employee):
     date_range = f"{start_dt.strftime('%Y%m%d')}-{end_dt.strftime('%Y%m%d')}"
     employee_suffix = f"_{employee}" if employee else ""
-    filename_base = f"timetracker_report_{date_range}{employee_suffix}"
+    return f"timetracker_report_{date_range}{employee_suffix}"
+
+def weekly_report_entries(start_dt, end_dt, employee):
+    """Completed orders within the date range, filtered by employee if specified, streamed
+    in start_time order from one chunked query per partition (archive included when needed)"""
+    return partitioned_order_rows(
+        lambda model: completed_orders_between(start_dt, end_dt + timedelta(days=1), employee, model), start_dt
+    )
+
+def weekly_day_totals(start_dt, end_dt, employee):
+    """{day: hours} from SQL up front (one row per day), so exports never have to hold the rows themselves"""
+    day_totals = defaultdict(float)
+    for entry_date, _, seconds in weekly_totals(start_dt, end_dt + timedelta(days=1), employee):
+        day_totals[as_date(entry_date)] += (seconds or 0) / 3600
+    return day_totals
+
+def weekly_report_export(start_dt, end_dt, employee, export_format):
+    """(filename_base, sheets) for a CSV, JSONL or Excel weekly report export"""
+    entries = weekly_report_entries(start_dt, end_dt, employee)
+    day_totals = weekly_day_totals(start_dt, end_dt, employee)
+    
+    if export_format == 'excel':
+        summary = [(day, round(total, 2)) for day, total in sorted(day_totals.items())]
+        summary.append(('TOTAL', round(sum(day_totals.values()), 2)))
+        sheets = [('Summary', WEEKLY_SUMMARY_COLUMNS, summary),
+                  ('Details', WEEKLY_EXPORT_COLUMNS, weekly_export_rows(entries))]
+    else:
+        # CSV keeps its daily and grand total rows; JSONL is one record per entry
+        sheets = [('Details', WEEKLY_EXPORT_COLUMNS,
+                   weekly_export_rows(entries, day_totals if export_format == 'csv' else None))]
+    return weekly_report_filename(start_dt, end_dt, employee), sheets
+
+def weekly_report_pdf(start_dt, end_dt, employee):
+    """(filename_base, PDF bytes) for the weekly report, rendered in-process (see timesheet_pdf.py)"""
+    pdf = render_weekly_timesheet(weekly_report_entries(start_dt, end_dt, employee),
+                                  weekly_day_totals(start_dt, end_dt, employee),
+                                  start_dt.isoformat(), end_dt.isoformat(), employee)
+    return weekly_report_filename(start_dt, end_dt, employee), pdf
+
+@app.route('/export_weekly_report')
+@login_required
+def export_weekly_report():
+    # Get filter parameters
+    try:
+        start_dt, end_dt, employee, export_format = weekly_export_args(request.args)
+    except ValueError:
+        abort(400)
     
     # Export based on requested format
     if export_format == 'pdf':
-        # Generate HTML for PDF conversion
-        html = render_template(
-            'weekly_report_pdf.html',
-            report_data=report_data,
-            day_totals=day_totals,
-            total_hours=sum(day_totals.values()),
-            start_date=start_date,
-            end_date=end_date,
-            employee=employee
-        )
-        
-        # Configure wkhtmltopdf path based on OS
-        config = None
         try:
-            if platform.system() == 'Windows':
-                # Try to use installed wkhtmltopdf
-                wkhtmltopdf_path = r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
-                if os.path.exists(wkhtmltopdf_path):
-                    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
-            
-            # Convert HTML to PDF
-            pdf = pdfkit.from_string(html, False, configuration=config)
+            filename_base, pdf = weekly_report_pdf(start_dt, end_dt, employee)
             response = make_response(pdf)
             response.headers['Content-Type'] = 'application/pdf'
             response.headers['Content-Disposition'] = f'attachment; filename={filename_base}.pdf'
             return response
         except Exception as e:
-            flash(f'Error generating PDF: {str(e)}. Please make sure wkhtmltopdf is installed.', 'danger')
-            return redirect(url_for('weekly_report', start_date=start_date, end_date=end_date, employee=employee))
-    
-    elif export_format == 'excel':
-        # Create Excel file using pandas
-        output = io.BytesIO()
-        writer = pd.ExcelWriter(output, engine='xlsxwriter')
-        
-        # Create summary sheet
-        summary_data = {
-            'Date': [],
-            'Total Hours': []
-        }
-        
-        for day, total in day_totals.items():
-            summary_data['Date'].append(day.strftime('%Y-%m-%d'))
-            summary_data['Total Hours'].append(round(total, 2))
-        
-        # Add grand total
-        summary_data['Date'].append('TOTAL')
-        summary_data['Total Hours'].append(round(sum(day_totals.values()), 2))
-        
-        # Create summary DataFrame
-        summary_df = pd.DataFrame(summary_data)
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        
-        # Format the summary sheet
-        workbook = writer.book
-        summary_sheet = writer.sheets['Summary']
-        bold_format = workbook.add_format({'bold': True})
-        number_format = workbook.add_format({'num_format': '0.00'})
-        
-        # Set column widths
-        summary_sheet.set_column('A:A', 12)
-        summary_sheet.set_column('B:B', 15, number_format)
-        
-        # Format the total row
-        summary_sheet.write(len(day_totals) + 1, 0, 'TOTAL', bold_format)
-        
-        # Create details sheet with all entries
-        details_data = {
-            'Date': [],
-            'Employee': [],
-            'Type': [],
-            'Details': [],
-            'Start Time': [],
-            'End Time': [],
-            'Hours': [],
-            'Notes': []
-        }
-        
-        # Fill details data
-        for day, entries in report_data.items():
-            for entry in entries:
-                details_data['Date'].append(day.strftime('%Y-%m-%d'))
-                details_data['Employee'].append(entry.employee_name)
-                
-                if entry.entry_type == 'service_order':
-                    details_data['Type'].append('Service Order')
-                    details_data['Details'].append(entry.order_number)
-                else:
-                    details_data['Type'].append('Other Time')
-                    details_data['Details'].append(entry.category)
-                
-                details_data['Start Time'].append(entry.start_time.strftime('%H:%M'))
-                details_data['End Time'].append(entry.end_time.strftime('%H:%M') if entry.end_time else '')
-                details_data['Hours'].append(round(entry.hours, 2))
-                details_data['Notes'].append(entry.notes or '')
-        
-        # Create details DataFrame
-        details_df = pd.DataFrame(details_data)
-        details_df.to_excel(writer, sheet_name='Details', index=False)
-        
-        # Format the details sheet
-        details_sheet = writer.sheets['Details']
-        details_sheet.set_column('A:A', 12)  # Date
-        details_sheet.set_column('B:B', 15)  # Employee
-        details_sheet.set_column('C:C', 12)  # Type
-        details_sheet.set_column('D:D', 15)  # Details
-        details_sheet.set_column('E:E', 10)  # Start Time
-        details_sheet.set_column('F:F', 10)  # End Time
-        details_sheet.set_column('G:G', 10, number_format)  # Hours
-        details_sheet.set_column('H:H', 30)  # Notes
-        
-        writer.close()
-        output.seek(0)
-        
-        return send_file(
-            output, 
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f"{filename_base}.xlsx"
-        )
+            flash(f'Error generating PDF: {str(e)}', 'danger')
+            return redirect(url_for('weekly_report', start_date=request.args.get('start_date'),
+                                    end_date=request.args.get('end_date'), employee=employee))
     
-    elif export_format == 'csv':
-        # Create CSV file
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Date', 'Employee', 'Type', 'Details', 'Start Time', 'End Time', 'Hours', 'Notes'])
-        
-        # Write data rows
-        for day, entries in report_data.items():
-            for entry in entries:
-                writer.writerow([
-                    day.strftime('%Y-%m-%d'),
-                    entry.employee_name,
-                    'Service Order' if entry.entry_type == 'service_order' else 'Other Time',
-                    entry.order_number if entry.entry_type == 'service_order' else entry.category,
-                    entry.start_time.strftime('%H:%M'),
-                    entry.end_time.strftime('%H:%M') if entry.end_time else '',
-                    round(entry.hours, 2),
-                    entry.notes or ''
-                ])
-            
-            # Add a daily total row
-            writer.writerow(['', '', '', '', '', 'Daily Total:', round(day_totals[day], 2), ''])
-            
-        # Add a grand total row
-        writer.writerow(['', '', '', '', '', 'GRAND TOTAL:', round(sum(day_totals.values()), 2), ''])
-        
-        output.seek(0)
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = f"attachment; filename={filename_base}.csv"
-        response.headers["Content-type"] = "text/csv"
-        return response
+    filename_base, sheets = weekly_report_export(start_dt, end_dt, employee, export_format)
+    return export_response(export_format, filename_base, sheets)
 
-@app.route('/export_data')
-@login_required
-def export_data():
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = Order.query
+def data_export_args(args):
+    """(start_date, end_date, employee, export_format) from export_data request args; ValueError if invalid"""
+    export_format = args.get('format', 'excel')
+    if export_format in COLUMNAR_FORMATS and not pyarrow_available:
+        raise ValueError(f'{export_format} export requires pyarrow')
+    if export_format not in EXPORT_FORMATS and export_format not in COLUMNAR_FORMATS:
+        raise ValueError(f'Unknown export format: {export_format}')
     
     # Apply filters if provided
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
     if start_date:
         start_date = parser.parse(start_date)
-        query = query.filter(Order.start_time >= start_date)
     
     if end_date:
         end_date = parser.parse(end_date)
         end_date = end_date + timedelta(days=1)  # Include the entire day
-        query = query.filter(Order.start_time <= end_date)
-    
-    orders = query.all()
-    
-    # Create DataFrame for export
-    data = []
-    for order in orders:
-        elapsed_time = None
-        if order.end_time:
-            elapsed = order.end_time - order.start_time
-            elapsed_time = elapsed.total_seconds() / 3600  # hours
-        
-        data.append({
-            'order_number': order.order_number,
-            'employee_name': order.employee_name,
-            'start_time': order.start_time,
-            'end_time': order.end_time,
-            'elapsed_hours': elapsed_time,
-            'status': 'Completed' if order.end_time else 'Active'
-        })
+    return start_date, end_date, args.get('employee') or None, export_format
+
+def data_export_filename():
+    return f'timetracker_export_{datetime.now().strftime("%Y%m%d%H%M%S")}'
+
+def data_export(start_date, end_date, employee=None):
+    """(filename_base, sheets) for the raw order export"""
+    def build_query(model):
+        query = orders_in_range(model, start_date, end_date)
+        return query.filter(model.employee_name == employee) if employee else query
+    
+    # Read the archive too when the range reaches back into it
+    orders = partitioned_order_rows(build_query, start_date)
+    
+    rows = ((
+        order.order_number,
+        order.employee_name,
+        order.start_time,
+        order.end_time,
+        order.duration_seconds / 3600 if order.duration_seconds is not None else None,  # hours
+        'Completed' if order.end_time else 'Active'
+    ) for order in orders)
+    return data_export_filename(), [('Orders', DATA_EXPORT_COLUMNS, rows)]
+
+def columnar_data_export(start_date, end_date, employee=None):
+    """(filename_base, row chunks) for the Parquet/Arrow order export, see columnar_export.py"""
+    return data_export_filename(), order_export_chunks(start_date, end_date, employee)
+
+@app.route('/export_data')
+@login_required
+def export_data():
+    try:
+        start_date, end_date, employee, export_format = data_export_args(request.args)
+    except (ValueError, OverflowError):
+        abort(400)
+    
+    if export_format in COLUMNAR_FORMATS:
+        # Typed columns, one row group per query chunk, streamed as each is encoded
+        filename_base, chunks = columnar_data_export(start_date, end_date, employee)
+        mimetype, extension = COLUMNAR_FORMATS[export_format]
+        response = app.response_class(stream_with_context(columnar_chunks(export_format, chunks)), mimetype=mimetype)
+        response.headers.set('Content-Disposition', 'attachment', filename=f'{filename_base}.{extension}')
+        return response
     
-    df = pd.DataFrame(data)
+    filename_base, sheets = data_export(start_date, end_date, employee)
+    return export_response(export_format, filename_base, sheets)
+
+# Background export jobs (see export_jobs.py): the same exports, built by a worker pool into EXPORT_FOLDER
+EXPORT_FOLDER = os.path.join(current_dir, 'exports')
+EXPORT_JOB_FORMATS = dict(EXPORT_FORMATS, pdf=('application/pdf', 'pdf'), **COLUMNAR_FORMATS)
+export_jobs = ExportJobQueue(EXPORT_FOLDER, workers=app.config['EXPORT_WORKERS'],
+                             max_pending=app.config['EXPORT_MAX_PENDING'], retention=app.config['EXPORT_JOB_RETENTION'])
+
+def export_job_spec(kind, args):
+    """(export_format, params, produce) for a background export of kind ('weekly_report' or 'data').
+    
+    args are the ones the matching export route takes; produce() returns
+    (filename_base, sheets), (filename_base, PDF bytes) for the weekly PDF, or
+    (filename_base, row chunks) for Parquet/Arrow.
+    Raises ValueError for an unknown kind or invalid args.
+    """
+    if kind == 'weekly_report':
+        start_dt, end_dt, employee, export_format = weekly_export_args(args)
+        params = (start_dt, end_dt, employee)
+        if export_format == 'pdf':
+            return export_format, params, lambda: weekly_report_pdf(*params)
+        return export_format, params, lambda: weekly_report_export(*params, export_format)
+    if kind == 'data':
+        start_date, end_date, employee, export_format = data_export_args(args)
+        params = (start_date, end_date, employee)
+        if export_format in COLUMNAR_FORMATS:
+            return export_format, params, lambda: columnar_data_export(*params)
+        return export_format, params, lambda: data_export(*params)
+    raise ValueError(f'Unknown export: {kind}')
+
+def counted_rows(rows, job):
+    """Pass rows through, counting them as the job's progress"""
+    for row in rows:
+        job.progress()
+        yield row
+
+def export_job_build(export_format, produce):
+    """Build function for export_jobs: runs produce() in its own app context and writes the file"""
+    def build(job, path):
+        with app.app_context():
+            filename_base, result = produce()
+            if export_format == 'pdf':
+                with open(path, 'wb') as output:
+                    output.write(result)
+            elif export_format in COLUMNAR_FORMATS:
+                write_columnar(path, export_format, result, progress=job.progress)
+            else:
+                write_export(path, export_format, [(name, columns, counted_rows(rows, job))
+                                                   for name, columns, rows in result])
+        return f'{filename_base}.{EXPORT_JOB_FORMATS[export_format][1]}'
+    return build
+
+def export_job_dict(job):
+    data = job.to_dict()
+    data['status_url'] = url_for('api_export_status', job_id=job.id)
+    data['download_url'] = url_for('download_export', job_id=job.id) if job.status == 'done' else None
+    return data
+
+def export_job_or_404(job_id):
+    """The export job with this id, if it belongs to the current user (admins see every job)"""
+    job = export_jobs.get(job_id)
+    if job is None or (job.owner_id != current_user.id and not current_user.is_admin):
+        abort(404)
+    return job
+
+@app.route('/api/exports', methods=['POST'])
+@login_required
+def api_create_export():
+    """Queue an export: kind ('weekly_report' or 'data') plus the export route's parameters.
     
-    # Create Excel file
-    output = io.BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, sheet_name='Orders', index=False)
-    writer.close()
-    output.seek(0)
+    An identical export the user already has queued or running is returned instead of starting another.
+    """
+    try:
+        export_format, params, produce = export_job_spec(request.values.get('kind'), request.values)
+    except (ValueError, OverflowError) as e:
+        return jsonify({'error': str(e)}), 400
     
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=f'timetracker_export_{datetime.now().strftime("%Y%m%d%H%M%S")}.xlsx'
-    )
+    key = (request.values.get('kind'), export_format, params, current_user.id)
+    mimetype, extension = EXPORT_JOB_FORMATS[export_format]
+    try:
+        job, created = export_jobs.submit(key, current_user.id, extension, mimetype,
+                                          export_job_build(export_format, produce))
+    except ExportQueueFull as e:
+        return jsonify({'error': f'{e}, please try again shortly'}), 503
+    return jsonify(export_job_dict(job)), 202 if created else 200
+
+@app.route('/api/exports/<job_id>', methods=['GET'])
+@login_required
+def api_export_status(job_id):
+    """Status of an export job: queued, running (with rows written so far), done or failed"""
+    return jsonify(export_job_dict(export_job_or_404(job_id)))
+
+@app.route('/api/exports/<job_id>/download', methods=['GET'])
+@login_required
+def download_export(job_id):
+    """Download a finished export"""
+    job = export_job_or_404(job_id)
+    if job.status != 'done':
+        return jsonify({'error': f'Export is {job.status}'}), 409
+    return send_file(job.path, mimetype=job.mimetype, as_attachment=True, download_name=job.filename)
 
 @app.route('/upload_image', methods=['GET'])
 @login_required
@@ -1194,6 +2558,7 @@ def confirm_entries():
                 )
                 
                 db.session.add(new_order)
+                after_order_write(new_order)
                 print(f"Added order: {employee_name}, {order_number}, {hours} hours")
             
             # Save all entries at once
@@ -1234,6 +2599,37 @@ def confirm_entries():
                            image_path=relative_path,
                            now=datetime.now)
 
+@app.route('/import_labor', methods=['GET'])
+@login_required
+@manager_required
+def import_labor():
+    """Show the bulk import form for labor collection exports"""
+    return render_template('import_labor.html', employees=Employee.names(), batch_size=IMPORT_BATCH_SIZE)
+
+@app.route('/api/import/labor', methods=['POST'])
+@login_required
+@manager_required
+def api_import_labor():
+    """Import a labor collection export (CSV or XLSX) in batches.
+    
+    The response streams newline-delimited JSON: a progress line after every
+    batch, then a final line with the totals and per-row errors.
+    """
+    file = request.files.get('report_file')
+    file_type = import_file_type(file.filename) if file and file.filename else None
+    if not file_type:
+        return jsonify({'error': 'Upload a .csv or .xlsx labor collection export'}), 400
+    employee_name = request.form.get('employee_name', '').strip() or None
+    
+    def generate():
+        stats = {'rows': 0, 'imported': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+        for stats in import_labor_entries(iter_labor_entries(file.stream, file_type, employee_name)):
+            progress = {key: value for key, value in stats.items() if key != 'errors'}
+            yield json.dumps({'status': 'progress', **progress}) + '\n'
+        yield json.dumps({'status': 'done', **stats}) + '\n'
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
     """Serve uploaded files"""
@@ -1281,8 +2677,10 @@ def account_settings():
             current_user.set_password(new_password)
             flash('Password updated successfully.', 'success')
         
-        # Save changes
+        # Save changes, re-linking orders if the user's name changed
+        Employee.relink()
         db.session.commit()
+        invalidate_user_cache(current_user.id)
         flash('Account settings updated successfully.', 'success')
         
         return redirect(url_for('account_settings'))
@@ -1315,10 +2713,12 @@ def admin_update_settings(section):
         timezone = request.form.get('timezone')
         enable_desktop_mode = 'enable_desktop_mode' in request.form
         
-        AppSetting.set('company_name', company_name, section=section)
-        AppSetting.set('default_currency', default_currency, section=section)
-        AppSetting.set('timezone', timezone, section=section)
-        AppSetting.set('enable_desktop_mode', enable_desktop_mode, value_type='bool', section=section)
+        AppSetting.set_many(section, [
+            ('company_name', company_name, 'string'),
+            ('default_currency', default_currency, 'string'),
+            ('timezone', timezone, 'string'),
+            ('enable_desktop_mode', enable_desktop_mode, 'bool'),
+        ])
     
     elif section == 'time_tracking':
         # Update time tracking settings
@@ -1329,12 +2729,14 @@ def admin_update_settings(section):
         require_order_number = 'require_order_number' in request.form
         allow_time_overlap = 'allow_time_overlap' in request.form
         
-        AppSetting.set('work_week_start', work_week_start, value_type='int', section=section)
-        AppSetting.set('default_work_hours', default_work_hours, value_type='float', section=section)
-        AppSetting.set('round_times_to_nearest', round_times_to_nearest, value_type='bool', section=section)
-        AppSetting.set('rounding_interval', rounding_interval, value_type='int', section=section)
-        AppSetting.set('require_order_number', require_order_number, value_type='bool', section=section)
-        AppSetting.set('allow_time_overlap', allow_time_overlap, value_type='bool', section=section)
+        AppSetting.set_many(section, [
+            ('work_week_start', work_week_start, 'int'),
+            ('default_work_hours', default_work_hours, 'float'),
+            ('round_times_to_nearest', round_times_to_nearest, 'bool'),
+            ('rounding_interval', rounding_interval, 'int'),
+            ('require_order_number', require_order_number, 'bool'),
+            ('allow_time_overlap', allow_time_overlap, 'bool'),
+        ])
     
     elif section == 'notifications':
         # Update notification settings
@@ -1343,10 +2745,12 @@ def admin_update_settings(section):
         notify_missed_timesheet = 'notify_missed_timesheet' in request.form
         notify_managers = 'notify_managers' in request.form
         
-        AppSetting.set('email_notifications', email_notifications, value_type='bool', section=section)
-        AppSetting.set('email_from', email_from, section=section)
-        AppSetting.set('notify_missed_timesheet', notify_missed_timesheet, value_type='bool', section=section)
-        AppSetting.set('notify_managers', notify_managers, value_type='bool', section=section)
+        AppSetting.set_many(section, [
+            ('email_notifications', email_notifications, 'bool'),
+            ('email_from', email_from, 'string'),
+            ('notify_missed_timesheet', notify_missed_timesheet, 'bool'),
+            ('notify_managers', notify_managers, 'bool'),
+        ])
     
     elif section == 'security':
         # Update security settings
@@ -1355,10 +2759,12 @@ def admin_update_settings(section):
         force_password_reset = 'force_password_reset' in request.form
         allow_registration = 'allow_registration' in request.form
         
-        AppSetting.set('session_timeout', session_timeout, value_type='int', section=section)
-        AppSetting.set('password_policy', password_policy, section=section)
-        AppSetting.set('force_password_reset', force_password_reset, value_type='bool', section=section)
-        AppSetting.set('allow_registration', allow_registration, value_type='bool', section=section)
+        AppSetting.set_many(section, [
+            ('session_timeout', session_timeout, 'int'),
+            ('password_policy', password_policy, 'string'),
+            ('force_password_reset', force_password_reset, 'bool'),
+            ('allow_registration', allow_registration, 'bool'),
+        ])
     
     elif section == 'backup':
         # Update backup settings
@@ -1366,9 +2772,12 @@ def admin_update_settings(section):
         backup_frequency = request.form.get('backup_frequency')
         backup_retention = request.form.get('backup_retention')
         
-        AppSetting.set('enable_auto_backup', enable_auto_backup, value_type='bool', section=section)
-        AppSetting.set('backup_frequency', backup_frequency, section=section)
-        AppSetting.set('backup_retention', backup_retention, value_type='int', section=section)
+        AppSetting.set_many(section, [
+            ('enable_auto_backup', enable_auto_backup, 'bool'),
+            ('backup_frequency', backup_frequency, 'string'),
+            ('backup_retention', backup_retention, 'int'),
+            ('archive_after_days', request.form.get('archive_after_days'), 'int'),
+        ])
     
     flash(f'{section.replace("_", " ").title()} settings updated successfully.', 'success')
     return redirect(url_for('admin_settings', _anchor=section))
@@ -1380,22 +2789,22 @@ def admin_update_settings(section):
 def admin_backup_database():
     """Create a backup of the database"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
     backup_dir = os.path.join(current_dir, 'backups')
     
     # Create backups directory if it doesn't exist
     if not os.path.exists(backup_dir):
         os.makedirs(backup_dir)
     
-    backup_path = os.path.join(backup_dir, f'time_tracker_backup_{timestamp}.db')
+    backup_name = f'time_tracker_backup_{timestamp}{backup_extension()}'
+    backup_path = os.path.join(backup_dir, backup_name)
     
-    # Create a copy of the database file
+    # Create a consistent copy of the database
     try:
-        shutil.copy2(db_path, backup_path)
+        backup_database(backup_path)
         flash('Database backup created successfully.', 'success')
         
         # Send the file for download
-        return send_file(backup_path, as_attachment=True, download_name=f'time_tracker_backup_{timestamp}.db')
+        return send_file(backup_path, as_attachment=True, download_name=backup_name)
     except Exception as e:
         flash(f'Backup failed: {str(e)}', 'danger')
         return redirect(url_for('admin_settings'))
@@ -1416,28 +2825,22 @@ def admin_restore_database():
         flash('No backup file selected.', 'danger')
         return redirect(url_for('admin_settings'))
     
-    # Verify the file is a SQLite database
+    temp_path = os.path.join(current_dir, f'temp_restore{backup_extension()}')
     try:
-        temp_path = os.path.join(current_dir, 'temp_restore.db')
         backup_file.save(temp_path)
         
-        # Test if it's a valid SQLite database
-        conn = sqlite3.connect(temp_path)
-        conn.close()
-        
         # Create a backup of the current database before restoring
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
         backup_dir = os.path.join(current_dir, 'backups')
         
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
         
-        auto_backup_path = os.path.join(backup_dir, f'pre_restore_backup_{timestamp}.db')
-        shutil.copy2(db_path, auto_backup_path)
+        auto_backup_path = os.path.join(backup_dir, f'pre_restore_backup_{timestamp}{backup_extension()}')
+        backup_database(auto_backup_path)
         
-        # Replace the current database with the uploaded one
-        shutil.copy2(temp_path, db_path)
+        # Validates the upload, then replaces the current database contents with it
+        restore_database(temp_path)
         os.remove(temp_path)
         
         flash('Database restored successfully. You will be logged out for changes to take effect.', 'success')
@@ -1450,6 +2853,42 @@ def admin_restore_database():
         return redirect(url_for('admin_settings'))
 
 
+@app.route('/admin/archive-orders', methods=['POST'])
+@login_required
+@admin_required
+def admin_archive_orders():
+    """Move old completed orders into the archive table"""
+    archive_after_days = AppSetting.get('archive_after_days', 0)
+    
+    if not archive_after_days:
+        flash('Set "Archive Completed Orders Older Than" before archiving.', 'warning')
+        return redirect(url_for('admin_settings', _anchor='backup'))
+    
+    try:
+        moved = archive_completed_orders(archive_after_days)
+        flash(f'Archived {moved} completed orders older than {archive_after_days} days.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Archiving failed: {str(e)}', 'danger')
+    
+    return redirect(url_for('admin_settings', _anchor='backup'))
+
+
+@app.route('/admin/report-cache', methods=['GET'])
+@login_required
+@admin_required
+def admin_report_cache():
+    """Report result cache counters"""
+    with report_cache_lock:
+        stats = dict(report_cache_stats, entries=len(report_cache))
+    lookups = stats['hits'] + stats['misses']
+    stats.update(hit_rate=round(stats['hits'] / lookups, 3) if lookups else None,
+                 max_entries=app.config['REPORT_CACHE_SIZE'], ttl_seconds=app.config['REPORT_CACHE_TTL'],
+                 snapshot=order_snapshot.info())
+    with heatmap_cache_lock:
+        stats['heatmaps'] = dict(heatmap_cache_stats, entries=len(heatmap_cache))
+    return jsonify(stats)
+
 @app.route('/admin/users', methods=['GET'])
 @login_required
 @admin_required
@@ -1511,10 +2950,10 @@ def admin_add_user():
     else:  # employee
         user.is_admin = False
         user.is_manager = False
-        
-        # Assign to manager if selected
-        if manager_id and manager_id.isdigit():
-            user.manager_id = int(manager_id)
+    
+    # Employees and managers can be assigned to a manager, who then sees their data
+    if not user.is_admin and manager_id and manager_id.isdigit():
+        user.manager_id = int(manager_id)
     
     # Set hourly rate if provided
     if hourly_rate and hourly_rate.strip():
@@ -1526,6 +2965,9 @@ def admin_add_user():
     # Set password and save user
     user.set_password(password)
     db.session.add(user)
+    db.session.flush()
+    Employee.relink()
+    UserAccess.rebuild()
     db.session.commit()
     
     flash(f'User {username} created successfully.', 'success')
@@ -1567,22 +3009,28 @@ def admin_edit_user():
     if current_user.is_admin:
         role = request.form.get('role')
         
+        # Someone who stops being a manager no longer has anyone reporting to them
+        if user.is_manager and role != 'manager':
+            for employee in user.employees:
+                employee.manager_id = None
+        
         # Update role
         if role == 'admin':
             user.is_admin = True
             user.is_manager = False
             user.manager_id = None
-        elif role == 'manager':
-            user.is_admin = False
-            user.is_manager = True
-            user.manager_id = None
-        else:  # employee
+        else:
             user.is_admin = False
-            user.is_manager = False
+            user.is_manager = role == 'manager'
             
-            # Assign to manager if selected
+            # Assign to manager if selected (employees and managers)
             manager_id = request.form.get('manager_id')
             if manager_id and manager_id.isdigit():
+                # A manager can't report to someone in their own team (as it stands after this edit)
+                if user.id in User.manager_chain(int(manager_id)):
+                    db.session.rollback()
+                    flash('A user cannot report to someone in their own team.', 'danger')
+                    return redirect(url_for('admin_user_management'))
                 user.manager_id = int(manager_id)
             else:
                 user.manager_id = None
@@ -1599,7 +3047,13 @@ def admin_edit_user():
         user.set_password(new_password)
         flash('Password updated successfully.', 'success')
     
+    db.session.flush()
+    Employee.relink()
+    UserAccess.rebuild()
     db.session.commit()
+    
+    # Released employees' manager_id changed too
+    invalidate_user_cache()
     flash(f'User {user.username} updated successfully.', 'success')
     return redirect(url_for('admin_user_management'))
 
@@ -1629,10 +3083,17 @@ def admin_delete_user():
         for employee in user.employees:
             employee.manager_id = None
     
-    # Delete the user
+    # Delete the user and unlink their orders
+    Employee.unlink(user.id)
     db.session.delete(user)
+    db.session.flush()
+    Employee.relink()
+    UserAccess.rebuild()
     db.session.commit()
     
+    # A deleted manager also changes their employees' rows
+    invalidate_user_cache()
+    
     flash(f'User {username} deleted successfully.', 'success')
     return redirect(url_for('admin_user_management'))
 
@@ -1653,264 +3114,253 @@ def admin_get_user():
 
 # Enhanced API Endpoints for Dashboard Features
 
+def dashboard_windows(today, include_months=False):
+    """{name: (start_day, end_day)} of the dashboard stat periods around today"""
+    week_start = today - timedelta(days=today.weekday())
+    windows = {
+        'today': (today, today + timedelta(days=1)),
+        'yesterday': (today - timedelta(days=1), today),
+        'week': (week_start, week_start + timedelta(days=7)),
+        'prevWeek': (week_start - timedelta(days=7), week_start),
+    }
+    if include_months:
+        month_start = today.replace(day=1)
+        windows['month'] = (month_start, today + timedelta(days=1))  # Month to date
+        windows['prevMonth'] = ((month_start - timedelta(days=1)).replace(day=1), month_start)
+    return windows
+
 @app.route('/api/dashboard-stats', methods=['GET'])
 @login_required
 def api_dashboard_stats():
-    """Get enhanced dashboard statistics"""
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())
+    """Get enhanced dashboard statistics.
     
-    # Get today's hours for current user
-    # Try multiple matching strategies for employee name
-    name_filters = []
-    if current_user.get_full_name() and current_user.get_full_name() != current_user.username:
-        name_filters.append(Order.employee_name == current_user.get_full_name())
-    name_filters.append(Order.employee_name == current_user.username)
+    Today, this week, yesterday and the previous week (plus month to date and the
+    previous month with ?months=1) come from a single rollup query, with hours
+    per entry type for each window under 'breakdown'.
+    """
+    include_months = request.args.get('months') in ('1', 'true')
+    windows = dashboard_windows(date.today(), include_months)
     
     # If admin, show all orders, otherwise filter by user
-    if current_user.is_admin:
-        today_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(today, datetime.min.time()),
-            Order.start_time < datetime.combine(today + timedelta(days=1), datetime.min.time()),
-            Order.end_time.isnot(None)
-        ).all()
-    else:
-        today_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(today, datetime.min.time()),
-            Order.start_time < datetime.combine(today + timedelta(days=1), datetime.min.time()),
-            Order.end_time.isnot(None),
-            db.or_(*name_filters)
-        ).all()
-    
-    today_hours = 0
-    for order in today_orders:
-        if order.end_time:
-            duration = order.end_time - order.start_time
-            today_hours += duration.total_seconds() / 3600
-    
-    # Get week's hours for current user
-    # Get this week's hours for current user
-    if current_user.is_admin:
-        week_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(week_start, datetime.min.time()),
-            Order.end_time.isnot(None)
-        ).all()
-    else:
-        week_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(week_start, datetime.min.time()),
-            Order.end_time.isnot(None),
-            db.or_(*name_filters)
-        ).all()
-    
-    week_hours = 0
-    for order in week_orders:
-        if order.end_time:
-            duration = order.end_time - order.start_time
-            week_hours += duration.total_seconds() / 3600
-    
-    # Calculate trends (compare with previous periods)
-    if current_user.is_admin:
-        yesterday_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(today - timedelta(days=1), datetime.min.time()),
-            Order.start_time < datetime.combine(today, datetime.min.time()),
-            Order.end_time.isnot(None)
-        ).all()
-    else:
-        yesterday_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(today - timedelta(days=1), datetime.min.time()),
-            Order.start_time < datetime.combine(today, datetime.min.time()),
-            Order.end_time.isnot(None),
-            db.or_(*name_filters)
-        ).all()
-    
-    yesterday_hours = 0
-    for order in yesterday_orders:
-        if order.end_time:
-            duration = order.end_time - order.start_time
-            yesterday_hours += duration.total_seconds() / 3600
-    
-    prev_week_start = week_start - timedelta(days=7)
-    if current_user.is_admin:
-        prev_week_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(prev_week_start, datetime.min.time()),
-            Order.start_time < datetime.combine(week_start, datetime.min.time()),
-            Order.end_time.isnot(None)
-        ).all()
-    else:
-        prev_week_orders = Order.query.filter(
-            Order.start_time >= datetime.combine(prev_week_start, datetime.min.time()),
-            Order.start_time < datetime.combine(week_start, datetime.min.time()),
-            Order.end_time.isnot(None),
-            db.or_(*name_filters)
-        ).all()
-    
-    prev_week_hours = 0
-    for order in prev_week_orders:
-        if order.end_time:
-            duration = order.end_time - order.start_time
-            prev_week_hours += duration.total_seconds() / 3600
-    
-    # Calculate trend percentages
-    today_trend = 0
-    if yesterday_hours > 0:
-        today_trend = round(((today_hours - yesterday_hours) / yesterday_hours) * 100, 1)
-    
-    week_trend = 0
-    if prev_week_hours > 0:
-        week_trend = round(((week_hours - prev_week_hours) / prev_week_hours) * 100, 1)
-    
-    return jsonify({
-        'todayHours': round(today_hours, 1),
-        'weekHours': round(week_hours, 1),
+    window_seconds = rollup_window_seconds(windows, current_user_scope())
+    hours = {name: sum(by_type.values()) / 3600 for name, by_type in window_seconds.items()}
+    
+    def trend(current, previous):
+        """Change against the previous period, in percent"""
+        change = round(((current - previous) / previous) * 100, 1) if previous > 0 else 0
+        return {'percentage': abs(change), 'direction': 'up' if change >= 0 else 'down'}
+    
+    stats = {
+        'todayHours': round(hours['today'], 1),
+        'weekHours': round(hours['week'], 1),
+        'yesterdayHours': round(hours['yesterday'], 1),
+        'prevWeekHours': round(hours['prevWeek'], 1),
         'trends': {
-            'today': {
-                'percentage': abs(today_trend),
-                'direction': 'up' if today_trend >= 0 else 'down'
-            },
-            'week': {
-                'percentage': abs(week_trend),
-                'direction': 'up' if week_trend >= 0 else 'down'
-            }
-        }
-    })
+            'today': trend(hours['today'], hours['yesterday']),
+            'week': trend(hours['week'], hours['prevWeek'])
+        },
+        'breakdown': {name: {entry_type: round(seconds / 3600, 1) for entry_type, seconds in by_type.items()}
+                      for name, by_type in window_seconds.items()}
+    }
+    if include_months:
+        stats.update(monthHours=round(hours['month'], 1), prevMonthHours=round(hours['prevMonth'], 1))
+        stats['trends']['month'] = trend(hours['month'], hours['prevMonth'])
+    return jsonify(stats)
 
 @app.route('/api/calendar-heatmap', methods=['GET'])
 @login_required
 def api_calendar_heatmap():
-    """Get calendar heatmap data for activity visualization"""
-    end_date = date.today()
-    start_date = end_date - timedelta(days=365)  # Last year
-    
-    # Get all completed orders in the date range for current user
-    # Try multiple matching strategies for employee name
-    name_filters = []
-    if current_user.get_full_name() and current_user.get_full_name() != current_user.username:
-        name_filters.append(Order.employee_name == current_user.get_full_name())
-    name_filters.append(Order.employee_name == current_user.username)
+    """Completed hours per day over the last year, for the activity heatmap.
     
-    # If admin, show all orders, otherwise filter by user
-    if current_user.is_admin:
-        orders = Order.query.filter(
-            Order.start_time >= datetime.combine(start_date, datetime.min.time()),
-            Order.start_time <= datetime.combine(end_date, datetime.max.time()),
-            Order.end_time.isnot(None)
-        ).all()
-    else:
-        orders = Order.query.filter(
-            Order.start_time >= datetime.combine(start_date, datetime.min.time()),
-            Order.start_time <= datetime.combine(end_date, datetime.max.time()),
-            Order.end_time.isnot(None),
-            db.or_(*name_filters)
-        ).all()
-    
-    # Group by date and calculate hours
-    daily_hours = defaultdict(float)
-    for order in orders:
-        if order.end_time:
-            order_date = order.start_time.date()
-            duration = order.end_time - order.start_time
-            daily_hours[order_date] += duration.total_seconds() / 3600
-    
-    # Convert to format expected by frontend
-    heatmap_data = {}
-    current_date = start_date
-    while current_date <= end_date:
-        hours = daily_hours.get(current_date, 0)
-        # Convert hours to levels (0-4)
-        if hours == 0:
-            level = 0
-        elif hours < 2:
-            level = 1
-        elif hours < 4:
-            level = 2
-        elif hours < 6:
-            level = 3
+    Sparse: only days with time, as offsets from start_date ('days') with their
+    'hours', plus the level thresholds (see HEATMAP_THRESHOLDS).
+    """
+    start_day, seconds = calendar_heatmap_seconds()
+    days = np.flatnonzero(seconds)
+    return jsonify({
+        'start_date': start_day.isoformat(),
+        'end_date': (start_day + timedelta(days=HEATMAP_DAYS - 1)).isoformat(),
+        'days': days.tolist(),
+        'hours': (seconds[days] / 3600).round(2).tolist(),
+        'thresholds': HEATMAP_THRESHOLDS
+    })
+
+# Time trends are bucketed by day, week or month so a chart never gets more than TREND_MAX_POINTS points
+TREND_RESOLUTIONS = ('day', 'week', 'month')
+TREND_AUTO_POINTS = 120  # Automatic resolution: the finest one giving at most this many points
+TREND_MAX_POINTS = 400  # Hard cap on points per response; longer ranges keep the most recent buckets
+TREND_MAX_DAYS = 3660  # Longest range accepted (ten years)
+
+def trend_bucket(day, resolution):
+    """Start of the day/week (Monday)/month bucket containing day"""
+    if resolution == 'week':
+        return day - timedelta(days=day.weekday())
+    if resolution == 'month':
+        return day.replace(day=1)
+    return day
+
+def trend_buckets(start_date, end_date, resolution):
+    """Starts of every bucket from the one containing start_date through the one containing end_date"""
+    buckets = []
+    bucket = trend_bucket(start_date, resolution)
+    while bucket <= end_date:
+        buckets.append(bucket)
+        if resolution == 'month':
+            bucket = (bucket + timedelta(days=32)).replace(day=1)
         else:
-            level = 4
-            
-        heatmap_data[current_date.isoformat()] = {
-            'hours': round(hours, 1),
-            'level': level
-        }
-        current_date += timedelta(days=1)
-    
-    return jsonify(heatmap_data)
+            bucket += timedelta(days=7 if resolution == 'week' else 1)
+    return buckets
+
+def trend_point_count(start_date, end_date, resolution):
+    first, last = trend_bucket(start_date, resolution), trend_bucket(end_date, resolution)
+    if resolution == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days // (7 if resolution == 'week' else 1) + 1
+
+def trend_range(days, resolution=None):
+    """(start_date, end_date, resolution) for the last `days` days up to today.
+    
+    Without a resolution, picks the finest with at most TREND_AUTO_POINTS points.
+    A range with more than TREND_MAX_POINTS points at the resolution is shortened
+    to the most recent TREND_MAX_POINTS buckets.
+    """
+    end_date = date.today()
+    start_date = end_date - timedelta(days=min(max(days, 1), TREND_MAX_DAYS))
+    if resolution is None:
+        resolution = next((candidate for candidate in TREND_RESOLUTIONS
+                           if trend_point_count(start_date, end_date, candidate) <= TREND_AUTO_POINTS), 'month')
+    
+    if trend_point_count(start_date, end_date, resolution) > TREND_MAX_POINTS:
+        last = trend_bucket(end_date, resolution)
+        if resolution == 'month':
+            months = last.year * 12 + last.month - 1 - (TREND_MAX_POINTS - 1)
+            start_date = date(months // 12, months % 12 + 1, 1)
+        else:
+            start_date = last - timedelta(days=(7 if resolution == 'week' else 1) * (TREND_MAX_POINTS - 1))
+    return start_date, end_date, resolution
 
 @app.route('/api/time-trends', methods=['GET'])
 @login_required
 def api_time_trends():
-    """Get time trends for charts and analytics"""
-    days = int(request.args.get('days', 30))
-    end_date = date.today()
-    start_date = end_date - timedelta(days=days)
-    
-    # Get orders in date range for current user
-    # Try multiple matching strategies for employee name
-    name_filters = []
-    if current_user.get_full_name() and current_user.get_full_name() != current_user.username:
-        name_filters.append(Order.employee_name == current_user.get_full_name())
-    name_filters.append(Order.employee_name == current_user.username)
+    """Completed hours over the last `days` days (default 30) for charts and analytics.
+    
+    resolution is day, week, month or auto (the default, see trend_range). Returns
+    columnar arrays: bucket start dates, total hours, and hours per category.
+    """
+    resolution = request.args.get('resolution', 'auto')
+    if resolution != 'auto' and resolution not in TREND_RESOLUTIONS:
+        return jsonify({'error': f'resolution must be auto or one of {", ".join(TREND_RESOLUTIONS)}'}), 400
+    start_date, end_date, resolution = trend_range(request.args.get('days', 30, type=int),
+                                                   None if resolution == 'auto' else resolution)
+    
+    return jsonify(cached_report('time_trends', (start_date, end_date, resolution),
+                                 lambda: time_trends_data(start_date, end_date, resolution),
+                                 start_date, end_date + timedelta(days=1), team_scoped=True))
+
+@app.route('/api/pivot', methods=['GET'])
+@login_required
+def api_pivot():
+    """Hours and order counts of completed orders grouped by any of employee, entry_type, category and
+    one of day/week/month, computed from the analytics snapshot.
+    
+    Args: group_by (comma separated, default employee), optional start_date/end_date
+    (YYYY-MM-DD, inclusive), employee and entry_type. Non-admins see their team only.
+    Returns one array per group_by dimension plus hours and orders, all parallel.
+    """
+    group_by = [name.strip() for name in request.args.get('group_by', 'employee').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if not group_by or unknown:
+        return jsonify({'error': f'group_by must be one or more of {", ".join(DIMENSIONS)}'}), 400
+    if len(set(group_by)) != len(group_by) or sum(name in PERIODS for name in group_by) > 1:
+        return jsonify({'error': 'group_by may name each dimension once and at most one of day, week, month'}), 400
     
+    try:
+        start_day = date.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+        end_day = date.fromisoformat(request.args['end_date']) + timedelta(days=1) if request.args.get('end_date') else None
+    except (ValueError, OverflowError):
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    result = order_snapshot.pivot(
+        group_by, start_day=start_day, end_day=end_day,
+        employee=request.args.get('employee'), entry_type=request.args.get('entry_type'),
+        user_ids=scope_user_ids()
+    )
+    columns = {name: [key.isoformat() if name in PERIODS else key for key in keys]
+               for name, keys in zip(group_by, result.keys)}
+    columns['hours'] = (result.seconds / 3600).round(2).tolist()
+    columns['orders'] = result.counts.tolist()
+    return jsonify({'group_by': group_by, 'columns': columns, 'groups': len(result.counts),
+                    'total_hours': round(int(result.seconds.sum()) / 3600, 2),
+                    'total_orders': int(result.counts.sum())})
+
+def time_trends_data(start_date, end_date, resolution='day'):
+    """Total and per-category hours per day/week/month bucket for [start_date, end_date] in the current user's scope.
+    
+    Buckets are labelled by their first day; the first and last may cover only part of their week or month.
+    """
+    # Sum completed hours per bucket and category for current user in SQL, from the daily rollup
     # If admin, show all orders, otherwise filter by user
-    if current_user.is_admin:
-        orders = Order.query.filter(
-            Order.start_time >= datetime.combine(start_date, datetime.min.time()),
-            Order.start_time <= datetime.combine(end_date, datetime.max.time()),
-            Order.end_time.isnot(None)
-        ).all()
+    user_id = current_user_scope()
+    if app.config['REPORTS_USE_SNAPSHOT']:
+        rows = [row[:-1] for row in snapshot_totals((resolution, 'entry_type', 'category'),
+                                                    start_date, end_date + timedelta(days=1), user_id)]
     else:
-        orders = Order.query.filter(
-            Order.start_time >= datetime.combine(start_date, datetime.min.time()),
-            Order.start_time <= datetime.combine(end_date, datetime.max.time()),
-            Order.end_time.isnot(None),
-            db.or_(*name_filters)
-        ).all()
-    
-    # Group by date and category
-    daily_data = defaultdict(lambda: defaultdict(float))
-    
-    for order in orders:
-        if order.end_time:
-            order_date = order.start_time.date()
-            category = order.entry_type if order.entry_type == 'service_order' else order.category
-            duration = order.end_time - order.start_time
-            hours = duration.total_seconds() / 3600
-            daily_data[order_date][category] += hours
-    
-    # Convert to chart format
-    chart_data = []
-    current_date = start_date
-    while current_date <= end_date:
-        day_data = {
-            'date': current_date.isoformat(),
-            'total': sum(daily_data[current_date].values())
-        }
-        
-        # Add category breakdowns
-        for category, hours in daily_data[current_date].items():
-            day_data[category] = round(hours, 1)
-            
-        chart_data.append(day_data)
-        current_date += timedelta(days=1)
-    
-    return jsonify(chart_data)
-
-# Add method to Order model for decimal hours
-def get_elapsed_time_decimal(self):
-    """Get elapsed time as decimal hours"""
-    if not self.end_time:
-        duration = datetime.now() - self.start_time
-    else:
-        duration = self.end_time - self.start_time
-    return duration.total_seconds() / 3600
+        bucket = {'day': DailyHours.day, 'week': week_of(DailyHours.day), 'month': month_of(DailyHours.day)}[resolution]
+        rows = rollup_query(
+            [bucket, DailyHours.entry_type, DailyHours.category, db.func.sum(DailyHours.seconds)],
+            start_date, end_date + timedelta(days=1), user_id
+        ).group_by(bucket, DailyHours.entry_type, DailyHours.category).all()
+    
+    # One array per series, aligned with dates
+    buckets = trend_buckets(start_date, end_date, resolution)
+    index = {bucket: position for position, bucket in enumerate(buckets)}
+    totals = [0.0] * len(buckets)
+    series = defaultdict(lambda: [0.0] * len(buckets))
+    for bucket, entry_type, category, seconds in rows:
+        position = index[as_date(bucket)]
+        category = entry_type if entry_type == 'service_order' else (category or entry_type)
+        totals[position] += seconds / 3600
+        series[category][position] += seconds / 3600
+    
+    return {
+        'resolution': resolution,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'dates': [bucket.isoformat() for bucket in buckets],
+        'totals': [round(hours, 2) for hours in totals],
+        'series': {category: [round(hours, 2) for hours in values] for category, values in series.items()}
+    }
+
+# Backfill the daily rollup for databases created before it existed
+def backfill_daily_hours():
+    if DailyHours.query.first() is None and Order.query.filter(Order.end_time.isnot(None)).first() is not None:
+        count = DailyHours.rebuild()
+        print(f'Backfilled daily_hours rollup ({count} rows)')
+
+# Build the manager closure for databases created before it existed (or users added outside the app)
+def backfill_user_access():
+    if UserAccess.query.filter_by(depth=0).count() != User.query.count():
+        count = UserAccess.rebuild()
+        db.session.commit()
+        print(f'Rebuilt user_access closure ({count} rows)')
 
-# Add the method to the Order class
-Order.get_elapsed_time_decimal = get_elapsed_time_decimal
+# Full-text search indexes on the live and archive order tables (kept in sync by triggers on SQLite)
+def install_search_indexes():
+    with db.engine.begin() as connection:
+        for model in (Order, ArchivedOrder):
+            if install_search_index(connection, model.__tablename__):
+                print(f'Built full-text search index for {model.__tablename__}')
 
-# Initialize database
-with app.app_context():
+# Initialize database: at startup, and after a restore (the backup may predate any of these)
+def initialize_database():
     db.create_all()
     create_default_admin()
+    backfill_daily_hours()
+    backfill_user_access()
+    install_search_indexes()
+
+with app.app_context():
+    initialize_database()
 
 # Run the app
 if __name__ == "__main__":
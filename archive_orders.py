@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Move old completed orders from the live order table into the archive table.
+Reports and exports still include archived orders when their date range needs them.
+
+Usage: python archive_orders.py [days]   (defaults to the archive_after_days setting)
+"""
+
+import sys
+from app import app, AppSetting, archive_completed_orders
+
+def archive_orders(days=None):
+    """Archive completed orders that started more than `days` days ago"""
+    
+    with app.app_context():
+        days = days if days is not None else AppSetting.get('archive_after_days', 0)
+        
+        if not days:
+            print("No archive age given and archive_after_days is not set; nothing to do")
+            return
+        
+        print(f"Archiving completed orders older than {days} days...")
+        moved = archive_completed_orders(days)
+        print(f"Archived {moved} orders (cutoff: {AppSetting.get('archive_cutoff')})")
+
+if __name__ == "__main__":
+    archive_orders(int(sys.argv[1]) if len(sys.argv) > 1 else None)
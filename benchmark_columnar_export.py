@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compare the Parquet/Arrow order export with the Excel and CSV exports.
+
+Seeds a throwaway SQLite database with five years of completed orders, then
+writes the full range through each export_data format into a temporary
+file, timing it and reporting the file size. Also times a single-employee
+Parquet export, where the filter runs in the query.
+
+Usage: python benchmark_columnar_export.py [rows]   (default 500000)
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+scratch_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch_dir, 'bench.db')
+
+from app import app, db, Order, data_export, columnar_data_export
+from columnar_export import write_columnar
+from report_export import write_export
+
+EMPLOYEES = ["Greg Clark", "John Smith", "Sarah Johnson", "Mike Wilson", "Emily Davis"]
+SEED_BATCH = 50000
+YEARS = 5
+
+def seed(rows):
+    """Insert `rows` completed orders spread over the last five years"""
+    now = datetime.now()
+    with app.app_context():
+        for offset in range(0, rows, SEED_BATCH):
+            batch = []
+            for i in range(offset, min(offset + SEED_BATCH, rows)):
+                start = now - timedelta(minutes=random.randint(60, 60 * 24 * 365 * YEARS))
+                duration = random.randint(900, 8 * 3600)
+                batch.append({
+                    'order_number': f'SO24-{i:07d}', 'entry_type': 'service_order',
+                    'employee_name': random.choice(EMPLOYEES), 'notes': 'Routine maintenance',
+                    'start_time': start, 'end_time': start + timedelta(seconds=duration),
+                    'duration_seconds': duration, 'created_at': start
+                })
+            db.session.execute(Order.__table__.insert(), batch)
+            db.session.commit()
+
+def sheet_export(export_format, employee=None):
+    def run(start_date, end_date, path):
+        write_export(path, export_format, data_export(start_date, end_date, employee)[1])
+    return run
+
+def columnar_export(export_format, employee=None):
+    def run(start_date, end_date, path):
+        write_columnar(path, export_format, columnar_data_export(start_date, end_date, employee)[1])
+    return run
+
+def benchmark(rows=500000):
+    print(f"Seeding {rows} orders over {YEARS} years...")
+    seed(rows)
+
+    end_date = datetime.now() + timedelta(days=1)
+    start_date = end_date - timedelta(days=365 * YEARS + 2)
+
+    print(f"\n{'format':<28}{'seconds':>10}{'MiB':>10}")
+    for name, function in [('excel', sheet_export('excel')), ('csv', sheet_export('csv')),
+                           ('parquet', columnar_export('parquet')), ('arrow', columnar_export('arrow')),
+                           ('parquet, one employee', columnar_export('parquet', EMPLOYEES[0]))]:
+        path = os.path.join(scratch_dir, 'export.out')
+        with app.app_context():
+            started = time.perf_counter()
+            function(start_date, end_date, path)
+            elapsed = time.perf_counter() - started
+            db.session.remove()
+        print(f"{name:<28}{elapsed:>10.2f}{os.path.getsize(path) / (1024 * 1024):>10.1f}")
+        os.remove(path)
+
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
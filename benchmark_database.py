@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Compare concurrency and report latency between SQLite and PostgreSQL.
+
+Runs the same workload as benchmark_sqlite_tuning.py (technicians clocking out
+while dashboard requests aggregate) on a tuned SQLite file and, when a
+PostgreSQL URL is given (DATABASE_URL), on PostgreSQL, then times the weekly
+report and productivity aggregations on each.
+
+The PostgreSQL run uses its own benchmark_order table and drops it afterwards.
+
+Usage: DATABASE_URL=postgresql://... python benchmark_database.py [seconds] [writers] [readers]
+"""
+
+import os
+import sys
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from database_config import get_database_url, is_sqlite_url, day_expression
+from sqlite_tuning import install_sqlite_tuning
+
+SEED_ROWS = 50000
+REPORT_RUNS = 20
+EMPLOYEES = ["Greg Clark", "John Smith", "Sarah Johnson", "Mike Wilson", "Emily Davis"]
+ENTRY_TYPES = ["service_order", "training", "meeting", "travel"]
+
+metadata = MetaData()
+orders = Table(
+    'benchmark_order', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_number', String(50)),
+    Column('entry_type', String(50)),
+    Column('employee_name', String(100), nullable=False),
+    Column('start_time', DateTime, nullable=False),
+    Column('end_time', DateTime),
+    Column('duration_seconds', Integer),
+    Index('ix_benchmark_order_employee_start', 'employee_name', 'start_time'),
+    Index('ix_benchmark_order_start_end', 'start_time', 'end_time'),
+)
+
+
+def make_order(order_number, start, duration):
+    """One completed order row"""
+    return {
+        'order_number': order_number,
+        'entry_type': random.choice(ENTRY_TYPES),
+        'employee_name': random.choice(EMPLOYEES),
+        'start_time': start,
+        'end_time': start + timedelta(seconds=duration),
+        'duration_seconds': duration
+    }
+
+
+def create_engine_for(url, pool_size):
+    """Engine for the benchmark, with the app's SQLite pragmas when the URL is SQLite"""
+    engine = create_engine(url, pool_size=pool_size, max_overflow=0)
+    install_sqlite_tuning(engine)
+    return engine
+
+
+def seed(engine):
+    """Recreate the benchmark table and fill it with a year of completed orders"""
+    now = datetime.now()
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    rows = [
+        make_order(f'SO24-{i:05d}', now - timedelta(minutes=random.randint(0, 60 * 24 * 365)),
+                   random.randint(900, 8 * 3600))
+        for i in range(SEED_ROWS)
+    ]
+    with engine.begin() as conn:
+        conn.execute(orders.insert(), rows)
+
+
+def weekly_totals(conn, week_start):
+    """Per-day, per-entry-type totals for one week (the weekly report aggregation)"""
+    day = day_expression(orders.c.start_time, conn.dialect.name)
+    return conn.execute(
+        select(day, orders.c.entry_type, func.sum(orders.c.duration_seconds))
+        .where(orders.c.start_time >= week_start, orders.c.start_time < week_start + timedelta(days=7),
+               orders.c.end_time.isnot(None))
+        .group_by(day, orders.c.entry_type)
+    ).fetchall()
+
+
+def employee_totals(conn, start):
+    """Per-employee totals from a start date (the productivity report aggregation)"""
+    return conn.execute(
+        select(orders.c.employee_name, func.sum(orders.c.duration_seconds), func.count(orders.c.id))
+        .where(orders.c.start_time >= start, orders.c.end_time.isnot(None))
+        .group_by(orders.c.employee_name)
+    ).fetchall()
+
+
+def run_workload(engine, seconds, writers, readers):
+    """Run concurrent writers and readers for a fixed time and count completed operations"""
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while time.perf_counter() < stop_at:
+            start = datetime.now() - timedelta(hours=random.randint(1, 8))
+            try:
+                with engine.begin() as conn:
+                    conn.execute(orders.insert(), make_order('SO24-BENCH', start, random.randint(900, 8 * 3600)))
+                bump('writes')
+            except OperationalError:
+                bump('errors')
+
+    def reader():
+        while time.perf_counter() < stop_at:
+            try:
+                with engine.connect() as conn:
+                    weekly_totals(conn, datetime.now() - timedelta(days=random.randint(7, 365)))
+                bump('reads')
+            except OperationalError:
+                bump('errors')
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return counts
+
+
+def time_reports(engine):
+    """Median latency in milliseconds of each report aggregation"""
+    reports = {
+        'weekly': lambda conn: weekly_totals(conn, datetime.now() - timedelta(days=random.randint(7, 365))),
+        'productivity': lambda conn: employee_totals(conn, datetime.now() - timedelta(days=365)),
+    }
+    latencies = {}
+
+    with engine.connect() as conn:
+        for name, report in reports.items():
+            timings = []
+            for _ in range(REPORT_RUNS):
+                started = time.perf_counter()
+                report(conn)
+                timings.append((time.perf_counter() - started) * 1000)
+            latencies[name] = statistics.median(timings)
+
+    return latencies
+
+
+def benchmark(seconds=5, writers=4, readers=8):
+    """Run the workload and report timings on SQLite and (if configured) PostgreSQL"""
+    database_url = get_database_url(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"Workload: {writers} writer / {readers} reader threads for {seconds}s on {SEED_ROWS} seeded orders")
+    if is_sqlite_url(database_url):
+        print("(set DATABASE_URL to a PostgreSQL database to include it)")
+    print(f"\n{'backend':<12}{'writes/s':>12}{'reads/s':>12}{'errors':>10}{'weekly ms':>12}{'productivity ms':>18}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        targets = [('sqlite', 'sqlite:///' + os.path.join(temp_dir, 'bench.db'))]
+        if not is_sqlite_url(database_url):
+            targets.append(('postgresql', database_url))
+
+        for name, url in targets:
+            engine = create_engine_for(url, writers + readers)
+            try:
+                seed(engine)
+                counts = run_workload(engine, seconds, writers, readers)
+                latencies = time_reports(engine)
+                print(f"{name:<12}{counts['writes'] / seconds:>12.1f}{counts['reads'] / seconds:>12.1f}"
+                      f"{counts['errors']:>10}{latencies['weekly']:>12.1f}{latencies['productivity']:>18.1f}")
+            finally:
+                metadata.drop_all(engine)
+                engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    benchmark(*args)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Time /api/pivot style group-bys on the analytics snapshot against SQL GROUP BYs.
+
+Seeds a throwaway SQLite database with completed orders over five years,
+loads the snapshot once, then times several group-bys both from the
+snapshot (order_snapshot.pivot) and as a GROUP BY over the order table,
+and finally the incremental refresh after a single order is edited.
+
+Usage: python benchmark_pivot.py [rows] [runs]   (default 1000000, 20)
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+scratch_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch_dir, 'bench.db')
+
+from app import app, db, Order, order_snapshot, before_order_write, after_order_write, day_expression
+
+EMPLOYEES = ["Greg Clark", "John Smith", "Sarah Johnson", "Mike Wilson", "Emily Davis"]
+CATEGORIES = [None, 'Meeting', 'Training', 'Travel']
+SEED_BATCH = 50000
+
+def seed(rows):
+    """Insert `rows` completed orders spread over the last five years"""
+    now = datetime.now()
+    with app.app_context():
+        for offset in range(0, rows, SEED_BATCH):
+            batch = []
+            for i in range(offset, min(offset + SEED_BATCH, rows)):
+                start = now - timedelta(minutes=random.randint(60, 60 * 24 * 365 * 5))
+                duration = random.randint(900, 8 * 3600)
+                category = random.choice(CATEGORIES)
+                batch.append({
+                    'order_number': f'SO24-{i:07d}', 'entry_type': 'other_time' if category else 'service_order',
+                    'category': category, 'employee_name': random.choice(EMPLOYEES),
+                    'start_time': start, 'end_time': start + timedelta(seconds=duration),
+                    'duration_seconds': duration, 'created_at': start
+                })
+            db.session.execute(Order.__table__.insert(), batch)
+            db.session.commit()
+
+def sql_group_by(group_by, start_day):
+    """The same totals as one GROUP BY over the order table"""
+    columns = {'employee': Order.employee_name, 'entry_type': Order.entry_type, 'category': Order.category,
+               'day': day_expression(Order.start_time, db.engine.dialect.name)}
+    groups = [columns[name] for name in group_by]
+    query = db.session.query(*groups, db.func.sum(Order.duration_seconds), db.func.count()).filter(
+        Order.end_time.isnot(None))
+    if start_day:
+        query = query.filter(Order.start_time >= start_day)
+    return query.group_by(*groups).all()
+
+def timed(function, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - started) * 1000 / runs
+
+def benchmark(rows=1000000, runs=20):
+    print(f"Seeding {rows} orders...")
+    seed(rows)
+
+    with app.app_context():
+        started = time.perf_counter()
+        order_snapshot.current()
+        print(f"Snapshot load: {time.perf_counter() - started:.2f} s")
+
+        year_ago = date.today() - timedelta(days=365)
+        cases = [(('employee',), None), (('employee', 'day'), None), (('employee', 'entry_type', 'category'), None),
+                 (('employee', 'day'), year_ago)]
+        print(f"\n{'group_by':<36}{'start':>12}{'snapshot ms':>13}{'SQL ms':>10}")
+        for group_by, start_day in cases:
+            snapshot_ms = timed(lambda: order_snapshot.pivot(group_by, start_day=start_day), runs)
+            sql_ms = timed(lambda: sql_group_by(group_by, start_day), 1)
+            print(f"{','.join(group_by):<36}{str(start_day or 'all'):>12}{snapshot_ms:>13.1f}{sql_ms:>10.0f}")
+
+        order = Order.query.first()
+        before_order_write(order)
+        order.end_time += timedelta(minutes=5)
+        after_order_write(order)
+        db.session.commit()
+        started = time.perf_counter()
+        order_snapshot.current()
+        print(f"\nRefresh after one edit: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        db.engine.dispose()
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Compare full ORM hydration with OrderRow projections for the report routes.
+
+Seeds a throwaway SQLite database with completed orders, then loads a year of
+them the way the report routes used to (query.all() into Order instances)
+and the way they do now (partitioned_order_rows: selected columns, yield_per
+chunks, plain tuples), timing each and measuring peak Python memory.
+
+Also times the streamed CSV and constant-memory XLSX exports.
+
+Usage: python benchmark_report_rows.py [rows]   (default 500000)
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+scratch_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch_dir, 'bench.db')
+
+from app import (app, db, Order, completed_orders_between, partitioned_order_rows, weekly_export_rows,
+                 WEEKLY_EXPORT_COLUMNS)
+from report_export import csv_chunks, xlsx_file
+
+EMPLOYEES = ["Greg Clark", "John Smith", "Sarah Johnson", "Mike Wilson", "Emily Davis"]
+SEED_BATCH = 50000
+
+def seed(rows):
+    """Insert `rows` completed orders spread over the last year"""
+    now = datetime.now()
+    with app.app_context():
+        for offset in range(0, rows, SEED_BATCH):
+            batch = []
+            for i in range(offset, min(offset + SEED_BATCH, rows)):
+                start = now - timedelta(minutes=random.randint(60, 60 * 24 * 365))
+                duration = random.randint(900, 8 * 3600)
+                batch.append({
+                    'order_number': f'SO24-{i:06d}', 'entry_type': 'service_order',
+                    'employee_name': random.choice(EMPLOYEES), 'notes': 'Routine maintenance',
+                    'start_time': start, 'end_time': start + timedelta(seconds=duration),
+                    'duration_seconds': duration, 'created_at': start
+                })
+            db.session.execute(Order.__table__.insert(), batch)
+            db.session.commit()
+
+def orm_report(start_day, end_day):
+    """The old path: hydrate every Order, attach hours, group by day"""
+    report_data = defaultdict(list)
+    query = completed_orders_between(start_day, end_day)
+    for entry in query.order_by(Order.start_time).all():
+        entry.hours = (entry.duration_seconds or 0) / 3600
+        report_data[entry.start_time.date()].append(entry)
+    return report_data
+
+def row_report(start_day, end_day):
+    """The new path: stream OrderRows and group by day"""
+    report_data = defaultdict(list)
+    for entry in partitioned_order_rows(lambda model: completed_orders_between(start_day, end_day, model=model), start_day):
+        report_data[entry.start_time.date()].append(entry)
+    return report_data
+
+def orm_export(start_day, end_day):
+    """Old export shape: hydrate everything, then walk it once"""
+    return sum(order.duration_seconds for order in completed_orders_between(start_day, end_day).all())
+
+def row_export(start_day, end_day):
+    """New export shape: walk the stream without keeping it"""
+    return sum(entry.duration_seconds for entry in
+               partitioned_order_rows(lambda model: completed_orders_between(start_day, end_day, model=model), start_day))
+
+def csv_export(start_day, end_day):
+    """Streamed CSV export: chunks are produced and dropped as a response would send them"""
+    rows = weekly_export_rows(partitioned_order_rows(
+        lambda model: completed_orders_between(start_day, end_day, model=model), start_day))
+    return sum(len(chunk) for chunk in csv_chunks(WEEKLY_EXPORT_COLUMNS, rows))
+
+def xlsx_export(start_day, end_day):
+    """Constant-memory XLSX export into a temporary file"""
+    rows = weekly_export_rows(partitioned_order_rows(
+        lambda model: completed_orders_between(start_day, end_day, model=model), start_day))
+    xlsx_file([('Details', WEEKLY_EXPORT_COLUMNS, rows)]).close()
+
+def measure(function, start_day, end_day):
+    """(seconds, peak MiB) for one run; each runs in a fresh session"""
+    with app.app_context():
+        started = time.perf_counter()
+        function(start_day, end_day)
+        elapsed = time.perf_counter() - started
+        db.session.remove()
+
+    with app.app_context():
+        tracemalloc.start()
+        function(start_day, end_day)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.session.remove()
+    return elapsed, peak / (1024 * 1024)
+
+def benchmark(rows=500000):
+    print(f"Seeding {rows} orders...")
+    seed(rows)
+
+    end_day = datetime.now().date() + timedelta(days=1)
+    start_day = end_day - timedelta(days=367)
+
+    print(f"\n{'path':<32}{'seconds':>10}{'peak MiB':>12}")
+    for name, function in [('weekly_report: ORM .all()', orm_report), ('weekly_report: OrderRow', row_report),
+                           ('export: ORM .all()', orm_export), ('export: OrderRow stream', row_export),
+                           ('export: CSV chunks', csv_export), ('export: XLSX constant_memory', xlsx_export)]:
+        elapsed, peak = measure(function, start_day, end_day)
+        print(f"{name:<32}{elapsed:>10.2f}{peak:>12.1f}")
+
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent read/write throughput with and without the SQLite tuning pragmas.
+
+Simulates technicians clocking out (small write transactions) while dashboard
+requests run aggregate reads, the way waitress threads hit the database.
+
+Usage: python benchmark_sqlite_tuning.py [seconds] [writers] [readers]
+"""
+
+import os
+import sys
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from sqlite_tuning import install_sqlite_tuning, load_sqlite_pragmas, read_sqlite_pragmas
+
+SEED_ROWS = 50000
+EMPLOYEES = ["Greg Clark", "John Smith", "Sarah Johnson", "Mike Wilson", "Emily Davis"]
+
+
+def create_database(path):
+    """Create an order table shaped like the app's, seeded with completed orders"""
+    engine = create_engine(f'sqlite:///{path}')
+    now = datetime.now()
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE "order" (
+                id INTEGER PRIMARY KEY,
+                order_number VARCHAR(50),
+                employee_name VARCHAR(100) NOT NULL,
+                start_time DATETIME NOT NULL,
+                end_time DATETIME,
+                duration_seconds INTEGER
+            )
+        """))
+        conn.execute(text('CREATE INDEX ix_order_employee_start ON "order" (employee_name, start_time)'))
+        conn.execute(text('CREATE INDEX ix_order_start_end ON "order" (start_time, end_time)'))
+
+        rows = []
+        for i in range(SEED_ROWS):
+            start = now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+            duration = random.randint(900, 8 * 3600)
+            rows.append({
+                'order_number': f'SO24-{i:05d}',
+                'employee_name': random.choice(EMPLOYEES),
+                'start_time': start,
+                'end_time': start + timedelta(seconds=duration),
+                'duration_seconds': duration
+            })
+        conn.execute(text("""
+            INSERT INTO "order" (order_number, employee_name, start_time, end_time, duration_seconds)
+            VALUES (:order_number, :employee_name, :start_time, :end_time, :duration_seconds)
+        """), rows)
+
+    engine.dispose()
+
+
+def run_workload(path, pragmas, seconds, writers, readers):
+    """Run concurrent writers and readers for a fixed time and count completed operations"""
+    engine = create_engine(f'sqlite:///{path}', pool_size=writers + readers, max_overflow=0)
+    if pragmas:
+        install_sqlite_tuning(engine, pragmas)
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while time.perf_counter() < stop_at:
+            start = datetime.now() - timedelta(hours=random.randint(1, 8))
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("""
+                        INSERT INTO "order" (order_number, employee_name, start_time, end_time, duration_seconds)
+                        VALUES (:order_number, :employee_name, :start_time, :end_time, :duration_seconds)
+                    """), {
+                        'order_number': 'SO24-BENCH',
+                        'employee_name': random.choice(EMPLOYEES),
+                        'start_time': start,
+                        'end_time': datetime.now(),
+                        'duration_seconds': int((datetime.now() - start).total_seconds())
+                    })
+                bump('writes')
+            except OperationalError:
+                bump('errors')
+
+    def reader():
+        while time.perf_counter() < stop_at:
+            week_start = datetime.now() - timedelta(days=random.randint(7, 365))
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("""
+                        SELECT employee_name, SUM(duration_seconds) FROM "order"
+                        WHERE start_time >= :start AND start_time < :end AND end_time IS NOT NULL
+                        GROUP BY employee_name
+                    """), {'start': week_start, 'end': week_start + timedelta(days=7)}).fetchall()
+                bump('reads')
+            except OperationalError:
+                bump('errors')
+
+    with engine.connect() as conn:
+        effective = read_sqlite_pragmas(conn)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    engine.dispose()
+    return counts, effective
+
+
+def benchmark(seconds=5, writers=4, readers=8):
+    """Compare default SQLite settings against the tuned pragmas"""
+    configurations = [
+        ('default', None),
+        ('tuned', load_sqlite_pragmas()),
+    ]
+
+    print(f"Workload: {writers} writer / {readers} reader threads for {seconds}s on {SEED_ROWS} seeded orders\n")
+    print(f"{'config':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>10}  pragmas")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, pragmas in configurations:
+            path = os.path.join(temp_dir, f'bench_{name}.db')
+            create_database(path)
+            counts, effective = run_workload(path, pragmas, seconds, writers, readers)
+            summary = ', '.join(f"{key}={value}" for key, value in effective.items())
+            print(f"{name:<10}{counts['writes'] / seconds:>12.1f}{counts['reads'] / seconds:>12.1f}"
+                  f"{counts['errors']:>10}  {summary}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    benchmark(*args)
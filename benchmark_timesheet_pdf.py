@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare the in-process ReportLab timesheet with the old pdfkit/wkhtmltopdf path.
+
+Seeds a throwaway SQLite database with a week of completed orders, then
+renders the weekly report PDF repeatedly both ways: render_weekly_timesheet
+(what export_weekly_report uses now) and weekly_report_pdf.html through
+pdfkit.from_string, which starts a wkhtmltopdf process per PDF. The pdfkit
+side only runs where pdfkit and the wkhtmltopdf binary are installed.
+
+Usage: python benchmark_timesheet_pdf.py [orders per day] [runs]   (default 40, 10)
+"""
+
+import os
+import shutil
+import sys
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+scratch_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch_dir, 'bench.db')
+
+from flask import render_template
+from app import app, db, Order, weekly_report_entries, weekly_day_totals
+from timesheet_pdf import render_weekly_timesheet
+
+EMPLOYEES = ["Greg Clark", "John Smith", "Sarah Johnson", "Mike Wilson", "Emily Davis"]
+WEEK_START = date(2025, 6, 2)
+
+def seed(per_day):
+    """Insert per_day completed orders on each day of the benchmark week"""
+    rows = []
+    for day in range(7):
+        for i in range(per_day):
+            start = datetime.combine(WEEK_START + timedelta(days=day), datetime.min.time()) + timedelta(
+                hours=6, minutes=random.randint(0, 600))
+            duration = random.randint(900, 4 * 3600)
+            rows.append({
+                'order_number': f'SO24-{day:02d}{i:04d}', 'entry_type': 'service_order',
+                'employee_name': random.choice(EMPLOYEES), 'notes': 'Replaced filter and checked pressure',
+                'start_time': start, 'end_time': start + timedelta(seconds=duration),
+                'duration_seconds': duration, 'created_at': start
+            })
+    with app.app_context():
+        db.session.execute(Order.__table__.insert(), rows)
+        db.session.commit()
+
+def reportlab_pdf():
+    end = WEEK_START + timedelta(days=6)
+    return render_weekly_timesheet(weekly_report_entries(WEEK_START, end, ''), weekly_day_totals(WEEK_START, end, ''),
+                                   WEEK_START.isoformat(), end.isoformat())
+
+def pdfkit_pdf():
+    """The old path: group every row, render the HTML template, convert with wkhtmltopdf"""
+    import pdfkit
+    end = WEEK_START + timedelta(days=6)
+    report_data, day_totals = defaultdict(list), defaultdict(float)
+    for entry in weekly_report_entries(WEEK_START, end, ''):
+        day_totals[entry.start_time.date()] += entry.hours
+        report_data[entry.start_time.date()].append(entry)
+    with app.test_request_context():
+        html = render_template('weekly_report_pdf.html', report_data=report_data, day_totals=day_totals,
+                               total_hours=sum(day_totals.values()), start_date=WEEK_START.isoformat(),
+                               end_date=end.isoformat(), employee='')
+    return pdfkit.from_string(html, False)
+
+def measure(function, runs):
+    """(first ms, mean ms of the rest, peak MiB, PDF KiB)"""
+    with app.app_context():
+        started = time.perf_counter()
+        pdf = function()
+        first = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for _ in range(runs):
+            function()
+        mean = (time.perf_counter() - started) * 1000 / runs
+
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return first, mean, peak / (1024 * 1024), len(pdf) / 1024
+
+def benchmark(per_day=40, runs=10):
+    seed(per_day)
+    print(f"Weekly timesheet, {per_day * 7} orders, {runs} runs")
+
+    paths = [('ReportLab (in-process)', reportlab_pdf)]
+    try:
+        import pdfkit  # noqa: F401
+        has_pdfkit = shutil.which('wkhtmltopdf') is not None
+    except ImportError:
+        has_pdfkit = False
+    if has_pdfkit:
+        paths.append(('pdfkit + wkhtmltopdf', pdfkit_pdf))
+    else:
+        print("(pdfkit/wkhtmltopdf not installed, skipping the old path)")
+
+    print(f"\n{'path':<26}{'first ms':>10}{'mean ms':>10}{'peak MiB':>10}{'KiB':>8}")
+    for name, function in paths:
+        first, mean, peak, size = measure(function, runs)
+        print(f"{name:<26}{first:>10.1f}{mean:>10.1f}{peak:>10.1f}{size:>8.0f}")
+
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:3]])
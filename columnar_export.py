@@ -0,0 +1,151 @@
+"""
+Columnar Export Module
+Writes orders as Parquet or an Arrow IPC stream for analytics (pandas,
+DuckDB, Polars, Spark) with real column types instead of spreadsheet text:
+microsecond timestamps, an Arrow duration, dictionary-encoded (categorical)
+employee/type/category/status columns.
+
+Rows arrive in chunks (lists of tuples in ORDER_COLUMNS order, straight from
+a chunked query, see app.order_export_chunks) and each chunk becomes one
+record batch / Parquet row group, so memory is bounded by the chunk size.
+Chunks sorted by start_time give row groups with tight min/max statistics,
+so readers can skip row groups when filtering on start_time.
+
+pyarrow is optional: without it, pyarrow_available is False and the app
+does not offer these formats.
+"""
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    pyarrow_available = True
+except ImportError:
+    pyarrow_available = False
+
+# Columns read from the order tables, in row tuple order
+ORDER_COLUMNS = ('id', 'order_number', 'entry_type', 'category', 'employee_name',
+                 'start_time', 'end_time', 'duration_seconds', 'notes')
+
+ROW_GROUP_SIZE = 100000  # Rows per query chunk, record batch and Parquet row group
+
+# Parquet encodings: sorted timestamps and ids shrink to small deltas; the
+# repetitive text columns stay dictionary encoded
+PARQUET_OPTIONS = {
+    'compression': 'zstd',
+    'use_dictionary': ['entry_type', 'category', 'employee_name', 'status', 'notes'],
+    'column_encoding': {'id': 'DELTA_BINARY_PACKED', 'start_time': 'DELTA_BINARY_PACKED',
+                        'end_time': 'DELTA_BINARY_PACKED', 'duration': 'DELTA_BINARY_PACKED',
+                        'order_number': 'DELTA_BYTE_ARRAY'},
+}
+
+# Export format -> (mimetype, file extension)
+COLUMNAR_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def order_schema():
+    """Arrow schema of an order export"""
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('id', pa.int64()),
+        ('order_number', pa.string()),
+        ('entry_type', category),
+        ('category', category),
+        ('employee_name', category),
+        ('start_time', pa.timestamp('us')),
+        ('end_time', pa.timestamp('us')),
+        ('duration', pa.duration('s')),
+        ('status', category),
+        ('notes', pa.string()),
+    ])
+
+
+def order_batch(rows, schema):
+    """One record batch from a chunk of ORDER_COLUMNS tuples"""
+    ids, order_numbers, entry_types, categories, employees, starts, ends, durations, notes = zip(*rows)
+    completed = [end is not None for end in ends]
+    # Active orders have no duration yet, whatever duration_seconds holds
+    durations = [seconds if done else None for seconds, done in zip(durations, completed)]
+
+    return pa.record_batch([
+        pa.array(ids, pa.int64()),
+        pa.array(order_numbers, pa.string()),
+        pa.array(entry_types, pa.string()).dictionary_encode(),
+        pa.array(categories, pa.string()).dictionary_encode(),
+        pa.array(employees, pa.string()).dictionary_encode(),
+        pa.array(starts, pa.timestamp('us')),
+        pa.array(ends, pa.timestamp('us')),
+        pa.array(durations, pa.duration('s')),
+        pa.DictionaryArray.from_arrays(pa.array(completed).cast(pa.int32()), pa.array(['active', 'completed'])),
+        pa.array(notes, pa.string()),
+    ], schema=schema)
+
+
+def write_batches(output, export_format, chunks):
+    """Write each non-empty chunk to output as one row group / record batch, yielding its row count.
+
+    The Parquet footer / end-of-stream marker is written when the generator finishes.
+    """
+    schema = order_schema()
+    if export_format == 'parquet':
+        writer = pq.ParquetWriter(output, schema, **PARQUET_OPTIONS)
+    else:
+        writer = pa.ipc.new_stream(output, schema)
+
+    try:
+        for rows in chunks:
+            if rows:
+                writer.write_batch(order_batch(rows, schema))
+                yield len(rows)
+    finally:
+        writer.close()
+
+
+def write_columnar(output, export_format, chunks, progress=None):
+    """Write chunks of order rows to output (a path or binary file) as Parquet or an Arrow IPC stream.
+
+    progress, if given, is called with the row count of every chunk written. Returns the total row count.
+    """
+    total = 0
+    for count in write_batches(output, export_format, chunks):
+        total += count
+        if progress:
+            progress(count)
+    return total
+
+
+class ChunkSink:
+    """Write-only binary file that hands back what was written since the last take()"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def columnar_chunks(export_format, chunks):
+    """Yield the bytes of a Parquet file / Arrow stream one row group at a time (for streamed responses)"""
+    sink = ChunkSink()
+    for _ in write_batches(sink, export_format, chunks):
+        yield sink.take()
+    yield sink.take()
@@ -0,0 +1,37 @@
+"""
+Shared pytest setup: the tests run against a throwaway database, never the
+time_tracker.db next to the app.
+
+The app creates its schema (and the default admin/admin user) when it is
+first imported, so DATABASE_URL is pointed at a scratch SQLite file before
+any test module imports it. Set TEST_DATABASE_URL to run the suite against
+another database instead (run_tests_postgres.sh does, with a fresh
+PostgreSQL container).
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+scratch_dir = tempfile.mkdtemp(prefix='time_tracker_test_')
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(scratch_dir, 'time_tracker.db')
+
+from app import app, db
+
+
+def pytest_unconfigure(config):
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def client():
+    """Test client logged in as the default admin"""
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    assert response.status_code == 302, 'default admin login failed'
+    return client
@@ -0,0 +1,133 @@
+"""
+Export Jobs Module
+Runs large report exports in the background instead of in the request thread.
+
+A request submits a job and gets its id back right away. A bounded pool of
+worker threads builds the file on disk, and the client polls the job's
+status until it can download the result. Identical requests (same key)
+submitted while a job is still queued or running share that job. Finished
+files are deleted once they have been kept for the retention period.
+
+Jobs live in memory, so they belong to one process. Files left behind by an
+earlier process are removed by the first cleanup.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExportQueueFull(Exception):
+    """Raised by ExportJobQueue.submit when max_pending jobs are already waiting or running"""
+
+
+class ExportJob:
+    """One export: its status, progress (rows written so far) and, once done, the file to send"""
+
+    def __init__(self, key, owner_id, directory, extension, mimetype):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.owner_id = owner_id
+        self.path = os.path.join(directory, f'{self.id}.{extension}')
+        self.mimetype = mimetype
+        self.filename = None
+        self.status = 'queued'
+        self.rows = 0
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def in_flight(self):
+        return self.status in ('queued', 'running')
+
+    def progress(self, rows=1):
+        """Count rows written; called by the build function as it goes"""
+        self.rows += rows
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'rows': self.rows,
+            'filename': self.filename,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class ExportJobQueue:
+    """Bounded worker pool plus the in-memory job table.
+
+    build functions are called as build(job, path) in a worker thread. They write
+    the file to path (moved to job.path when they return), report rows through
+    job.progress() and return the download file name; an exception marks the
+    job failed with its message.
+    """
+
+    def __init__(self, directory, workers=2, max_pending=20, retention=3600):
+        self.directory = directory
+        self.max_pending = max_pending
+        self.retention = retention
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export')
+        self.swept = False
+
+    def submit(self, key, owner_id, extension, mimetype, build):
+        """(job, created): the in-flight job with this key, or a new queued one"""
+        self.cleanup()
+        with self.lock:
+            for job in self.jobs.values():
+                if job.key == key and job.in_flight:
+                    return job, False
+            if sum(job.in_flight for job in self.jobs.values()) >= self.max_pending:
+                raise ExportQueueFull(f'{self.max_pending} exports are already in progress')
+
+            os.makedirs(self.directory, exist_ok=True)
+            job = ExportJob(key, owner_id, self.directory, extension, mimetype)
+            self.jobs[job.id] = job
+        self.executor.submit(self.run, job, build)
+        return job, True
+
+    def run(self, job, build):
+        job.status = 'running'
+        partial_path = job.path + '.part'
+        try:
+            job.filename = build(job, partial_path)
+            os.replace(partial_path, job.path)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cleanup(self):
+        """Forget jobs finished more than retention seconds ago and delete their files (and orphaned files)"""
+        cutoff = time.time() - self.retention
+        with self.lock:
+            expired = [job for job in self.jobs.values() if job.finished_at is not None and job.finished_at < cutoff]
+            for job in expired:
+                del self.jobs[job.id]
+            known = {os.path.basename(job.path) + suffix for job in self.jobs.values() for suffix in ('', '.part')}
+            sweep, self.swept = not self.swept, True
+
+        for job in expired:
+            if os.path.exists(job.path):
+                os.remove(job.path)
+
+        # Once per process: files from jobs of an earlier run can never be downloaded
+        if sweep and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name not in known:
+                    os.remove(os.path.join(self.directory, name))
+        return len(expired)
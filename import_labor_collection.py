@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Bulk-import labor collection reports exported from the ERP (CSV or XLSX).
+Rows are parsed as they are read and inserted in batches, one transaction per
+batch; entries that are already in the database are skipped.
+
+Usage: python import_labor_collection.py FILE [FILE ...] [--employee "Greg Clark"] [--batch-size N]
+"""
+
+import argparse
+import time
+from app import app, import_labor_entries, IMPORT_BATCH_SIZE
+from labor_import import iter_labor_entries, import_file_type
+
+def import_labor_collection(paths, employee_name=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import each export file, printing progress after every batch and the rows that failed"""
+
+    with app.app_context():
+        for path in paths:
+            file_type = import_file_type(path)
+            if not file_type:
+                print(f"Skipping {path}: not a .csv or .xlsx file")
+                continue
+
+            print(f"Importing {path}...")
+            started = time.perf_counter()
+            with open(path, 'rb') as stream:
+                for stats in import_labor_entries(iter_labor_entries(stream, file_type, employee_name), batch_size):
+                    print(f"  {stats['rows']} rows read, {stats['imported']} imported, "
+                          f"{stats['duplicates']} already present, {stats['failed']} failed")
+
+            for error in stats['errors']:
+                print(f"  line {error['line']}: {error['error']}")
+            if stats['failed'] > len(stats['errors']):
+                print(f"  ... and {stats['failed'] - len(stats['errors'])} more errors")
+            print(f"Imported {stats['imported']} entries from {path} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Import labor collection CSV/XLSX exports")
+    arg_parser.add_argument('paths', nargs='+', help="export files")
+    arg_parser.add_argument('--employee', help="employee for files that don't name one")
+    arg_parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="rows per transaction")
+    args = arg_parser.parse_args()
+    import_labor_collection(args.paths, args.employee, args.batch_size)
@@ -0,0 +1,213 @@
+"""
+Labor Collection Import Module
+Stream-parses labor collection reports exported from the ERP as CSV or XLSX.
+
+The export has the same columns as the screenshot format handled by
+labor_collection_parser.py (Order Number, Labor Type, Start Time, End Time,
+Hours), optionally preceded by a "Dear <name>" greeting naming the employee
+and optionally with an Employee column for multi-employee exports.
+
+Rows are read one at a time (csv reader / openpyxl read-only mode), so a
+year of history never has to fit in memory. Each row comes out as a
+(line_number, entry, error) triple; the bulk insert lives in app.py
+(import_labor_entries).
+"""
+import csv
+import io
+import re
+from datetime import datetime, timedelta
+from itertools import islice
+from dateutil import parser
+
+IMPORT_EXTENSIONS = {'csv', 'xlsx'}
+
+# Header cell (lowercased, single-spaced) -> entry field
+HEADER_FIELDS = {
+    'order number': 'order_number',
+    'labor type': 'labor_type',
+    'start time': 'start_time',
+    'end time': 'end_time',
+    'hours': 'hours',
+    'employee': 'employee_name',
+    'employee name': 'employee_name',
+    'technician': 'employee_name',
+    'notes': 'notes',
+}
+REQUIRED_FIELDS = ('order_number', 'start_time')
+
+GREETING_PATTERNS = [
+    r'Dear\s+([A-Za-z\.]+\s+[A-Za-z\.]+)',  # "Dear Greg Clark"
+    r'To:\s*([A-Za-z]+\s+[A-Za-z]+)'  # "To: Greg Clark"
+]
+HOURS_PATTERN = re.compile(r'(\d+)\s*Hours?(?:\s*(\d+)\s*Minutes?)?', re.IGNORECASE)
+# The ERP's own "6/6/2025 10:23:00 AM" format, matched directly (strptime dominates the import otherwise)
+REPORT_TIME_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4}) (\d{1,2}):(\d{2})(?::(\d{2}))? ?([AaPp])[Mm]$')
+TIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y %H:%M']
+
+
+def import_file_type(filename):
+    """'csv' or 'xlsx' for a supported export file name, else None"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in IMPORT_EXTENSIONS else None
+
+
+def iter_report_rows(stream, file_type):
+    """Yield each row of a CSV or XLSX export as a list of cell values"""
+    if file_type == 'xlsx':
+        from openpyxl import load_workbook  # Only needed for Excel imports
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+    else:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()  # Leave the caller's stream open
+
+
+def read_header(row):
+    """Map entry fields to column positions if the row is the report's table header, else None"""
+    columns = {}
+    for position, cell in enumerate(row):
+        name = ' '.join(str(cell).split()).lower() if cell is not None else ''
+        field = HEADER_FIELDS.get(name)
+        if field and field not in columns:
+            columns[field] = position
+    if all(field in columns for field in REQUIRED_FIELDS):
+        return columns
+    return None
+
+
+def parse_report_time(value):
+    """Datetime from an export cell: Excel dates pass through, text tries the ERP formats before dateutil"""
+    if isinstance(value, datetime):
+        return value
+    text = ' '.join(str(value).split())
+    match = REPORT_TIME_PATTERN.match(text)
+    if match:
+        month, day, year, hour, minute, second, meridiem = match.groups()
+        hour = int(hour) % 12 + (12 if meridiem in 'Pp' else 0)
+        return datetime(int(year), int(month), int(day), hour, int(minute), int(second or 0))
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(text, time_format)
+        except ValueError:
+            continue
+    return parser.parse(text)
+
+
+def parse_report_hours(value):
+    """Decimal hours from "4 Hours 10 Minutes" text or a plain number, or None if blank"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = HOURS_PATTERN.search(str(value))
+    if match:
+        return int(match.group(1)) + int(match.group(2) or 0) / 60
+    return float(value)
+
+
+def parse_entry(row, columns, employee_name):
+    """Build an order entry from one data row; raises ValueError with a readable message"""
+    def cell(field):
+        position = columns.get(field)
+        if position is None or position >= len(row) or row[position] is None:
+            return None
+        value = row[position]
+        return (value.strip() or None) if isinstance(value, str) else value
+
+    order_number = cell('order_number')
+    if not order_number:
+        raise ValueError('Missing order number')
+    order_number = str(order_number).upper()
+    if len(order_number) > 50:
+        raise ValueError(f'Order number too long: {order_number[:50]}...')
+
+    employee_name = cell('employee_name') or employee_name
+    if not employee_name:
+        raise ValueError('No employee: add an Employee column or pass a default employee')
+
+    if cell('start_time') is None:
+        raise ValueError('Missing start time')
+    try:
+        start_time = parse_report_time(cell('start_time'))
+    except (ValueError, OverflowError):
+        raise ValueError(f'Invalid start time: {cell("start_time")}')
+
+    end_value = cell('end_time')
+    try:
+        hours = parse_report_hours(cell('hours'))
+    except ValueError:
+        raise ValueError(f'Invalid hours: {cell("hours")}')
+    if end_value is not None:
+        try:
+            end_time = parse_report_time(end_value)
+        except (ValueError, OverflowError):
+            raise ValueError(f'Invalid end time: {end_value}')
+    elif hours is not None:
+        end_time = start_time + timedelta(hours=hours)
+    else:
+        raise ValueError('Missing end time and hours')
+
+    if end_time < start_time:
+        raise ValueError('End time is before start time')
+
+    return {
+        'order_number': order_number,
+        'entry_type': 'service_order',
+        'employee_name': str(employee_name)[:100],
+        'start_time': start_time,
+        'end_time': end_time,
+        'notes': cell('notes'),
+    }
+
+
+def iter_labor_entries(stream, file_type, employee_name=None):
+    """Yield (line_number, entry, error) for every data row of an export.
+
+    Exactly one of entry/error is set. Rows before the table header are scanned
+    for the employee greeting; blank rows and "Total Hours" footers are skipped.
+    employee_name is the default when neither the greeting nor an Employee
+    column names one.
+    """
+    columns = None
+    for line_number, row in enumerate(iter_report_rows(stream, file_type), 1):
+        if not any(cell not in (None, '') for cell in row):
+            continue
+
+        if columns is None:
+            columns = read_header(row)
+            if columns is None:
+                line = ' '.join(str(cell) for cell in row if cell is not None)
+                for pattern in GREETING_PATTERNS:
+                    match = re.search(pattern, line, re.IGNORECASE)
+                    if match:
+                        employee_name = match.group(1)
+                        break
+            continue
+
+        if any('total hours' in str(cell).lower() for cell in row if cell is not None):
+            continue
+
+        try:
+            yield line_number, parse_entry(row, columns, employee_name), None
+        except ValueError as e:
+            yield line_number, None, str(e)
+
+    if columns is None:
+        yield 0, None, 'No labor collection header found (expected Order Number, Labor Type, Start Time, End Time, Hours)'
+
+
+def chunked(iterable, size):
+    """Split an iterable into lists of at most size items without materializing it"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -8,12 +8,20 @@ import sqlite3
 import os
 from datetime import datetime
 
+from database_config import get_database_url, is_sqlite_url, sqlite_path
+
 def migrate_database():
     """Migrate the database to the latest schema"""
     
-    # Get the database path
+    # Get the database path (DATABASE_URL selects PostgreSQL instead)
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(current_dir, 'time_tracker.db')
+    database_url = get_database_url(current_dir)
+    
+    if not is_sqlite_url(database_url):
+        migrate_postgresql(database_url)
+        return
+    
+    db_path = sqlite_path(database_url)
     
     print(f"Migrating database: {db_path}")
     
@@ -91,7 +99,8 @@ def migrate_database():
                 ('allow_registration', 'true', 'bool', 'security', 'Allow user self-registration'),
                 ('enable_auto_backup', 'false', 'bool', 'backup', 'Enable automatic backups'),
                 ('backup_frequency', 'weekly', 'string', 'backup', 'Backup frequency'),
-                ('backup_retention', '30', 'int', 'backup', 'Backup retention in days')
+                ('backup_retention', '30', 'int', 'backup', 'Backup retention in days'),
+                ('archive_after_days', '0', 'int', 'backup', 'Archive completed orders older than this many days (0 = never)')
             ]
             
             cursor.executemany(
@@ -126,7 +135,81 @@ def migrate_database():
             if 'user_id' not in order_columns:
                 print("Adding user_id column to order table...")
                 cursor.execute("ALTER TABLE `order` ADD COLUMN user_id INTEGER")
-        
+            
+            if 'duration_seconds' not in order_columns:
+                print("Adding duration_seconds column to order table...")
+                cursor.execute("ALTER TABLE `order` ADD COLUMN duration_seconds INTEGER")
+            
+            # Backfill stored durations for completed orders
+            cursor.execute("""
+                UPDATE `order`
+                SET duration_seconds = CAST(ROUND((julianday(end_time) - julianday(start_time)) * 86400) AS INTEGER)
+                WHERE end_time IS NOT NULL AND duration_seconds IS NULL
+            """)
+            print(f"Backfilled duration_seconds for {cursor.rowcount} orders")
+            
+            # Employee dimension: one row per distinct employee name, linked to a user when the name matches
+            print("Ensuring employee table...")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS employee (
+                    id INTEGER PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL UNIQUE,
+                    user_id INTEGER REFERENCES user (id)
+                )
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO employee (name)
+                SELECT DISTINCT employee_name FROM `order` WHERE employee_name IS NOT NULL
+            """)
+            cursor.execute("""
+                UPDATE employee SET user_id = (
+                    SELECT u.id FROM user u
+                    WHERE u.username = employee.name OR (u.first_name || ' ' || u.last_name) = employee.name
+                    ORDER BY u.id LIMIT 1
+                )
+            """)
+            
+            # Backfill order.user_id by resolving employee names against users
+            cursor.execute("""
+                UPDATE `order` SET user_id = (
+                    SELECT e.user_id FROM employee e WHERE e.name = `order`.employee_name
+                )
+            """)
+            print(f"Resolved user_id for {cursor.rowcount} orders")
+            
+            # Rollup rows follow the order's user_id
+            cursor.execute("PRAGMA table_info(daily_hours)")
+            daily_hours_columns = [column[1] for column in cursor.fetchall()]
+            if daily_hours_columns:
+                if 'user_id' not in daily_hours_columns:
+                    print("Adding user_id column to daily_hours table...")
+                    cursor.execute("ALTER TABLE daily_hours ADD COLUMN user_id INTEGER")
+                cursor.execute("""
+                    UPDATE daily_hours SET user_id = (
+                        SELECT e.user_id FROM employee e WHERE e.name = daily_hours.employee_name
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS ix_daily_hours_user_day ON daily_hours (user_id, day)")
+
+            # Add indexes used by the index page, reports and dashboard APIs
+            order_indexes = {
+                'ix_order_employee_start': "ON `order` (employee_name, start_time)",
+                'ix_order_user_start': "ON `order` (user_id, start_time)",
+                'ix_order_start_end': "ON `order` (start_time, end_time)",
+                'ix_order_completed_end': "ON `order` (end_time) WHERE end_time IS NOT NULL",
+                'ix_order_active_start': "ON `order` (start_time) WHERE end_time IS NULL",
+            }
+
+            for index_name, index_definition in order_indexes.items():
+                print(f"Ensuring index {index_name} on order table...")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} {index_definition}")
+
+            # Archived orders keep their ids, so live ids must never be handed out again
+            ensure_order_autoincrement(cursor)
+
+            # Refresh planner statistics so the new indexes are picked up
+            cursor.execute("ANALYZE")
+
         # Commit all changes
         conn.commit()
         print("Database migration completed successfully!")
@@ -139,5 +222,159 @@ def migrate_database():
     finally:
         conn.close()
 
+def ensure_order_autoincrement(cursor):
+    """Rebuild a SQLite order table without AUTOINCREMENT so deleted (archived) ids are never reused.
+    
+    Without it SQLite hands out max(id) + 1, which repeats the ids of archived orders once the newest
+    ones are archived. Copies the rows into a table with the same columns and foreign keys, then restores
+    the indexes and triggers (search index sync). The id sequence starts past the archive's ids too.
+    Returns True if the table was rebuilt.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'order'")
+    row = cursor.fetchone()
+    if row is None or 'AUTOINCREMENT' in row[0].upper():
+        return False
+    
+    print("Rebuilding order table with AUTOINCREMENT ids...")
+    cursor.execute("SELECT sql FROM sqlite_master WHERE tbl_name = 'order' AND type IN ('index', 'trigger') "
+                   "AND sql IS NOT NULL")
+    dependents = [sql for (sql,) in cursor.fetchall()]
+    
+    cursor.execute("PRAGMA table_info('order')")
+    columns = cursor.fetchall()  # (cid, name, type, notnull, default, pk)
+    cursor.execute("PRAGMA foreign_key_list('order')")
+    references = {key[3]: f'REFERENCES "{key[2]}" ({key[4]})' for key in cursor.fetchall()}
+    
+    definitions = []
+    for _, name, column_type, notnull, default, pk in columns:
+        if pk:
+            definitions.append(f'"{name}" INTEGER PRIMARY KEY AUTOINCREMENT')
+            continue
+        definition = f'"{name}" {column_type}'
+        if notnull:
+            definition += ' NOT NULL'
+        if default is not None:
+            definition += f' DEFAULT {default}'
+        if name in references:
+            definition += f' {references[name]}'
+        definitions.append(definition)
+    names = ', '.join(f'"{column[1]}"' for column in columns)
+    
+    cursor.execute(f'CREATE TABLE order_autoincrement ({", ".join(definitions)})')
+    cursor.execute(f'INSERT INTO order_autoincrement ({names}) SELECT {names} FROM "order"')
+    cursor.execute('DROP TABLE "order"')
+    cursor.execute('ALTER TABLE order_autoincrement RENAME TO "order"')
+    for sql in dependents:
+        cursor.execute(sql)
+    
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'order_archive'")
+    archive = 'UNION ALL SELECT MAX(id) FROM order_archive' if cursor.fetchone() else ''
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'order'")
+    cursor.execute(f"""
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'order', COALESCE(MAX(id), 0) FROM (SELECT MAX(id) AS id FROM "order" {archive})
+    """)
+    return True
+
+def migrate_postgresql(database_url):
+    """Migrate a PostgreSQL database to the latest schema.
+    
+    PostgreSQL databases are created by the app itself (db.create_all), so this only
+    has to bring forward columns, backfills and indexes added after they were created.
+    Take a backup with pg_dump (or Admin > Settings > Backup) before running it.
+    """
+    from sqlalchemy import create_engine, inspect, text
+    
+    engine = create_engine(database_url)
+    print(f"Migrating PostgreSQL database: {engine.url.render_as_string(hide_password=True)}")
+    
+    try:
+        # One transaction: PostgreSQL DDL is transactional, so a failure leaves nothing half-applied
+        with engine.begin() as conn:
+            tables = inspect(conn).get_table_names()
+            
+            if 'order' not in tables:
+                print("No order table yet; the app creates the full schema on first start")
+                return
+            
+            order_columns = [column['name'] for column in inspect(conn).get_columns('order')]
+            print(f"Existing order columns: {order_columns}")
+            
+            conn.execute(text('ALTER TABLE "order" ADD COLUMN IF NOT EXISTS user_id INTEGER'))
+            conn.execute(text('ALTER TABLE "order" ADD COLUMN IF NOT EXISTS duration_seconds INTEGER'))
+            
+            # Backfill stored durations for completed orders
+            result = conn.execute(text("""
+                UPDATE "order"
+                SET duration_seconds = CAST(ROUND(EXTRACT(EPOCH FROM (end_time - start_time))) AS INTEGER)
+                WHERE end_time IS NOT NULL AND duration_seconds IS NULL
+            """))
+            print(f"Backfilled duration_seconds for {result.rowcount} orders")
+            
+            # Employee dimension: one row per distinct employee name, linked to a user when the name matches
+            print("Ensuring employee table...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS employee (
+                    id SERIAL PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL UNIQUE,
+                    user_id INTEGER REFERENCES "user" (id)
+                )
+            """))
+            conn.execute(text("""
+                INSERT INTO employee (name)
+                SELECT DISTINCT employee_name FROM "order" WHERE employee_name IS NOT NULL
+                ON CONFLICT (name) DO NOTHING
+            """))
+            conn.execute(text("""
+                UPDATE employee SET user_id = (
+                    SELECT u.id FROM "user" u
+                    WHERE u.username = employee.name OR (u.first_name || ' ' || u.last_name) = employee.name
+                    ORDER BY u.id LIMIT 1
+                )
+            """))
+            
+            # Backfill order.user_id by resolving employee names against users
+            result = conn.execute(text("""
+                UPDATE "order" SET user_id = (
+                    SELECT e.user_id FROM employee e WHERE e.name = "order".employee_name
+                )
+            """))
+            print(f"Resolved user_id for {result.rowcount} orders")
+            
+            # Rollup rows follow the order's user_id
+            if 'daily_hours' in tables:
+                conn.execute(text('ALTER TABLE daily_hours ADD COLUMN IF NOT EXISTS user_id INTEGER'))
+                conn.execute(text("""
+                    UPDATE daily_hours SET user_id = (
+                        SELECT e.user_id FROM employee e WHERE e.name = daily_hours.employee_name
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_daily_hours_user_day ON daily_hours (user_id, day)"))
+            
+            # Add indexes used by the index page, reports and dashboard APIs
+            order_indexes = {
+                'ix_order_employee_start': 'ON "order" (employee_name, start_time)',
+                'ix_order_user_start': 'ON "order" (user_id, start_time)',
+                'ix_order_start_end': 'ON "order" (start_time, end_time)',
+                'ix_order_completed_end': 'ON "order" (end_time) WHERE end_time IS NOT NULL',
+                'ix_order_active_start': 'ON "order" (start_time) WHERE end_time IS NULL',
+            }
+            
+            for index_name, index_definition in order_indexes.items():
+                print(f"Ensuring index {index_name} on order table...")
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} {index_definition}"))
+            
+            # Refresh planner statistics so the new indexes are picked up
+            conn.execute(text("ANALYZE"))
+        
+        print("Database migration completed successfully!")
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise
+    
+    finally:
+        engine.dispose()
+
 if __name__ == "__main__":
     migrate_database() 
\ No newline at end of file
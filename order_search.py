@@ -0,0 +1,143 @@
+"""
+Order Search Module
+Full-text search over order numbers, categories, employee names and notes.
+
+On SQLite each order table gets an FTS5 index (external content, so the text
+isn't stored twice) kept in sync by triggers. On PostgreSQL the same search
+runs against a GIN index on a weighted tsvector expression.
+
+Matching is prefix-based, so a partial order number like SO24-023 finds
+SO24-0231, SO24-0232, ...
+"""
+import re
+from sqlalchemy import text
+
+# Searched columns and their weight in the ranking
+SEARCH_COLUMNS = ['order_number', 'employee_name', 'category', 'notes']
+SEARCH_WEIGHTS = [10.0, 5.0, 2.0, 1.0]
+POSTGRES_WEIGHTS = ['A', 'B', 'C', 'D']
+
+
+def fts_table(table):
+    """Name of the FTS5 table indexing an order table"""
+    return f'{table}_fts'
+
+
+def install_search_index(connection, table):
+    """Create the search index for an order table if missing; returns True if it was just created"""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_search ON "{table}" USING gin (({postgres_vector()}))'
+        ))
+        return False
+
+    fts = fts_table(table)
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': fts}
+    ).first() is not None
+
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+    # prefix='2 3' adds prefix indexes so short "SO2*" style queries don't scan the term list
+    connection.execute(text(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+        f"{columns}, content='{table}', content_rowid='id', prefix='2 3')"
+    ))
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON "{table}" BEGIN '
+        f'INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values}); END'
+    ))
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON "{table}" BEGIN '
+        f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    # Only edits to searched columns touch the index (not completing a timer)
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON "{table}" BEGIN '
+        f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f'INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values}); END'
+    ))
+
+    if not exists:
+        # Index the rows that were there before the triggers
+        connection.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
+    return not exists
+
+
+def postgres_vector(alias=None):
+    """Weighted tsvector expression over the searched columns (must match the GIN index exactly)"""
+    prefix = f'{alias}.' if alias else ''
+    return ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in zip(SEARCH_COLUMNS, POSTGRES_WEIGHTS)
+    )
+
+
+def build_match_query(query, dialect_name):
+    """Turn user input into a prefix-matching full-text query, or None if it has no searchable terms.
+
+    Every word must match. A word split by punctuation (SO24-023) must match as
+    a phrase, and its last part may be a prefix.
+    """
+    terms = []
+    for word in query.split():
+        if dialect_name == 'postgresql':
+            # PostgreSQL's parser splits SO24-023 the same way in queries as in documents
+            word = re.sub(r'[^\w-]', '', word).strip('-')
+            if word:
+                terms.append(f'{word}:*')
+        else:
+            parts = re.findall(r'\w+', word)
+            if parts:
+                terms.append('"{}"*'.format(' '.join(parts)))
+
+    if not terms:
+        return None
+    return ' & '.join(terms) if dialect_name == 'postgresql' else ' '.join(terms)
+
+
+def search_order_ids(connection, table, query, start=None, end=None, limit=25, offset=0, team_of=None):
+    """Best matches in an order table as (id, score) pairs, best first.
+
+    Scores are comparable across tables of the same backend (lower is better).
+    start/end limit results to orders that started in [start, end); team_of to
+    orders of that user and everyone below them (the user_access closure).
+    """
+    dialect_name = connection.dialect.name
+    match = build_match_query(query, dialect_name)
+    if match is None:
+        return []
+
+    params = {'match': match, 'limit': limit, 'offset': offset}
+    filters = ''
+    if start is not None:
+        filters += ' AND o.start_time >= :start'
+        params['start'] = start
+    if end is not None:
+        filters += ' AND o.start_time < :end'
+        params['end'] = end
+    if team_of is not None:
+        filters += ' AND o.user_id IN (SELECT descendant_id FROM user_access WHERE ancestor_id = :team_of)'
+        params['team_of'] = team_of
+
+    if dialect_name == 'postgresql':
+        # ts_rank is higher-is-better; negate so both backends sort ascending
+        sql = (
+            f"SELECT o.id, -ts_rank({postgres_vector('o')}, to_tsquery('simple', :match)) AS score "
+            f'FROM "{table}" o '
+            f"WHERE {postgres_vector('o')} @@ to_tsquery('simple', :match){filters} "
+            f'ORDER BY score, o.id DESC LIMIT :limit OFFSET :offset'
+        )
+    else:
+        fts = fts_table(table)
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        sql = (
+            f'SELECT o.id, bm25({fts}, {weights}) AS score '
+            f'FROM {fts} JOIN "{table}" o ON o.id = {fts}.rowid '
+            f'WHERE {fts} MATCH :match{filters} '
+            f'ORDER BY score, o.id DESC LIMIT :limit OFFSET :offset'
+        )
+
+    return [(row[0], row[1]) for row in connection.execute(text(sql), params)]
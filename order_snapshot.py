@@ -0,0 +1,250 @@
+"""
+Order Snapshot Module
+In-memory columnar copy of the completed orders (live and archive) as NumPy
+arrays, for analytics that slice the whole history interactively: a pivot
+over millions of orders is a handful of vectorized passes instead of a SQL
+GROUP BY or a Python loop per request.
+
+One row per completed order, sorted by start time: epoch seconds of the
+(naive, local) start and end, the stored duration, the user id, and
+dictionary codes for employee name, entry type and category. A date range
+is a binary search into the sorted starts; group keys are combined into one
+integer per row and summed with np.bincount, or with a sort and
+np.add.reduceat when the key space is too sparse for a dense count array.
+
+The snapshot refreshes incrementally: writes queue the ids of the orders
+they changed (invalidate(ids)), and the next read re-fetches only those rows
+plus any order with an id above the highest one loaded, which also picks up
+bulk inserts and orders added by other processes. It is fully reloaded on
+first use, after invalidate() with no ids, and every ttl seconds.
+"""
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+from itertools import islice
+from time import monotonic
+
+import numpy as np
+
+# Row tuple order expected from the fetch function; start_time and end_time are
+# epoch seconds of the naive datetimes (see database_config.epoch_expression)
+SNAPSHOT_COLUMNS = ('id', 'employee_name', 'user_id', 'entry_type', 'category',
+                    'start_time', 'end_time', 'duration_seconds')
+
+PERIODS = ('day', 'week', 'month')
+DIMENSIONS = ('employee', 'entry_type', 'category') + PERIODS
+
+LOAD_CHUNK = 100000  # Rows converted to arrays at a time while loading
+MAX_PENDING = 1000  # More changed ids than this and a full reload is cheaper
+DENSE_GROUP_LIMIT = 1 << 20  # Group key spaces up to this size use bincount, larger ones sort + reduceat
+EPOCH = date(1970, 1, 1)
+NO_USER = -1
+
+SnapshotArrays = namedtuple('SnapshotArrays', ('id', 'start', 'end', 'duration', 'user',
+                                               'employee', 'entry_type', 'category'))
+
+# Pivot result: keys holds one list of labels per group_by dimension, parallel to seconds and counts
+PivotResult = namedtuple('PivotResult', ('group_by', 'keys', 'seconds', 'counts'))
+
+
+def empty_arrays():
+    return SnapshotArrays(*(np.empty(0, np.int64) for _ in range(5)), *(np.empty(0, np.int32) for _ in range(3)))
+
+
+def day_seconds(day):
+    return (day - EPOCH).days * 86400
+
+
+class Codes:
+    """Dictionary encoding of a text column: append-only labels, a row stores the label's index"""
+
+    def __init__(self):
+        self.labels = []
+        self.index = {}
+
+    def code(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.labels)
+            self.labels.append(value)
+        return code
+
+    def encode(self, values):
+        return np.fromiter((self.code(value) for value in values), dtype=np.int32, count=len(values))
+
+    def lookup(self, value):
+        """Code of value, or -1 if no order has it"""
+        return self.index.get(value, -1)
+
+
+class OrderSnapshot:
+    """NumPy arrays of every completed order, refreshed from fetch as writes are reported"""
+
+    def __init__(self, fetch, ttl=3600):
+        # fetch(ids, after_id) yields completed order rows in SNAPSHOT_COLUMNS order: every order
+        # when both are None, otherwise the live orders with id in ids or id above after_id
+        self.fetch = fetch
+        self.ttl = ttl
+        self.arrays = empty_arrays()
+        self.employees, self.entry_types, self.categories = Codes(), Codes(), Codes()
+        self.max_id = 0
+        self.loaded_at = None
+        self.pending = None  # Ids changed since the last refresh; None means reload everything
+        self.lock = threading.Lock()  # Guards pending
+        self.refresh_lock = threading.Lock()  # One refresh at a time; readers keep the arrays they got
+        self.stats = {'loads': 0, 'refreshes': 0, 'refreshed_rows': 0}
+
+    def invalidate(self, ids=None):
+        """Re-read the orders with these ids on the next refresh, or reload everything when ids is None"""
+        with self.lock:
+            if ids is None or self.pending is None:
+                self.pending = None
+            else:
+                self.pending.update(ids)
+
+    def current(self):
+        """The refreshed SnapshotArrays (runs fetch in the caller's context)"""
+        with self.refresh_lock:
+            with self.lock:
+                pending, self.pending = self.pending, set()
+            try:
+                if (pending is None or len(pending) > MAX_PENDING
+                        or monotonic() - self.loaded_at >= self.ttl):
+                    self.load()
+                else:
+                    self.update(pending)
+            except Exception:
+                self.invalidate()
+                raise
+            return self.arrays
+
+    def encode(self, rows):
+        """Sorted SnapshotArrays for an iterable of rows, converted LOAD_CHUNK rows at a time"""
+        parts = []
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, LOAD_CHUNK))
+            if not chunk:
+                break
+            ids, employees, users, entry_types, categories, starts, ends, durations = zip(*chunk)
+            start, end = np.array(starts, np.int64), np.array(ends, np.int64)
+            duration = np.array([-1 if seconds is None else seconds for seconds in durations], np.int64)
+            parts.append(SnapshotArrays(
+                np.array(ids, np.int64), start, end,
+                np.where(duration < 0, end - start, duration),  # Rows written before duration_seconds existed
+                np.array([NO_USER if user is None else user for user in users], np.int64),
+                self.employees.encode(employees), self.entry_types.encode(entry_types),
+                self.categories.encode(categories),
+            ))
+        if not parts:
+            return empty_arrays()
+
+        arrays = SnapshotArrays(*(np.concatenate(column) for column in zip(*parts)))
+        order = np.argsort(arrays.start, kind='stable')
+        return SnapshotArrays(*(column[order] for column in arrays))
+
+    def load(self):
+        self.arrays = self.encode(self.fetch(None, None))
+        self.max_id = int(self.arrays.id.max()) if len(self.arrays.id) else 0
+        self.loaded_at = monotonic()
+        self.stats['loads'] += 1
+
+    def update(self, pending):
+        """Replace the pending orders and add any newer than max_id, keeping the start order"""
+        fresh = self.encode(self.fetch(pending, self.max_id))
+        if not pending and not len(fresh.id):
+            return
+
+        arrays = self.arrays
+        if pending:
+            keep = ~np.isin(arrays.id, np.fromiter(pending, np.int64, count=len(pending)))
+            arrays = SnapshotArrays(*(column[keep] for column in arrays))
+        if len(fresh.id):
+            positions = np.searchsorted(arrays.start, fresh.start, side='right')
+            arrays = SnapshotArrays(*(np.insert(column, positions, new)
+                                      for column, new in zip(arrays, fresh)))
+            self.max_id = max(self.max_id, int(fresh.id.max()))
+        self.arrays = arrays
+        self.stats['refreshes'] += 1
+        self.stats['refreshed_rows'] += len(fresh.id)
+
+    def select(self, arrays, start_day=None, end_day=None, employee=None, entry_type=None, user_ids=None):
+        """Arrays of the orders starting in [start_day, end_day) that match the filters.
+
+        The date range is a slice of the start-sorted arrays (no copy); user_ids
+        is a collection of user ids, or None for everyone.
+        """
+        low = 0 if start_day is None else np.searchsorted(arrays.start, day_seconds(start_day))
+        high = len(arrays.start) if end_day is None else np.searchsorted(arrays.start, day_seconds(end_day))
+        arrays = SnapshotArrays(*(column[low:high] for column in arrays))
+
+        mask = np.ones(len(arrays.id), bool)
+        if employee:
+            mask &= arrays.employee == self.employees.lookup(employee)
+        if entry_type:
+            mask &= arrays.entry_type == self.entry_types.lookup(entry_type)
+        if user_ids is not None:
+            mask &= np.isin(arrays.user, np.fromiter(user_ids, np.int64, count=len(user_ids)))
+        if mask.all():
+            return arrays
+        return SnapshotArrays(*(column[mask] for column in arrays))
+
+    def dimension(self, arrays, name):
+        """(codes from 0, number of codes, code -> label) for one group-by dimension"""
+        if name in ('employee', 'entry_type', 'category'):
+            labels = {'employee': self.employees, 'entry_type': self.entry_types,
+                      'category': self.categories}[name].labels
+            return getattr(arrays, name), len(labels), labels.__getitem__
+
+        days = arrays.start // 86400
+        if name == 'day':
+            keys, label = days, lambda key: EPOCH + timedelta(days=key)
+        elif name == 'week':
+            # Weeks start on Monday; 1970-01-05 (epoch day 4) was one
+            keys, label = (days - 4) // 7, lambda key: EPOCH + timedelta(days=key * 7 + 4)
+        else:
+            keys = arrays.start.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+            label = lambda key: date(1970 + key // 12, key % 12 + 1, 1)
+        low = int(keys.min())
+        return keys - low, int(keys.max()) - low + 1, lambda key: label(key + low)
+
+    def pivot(self, group_by, **filters):
+        """Total seconds and order count per combination of group_by dimensions (see DIMENSIONS).
+
+        filters are select()'s. Combinations without orders are left out; the
+        rest come back in code order (periods ascending, names by first use).
+        """
+        arrays = self.select(self.current(), **filters)
+        if not len(arrays.id):
+            return PivotResult(tuple(group_by), [[] for _ in group_by], np.empty(0, np.int64), np.empty(0, np.int64))
+
+        dimensions = [self.dimension(arrays, name) for name in group_by]
+        shape = tuple(size for _, size, _ in dimensions)
+        if dimensions:
+            flat = np.ravel_multi_index([codes for codes, _, _ in dimensions], shape)
+        else:
+            flat = np.zeros(len(arrays.id), np.int64)
+        size = int(np.prod(shape))
+
+        if size <= DENSE_GROUP_LIMIT:
+            counts = np.bincount(flat, minlength=size)
+            seconds = np.bincount(flat, weights=arrays.duration, minlength=size)
+            groups = np.flatnonzero(counts)
+            counts, seconds = counts[groups], seconds[groups].astype(np.int64)
+        else:
+            # Too many possible keys for a dense array: sort the keys and sum each run
+            order = np.argsort(flat, kind='stable')
+            flat = flat[order]
+            starts = np.flatnonzero(np.r_[True, flat[1:] != flat[:-1]])
+            groups = flat[starts]
+            seconds = np.add.reduceat(arrays.duration[order], starts)
+            counts = np.diff(np.r_[starts, len(flat)])
+
+        keys = [[label(int(code)) for code in codes]
+                for codes, (_, _, label) in zip(np.unravel_index(groups, shape), dimensions)]
+        return PivotResult(tuple(group_by), keys, seconds, counts)
+
+    def info(self):
+        """Size and refresh counters, for monitoring"""
+        return dict(self.stats, orders=len(self.arrays.id), max_id=self.max_id,
+                    age=None if self.loaded_at is None else round(monotonic() - self.loaded_at, 1))
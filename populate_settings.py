@@ -31,7 +31,8 @@ def populate_default_settings():
             ('allow_registration', 'true', 'bool', 'security', 'Allow user self-registration'),
             ('enable_auto_backup', 'false', 'bool', 'backup', 'Enable automatic backups'),
             ('backup_frequency', 'weekly', 'string', 'backup', 'Backup frequency'),
-            ('backup_retention', '30', 'int', 'backup', 'Backup retention in days')
+            ('backup_retention', '30', 'int', 'backup', 'Backup retention in days'),
+            ('archive_after_days', '0', 'int', 'backup', 'Archive completed orders older than this many days (0 = never)')
         ]
 
         for key, value, value_type, section, description in default_settings:
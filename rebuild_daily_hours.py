@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily_hours rollup table from the live and archived orders.
+Use it to backfill the rollup or to repair drift after manual database edits.
+"""
+
+from app import app, DailyHours
+
+def rebuild_daily_hours():
+    """Recompute every daily_hours row from completed orders"""
+    
+    with app.app_context():
+        print("Rebuilding daily_hours rollup...")
+        count = DailyHours.rebuild()
+        print(f"Daily hours rollup rebuilt: {count} rows")
+
+if __name__ == "__main__":
+    rebuild_daily_hours()
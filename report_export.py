@@ -0,0 +1,144 @@
+"""
+Report Export Module
+Streams report rows into CSV, JSON Lines or XLSX downloads.
+
+An export is one or more sheets, each a (name, columns, rows) triple where
+rows is any iterable of tuples (typically a generator over
+app.partitioned_order_rows). The writers consume it row by row:
+
+- csv_chunks / jsonl_chunks yield the file a few hundred rows at a time, so
+  a streamed HTTP response starts before the query has finished.
+- xlsx_file writes a workbook with xlsxwriter in constant_memory mode (each
+  row is flushed to disk as soon as the next one starts) into an anonymous
+  temporary file. An XLSX is a zip archive, so it can only be sent once it
+  is complete, but memory stays flat whatever the range.
+
+write_export writes any of the formats to a file instead (background export jobs).
+"""
+import csv
+import io
+import json
+import tempfile
+from collections import namedtuple
+from datetime import date, datetime
+
+import xlsxwriter
+
+EXPORT_CHUNK_ROWS = 500  # Rows per chunk yielded to the response
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Export format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'excel': (XLSX_MIMETYPE, 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+XLSX_OPTIONS = {
+    'constant_memory': True,
+    'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    'strings_to_formulas': False,  # Notes like "=SUM(...)" stay text
+    'strings_to_urls': False,
+}
+
+
+class ExportColumn(namedtuple('ExportColumn', ('key', 'title', 'width', 'num_format'))):
+    """One export column: JSON key, header title, XLSX width and optional XLSX number format"""
+    __slots__ = ()
+
+    def __new__(cls, key, title, width=12, num_format=None):
+        return super().__new__(cls, key, title, width, num_format)
+
+
+def csv_value(value):
+    """Cell text for CSV: blank for None, ISO dates, str(datetime) like pandas wrote them"""
+    if value is None:
+        return ''
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def json_value(value):
+    """json.dumps fallback for dates and datetimes"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Cannot export {type(value).__name__} values')
+
+
+def csv_chunks(columns, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a CSV file (header first) as text chunks of up to chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.title for column in columns])
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow([csv_value(value) for value in row])
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(columns, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield one JSON object per row, keyed by column key, as text chunks of up to chunk_rows lines"""
+    keys = [column.key for column in columns]
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(keys, row)), default=json_value) + '\n')
+        if len(lines) == chunk_rows:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+def write_xlsx(output, sheets):
+    """Write sheets [(name, columns, rows)] as a constant-memory workbook to output (a path or binary file).
+
+    Worksheets appear in the order given and are filled in that order, so a
+    sheet's rows may be a generator that reads totals accumulated while an
+    earlier sheet was written.
+    """
+    workbook = xlsxwriter.Workbook(output, XLSX_OPTIONS)
+    header_format = workbook.add_format({'bold': True})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    worksheets = [workbook.add_worksheet(name) for name, _, _ in sheets]
+
+    for worksheet, (_, columns, rows) in zip(worksheets, sheets):
+        for index, column in enumerate(columns):
+            column_format = workbook.add_format({'num_format': column.num_format}) if column.num_format else None
+            worksheet.set_column(index, index, column.width, column_format)
+            worksheet.write_string(0, index, column.title, header_format)
+
+        for row_number, row in enumerate(rows, 1):
+            for index, value in enumerate(row):
+                if value is None:
+                    continue
+                if isinstance(value, date) and not isinstance(value, datetime):
+                    worksheet.write_datetime(row_number, index, datetime.combine(value, datetime.min.time()), date_format)
+                else:
+                    worksheet.write(row_number, index, value)
+
+    workbook.close()
+
+
+def xlsx_file(sheets):
+    """write_xlsx into an anonymous temporary file, returned rewound; it is deleted when closed"""
+    output = tempfile.TemporaryFile()
+    write_xlsx(output, sheets)
+    output.seek(0)
+    return output
+
+
+def write_export(path, export_format, sheets):
+    """Write an export to path: every sheet for XLSX, the first sheet for CSV/JSONL"""
+    if export_format == 'excel':
+        write_xlsx(path, sheets)
+        return
+
+    _, columns, rows = sheets[0]
+    chunks = csv_chunks(columns, rows) if export_format == 'csv' else jsonl_chunks(columns, rows)
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        output.writelines(chunks)
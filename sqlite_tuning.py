@@ -0,0 +1,74 @@
+"""
+SQLite Storage Tuning Module
+Applies connection pragmas (WAL, busy timeout, cache and mmap sizes) to every
+SQLite connection opened by a SQLAlchemy engine.
+
+Each pragma can be overridden with an environment variable, e.g.
+SQLITE_JOURNAL_MODE=DELETE restores the default rollback journal.
+"""
+import os
+from sqlalchemy import event
+
+# Pragma name -> (environment variable, default value)
+SQLITE_PRAGMA_DEFAULTS = {
+    'journal_mode': ('SQLITE_JOURNAL_MODE', 'WAL'),         # Readers no longer block behind writers
+    'synchronous': ('SQLITE_SYNCHRONOUS', 'NORMAL'),        # Safe with WAL, far fewer fsyncs than FULL
+    'busy_timeout': ('SQLITE_BUSY_TIMEOUT', '5000'),        # Milliseconds to wait on a lock before "database is locked"
+    'cache_size': ('SQLITE_CACHE_SIZE', '-65536'),          # Negative values are KiB, so 64 MB of page cache
+    'mmap_size': ('SQLITE_MMAP_SIZE', '268435456'),         # Memory-map up to 256 MB of the database file
+    'temp_store': ('SQLITE_TEMP_STORE', 'MEMORY'),          # Keep temp B-trees (GROUP BY/ORDER BY) in memory
+}
+
+# Order matters: busy_timeout must be set before switching journal mode,
+# which itself needs a lock on the database
+PRAGMA_ORDER = ['busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store']
+
+
+def load_sqlite_pragmas(environ=None):
+    """Read the pragma settings from the environment, falling back to the defaults"""
+    environ = os.environ if environ is None else environ
+    pragmas = {}
+
+    for pragma, (env_var, default) in SQLITE_PRAGMA_DEFAULTS.items():
+        value = environ.get(env_var, default)
+        # An empty value leaves SQLite's own default in place
+        if value is not None and str(value).strip() != '':
+            pragmas[pragma] = str(value).strip()
+
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """Run the PRAGMA statements on a raw sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in PRAGMA_ORDER:
+            if pragma in pragmas:
+                cursor.execute(f"PRAGMA {pragma}={pragmas[pragma]}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_tuning(engine, pragmas=None):
+    """Apply the pragmas to every new connection of a SQLite engine.
+
+    Does nothing for other database backends. Returns the pragmas in effect.
+    """
+    if engine.dialect.name != 'sqlite':
+        return {}
+
+    pragmas = load_sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    return pragmas
+
+
+def read_sqlite_pragmas(connection):
+    """Report the pragma values actually in effect on a SQLAlchemy connection"""
+    return {
+        pragma: connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+        for pragma in PRAGMA_ORDER
+    }
@@ -3,7 +3,9 @@
 Test the admin settings functionality
 """
 
-from app import app, db, AppSetting
+from sqlalchemy import event
+
+from app import app, db, AppSetting, AppSettingVersion
 
 def test_admin_settings():
     """Test the admin settings functionality that was causing errors"""
@@ -25,5 +27,45 @@ def test_admin_settings():
         
         print("✅ Admin settings functionality test passed!")
 
+def test_settings_cache():
+    """Settings load in one query per request and follow writes made by other processes"""
+    
+    # Each request gets its own app context (and g), as it does when served
+    with app.app_context():
+        original = AppSetting.get('company_name')
+        AppSetting.set('company_name', 'Cache Test Co')
+        AppSetting.get_all()  # reload after the write
+    
+    statements = []
+    
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    with app.test_request_context('/'):
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            settings = AppSetting.get_all()
+            AppSetting.get_all_by_section('general')
+            AppSetting.get('company_name')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+    
+    print(f"Statements for a warm request: {len(statements)}")
+    assert settings['company_name'] == 'Cache Test Co'
+    assert len(statements) == 1  # just the version check
+    
+    # Simulate another process changing a setting: new value plus a version bump
+    with app.app_context():
+        AppSetting.query.filter_by(key='company_name').update({AppSetting.value: 'Changed Elsewhere'})
+        AppSettingVersion.bump()
+        db.session.commit()
+    
+    with app.test_request_context('/'):
+        assert AppSetting.get('company_name') == 'Changed Elsewhere'
+        AppSetting.set('company_name', original)
+    
+    print("✅ Settings cache test passed!")
+
 if __name__ == "__main__":
-    test_admin_settings() 
\ No newline at end of file
+    test_admin_settings()
+    test_settings_cache() 
\ No newline at end of file
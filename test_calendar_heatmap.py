@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the cached calendar heatmap: the payload lists only days with time,
+order writes update the cached heatmap in place, and rolled back writes
+leave it alone.
+"""
+
+from datetime import date, datetime, timedelta
+
+from app import app, db, Order, DailyHours, after_order_write, before_order_write, heatmap_cache_stats
+
+
+def day_hours(payload):
+    start = date.fromisoformat(payload['start_date'])
+    return {start + timedelta(days=offset): hours for offset, hours in zip(payload['days'], payload['hours'])}
+
+
+def add_order(start, hours):
+    order = Order(employee_name='Heatmap Tester', entry_type='service_order', order_number='HM-1',
+                  start_time=start, end_time=start + timedelta(hours=hours))
+    db.session.add(order)
+    after_order_write(order)
+    db.session.commit()
+    return order.id
+
+
+def test_heatmap_updates_in_place(client):
+    """Sparse days and thresholds; later writes are folded into the cached array without a rebuild"""
+    today = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=8)
+    ten_days_ago = today - timedelta(days=10)
+    before = day_hours(client.get('/api/calendar-heatmap').get_json())
+
+    with app.app_context():
+        order_id = add_order(ten_days_ago, 3)
+    try:
+        payload = client.get('/api/calendar-heatmap').get_json()
+        assert payload['thresholds'] == [2, 4, 6]
+        assert payload['end_date'] == date.today().isoformat()
+        assert len(payload['days']) == len(payload['hours']) < 366
+        assert day_hours(payload).get(ten_days_ago.date(), 0) - before.get(ten_days_ago.date(), 0) == 3.0
+
+        misses = heatmap_cache_stats['misses']
+        with app.app_context():
+            order = db.session.get(Order, order_id)
+            before_order_write(order)
+            order.end_time = order.start_time + timedelta(hours=5)
+            after_order_write(order)
+            db.session.commit()
+            add_order(today, 1.5)
+
+            # Rolled back changes are never applied
+            order = db.session.get(Order, order_id)
+            before_order_write(order)
+            order.end_time = order.start_time + timedelta(hours=1)
+            after_order_write(order)
+            db.session.rollback()
+
+        hours = day_hours(client.get('/api/calendar-heatmap').get_json())
+        assert heatmap_cache_stats['misses'] == misses
+        assert hours.get(ten_days_ago.date(), 0) - before.get(ten_days_ago.date(), 0) == 5.0
+        assert hours.get(today.date(), 0) - before.get(today.date(), 0) == 1.5
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Heatmap Tester').delete()
+            DailyHours.query.filter_by(employee_name='Heatmap Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the daily_hours rollup writes: a rollup row inserted by a concurrent
+writer between our UPDATE and INSERT is added to and the order write
+still commits with its heatmap changes; releasing that savepoint is not
+taken for a commit.
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from app import app, db, Order, DailyHours, Employee, after_order_write, before_order_write, heatmap_cache_stats
+
+
+def add_order(start, hours):
+    order = Order(employee_name='Rollup Tester', entry_type='service_order', order_number='DH-1',
+                  start_time=start, end_time=start + timedelta(hours=hours))
+    db.session.add(order)
+    after_order_write(order)
+    return order
+
+
+def heatmap_hours(client):
+    """{day: hours} of the calendar heatmap"""
+    payload = client.get('/api/calendar-heatmap').get_json()
+    start = date.fromisoformat(payload['start_date'])
+    return {start + timedelta(days=offset): hours for offset, hours in zip(payload['days'], payload['hours'])}
+
+
+def test_concurrent_rollup_insert(client):
+    """The INSERT of a missing rollup row falls back to an UPDATE when another writer got there first,
+    and the heatmap changes queued before that savepoint still apply on commit"""
+    start = datetime.combine(date.today() - timedelta(days=5), datetime.min.time()) + timedelta(hours=8)
+    earlier = start - timedelta(days=1)
+
+    with app.app_context():
+        # Creates the employee and the earlier day's row, so the only savepoint below is the new day's rollup row
+        edited = add_order(earlier, 1)
+        add_order(earlier, 1)
+        db.session.commit()
+        edited_id = edited.id
+
+    before = heatmap_hours(client)
+    misses = heatmap_cache_stats['misses']
+
+    with app.app_context():
+        def concurrent_insert(conn, cursor, statement, parameters, context, executemany):
+            # Another writer commits the same rollup key just before our savepoint
+            if statement.startswith('SAVEPOINT') and not raced:
+                raced.append(statement)
+                conn.execute(DailyHours.__table__.insert().values(
+                    employee_name='Rollup Tester', day=start.date(), entry_type='service_order', category='',
+                    seconds=1800, order_count=1))
+
+        raced = []
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', concurrent_insert)
+        try:
+            # Queue a -1h/+2h heatmap change on the earlier day, then hit the race on the new day
+            order = db.session.get(Order, edited_id)
+            before_order_write(order)
+            order.end_time = order.start_time + timedelta(hours=2)
+            after_order_write(order)
+            add_order(start, 2)
+            db.session.commit()
+        finally:
+            event.remove(engine, 'before_cursor_execute', concurrent_insert)
+
+        try:
+            assert raced
+            row = DailyHours.query.filter_by(employee_name='Rollup Tester', day=start.date()).one()
+            assert (row.seconds, row.order_count) == (1800 + 7200, 2)
+            assert Order.query.filter_by(employee_name='Rollup Tester').count() == 3
+
+            # Applied in place: the earlier day's edit survived the rolled back savepoint
+            after = heatmap_hours(client)
+            assert heatmap_cache_stats['misses'] == misses
+            assert after.get(earlier.date(), 0) - before.get(earlier.date(), 0) == 1.0
+            assert after.get(start.date(), 0) - before.get(start.date(), 0) == 2.0
+        finally:
+            for model in (Order, DailyHours):
+                model.query.filter(model.employee_name == 'Rollup Tester').delete()
+            Employee.query.filter_by(name='Rollup Tester').delete()
+            db.session.commit()
+
+
+def test_savepoint_release_is_not_a_commit():
+    """Changes queued in a transaction are only applied by its real commit, never by a savepoint release"""
+    with app.app_context():
+        writes = heatmap_cache_stats['writes']
+        add_order(datetime(2001, 8, 13, 8), 1)
+        add_order(datetime(2001, 8, 14, 8), 1)  # New rollup row: a savepoint after the first order's changes were queued
+        assert heatmap_cache_stats['writes'] == writes
+        db.session.rollback()
+        assert heatmap_cache_stats['writes'] == writes
+        assert Employee.query.filter_by(name='Rollup Tester').first() is None
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
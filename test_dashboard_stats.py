@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the dashboard stats API: every window (and its per entry type
+breakdown) comes from one query against the daily rollup.
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from app import app, db, Order, DailyHours, after_order_write
+
+
+def get_stats(client, path):
+    """(stats JSON, number of SELECTs against daily_hours) for one request"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'daily_hours' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+def test_dashboard_stats_single_query(client):
+    """Today/yesterday/week/month windows and breakdowns add up from a single rollup query"""
+    before, _ = get_stats(client, '/api/dashboard-stats?months=1')
+    today = datetime.combine(date.today(), datetime.min.time())
+    entries = [(today, 2, 'service_order'), (today, 1, 'other_time'), (today - timedelta(days=1), 4, 'service_order'),
+               (today - timedelta(days=7), 3, 'service_order'), (today - timedelta(days=40), 5, 'other_time')]
+    with app.app_context():
+        for start, hours, entry_type in entries:
+            order = Order(employee_name='Stats Tester', entry_type=entry_type, start_time=start + timedelta(hours=8),
+                          end_time=start + timedelta(hours=8 + hours),
+                          order_number='ST-1' if entry_type == 'service_order' else None,
+                          category='Meeting' if entry_type == 'other_time' else None)
+            db.session.add(order)
+            after_order_write(order)
+        db.session.commit()
+
+    try:
+        stats, queries = get_stats(client, '/api/dashboard-stats?months=1')
+        assert queries == 1
+        assert round(stats['todayHours'] - before['todayHours'], 1) == 3.0
+        assert round(stats['yesterdayHours'] - before['yesterdayHours'], 1) == 4.0
+        assert round(stats['prevWeekHours'] + stats['weekHours'] - before['prevWeekHours'] - before['weekHours'], 1) == 10.0
+        assert round(stats['breakdown']['today'].get('other_time', 0)
+                     - before['breakdown']['today'].get('other_time', 0), 1) == 1.0
+        assert set(stats['trends']) == {'today', 'week', 'month'}
+        assert stats['monthHours'] + stats['prevMonthHours'] >= 7.0
+
+        plain, _ = get_stats(client, '/api/dashboard-stats')
+        assert 'monthHours' not in plain and set(plain['trends']) == {'today', 'week'}
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Stats Tester').delete()
+            DailyHours.query.filter_by(employee_name='Stats Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
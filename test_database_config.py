@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Check the database backend configuration and the PostgreSQL SQL the app emits.
+
+Compiles against the PostgreSQL dialect, so no PostgreSQL server is needed;
+run_tests_postgres.sh runs the whole suite against a real one.
+"""
+
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from database_config import get_database_url, is_sqlite_url, libpq_url, day_expression, week_expression
+from app import Order
+
+
+def test_database_url_from_environment():
+    """DATABASE_URL wins, postgres:// is normalized, and SQLite is the fallback"""
+    assert get_database_url('/srv/app', {}) == 'sqlite:////srv/app/time_tracker.db'
+    assert get_database_url('/srv/app', {'DATABASE_URL': 'postgres://u:p@db:5432/tt'}) == \
+        'postgresql+psycopg2://u:p@db:5432/tt'
+    assert get_database_url('/srv/app', {'DATABASE_URL': 'postgresql+psycopg://u:p@db/tt'}) == \
+        'postgresql+psycopg://u:p@db/tt'
+    assert is_sqlite_url(get_database_url('/srv/app', {}))
+    assert not is_sqlite_url('postgresql+psycopg2://u:p@db/tt')
+    assert libpq_url('postgresql+psycopg2://u:p@db/tt') == 'postgresql://u:p@db/tt'
+
+
+def test_postgresql_day_grouping():
+    """Day grouping uses date_trunc and renders identically in SELECT and GROUP BY"""
+    day = day_expression(Order.start_time, 'postgresql')
+    sql = str(select(day, Order.employee_name).group_by(day, Order.employee_name)
+              .compile(dialect=postgresql.dialect()))
+
+    expression = "CAST(date_trunc('day', \"order\".start_time) AS DATE)"
+    assert sql.count(expression) == 2
+
+
+def test_week_grouping():
+    """Weeks start on Monday on SQLite, matching date_trunc('week') on PostgreSQL"""
+    sql = str(select(week_expression(Order.start_time, 'postgresql')).compile(dialect=postgresql.dialect()))
+    assert "CAST(date_trunc('week', \"order\".start_time) AS DATE)" in sql
+
+    with create_engine('sqlite://').connect() as connection:
+        for day, monday in [('2025-03-02', '2025-02-24'), ('2025-03-03', '2025-03-03'), ('2025-03-09', '2025-03-03')]:
+            assert connection.scalar(select(week_expression(literal(day), 'sqlite'))) == monday
+
+
+def test_postgresql_partial_indexes():
+    """The active/completed order indexes stay partial on PostgreSQL"""
+    indexes = {index.name: index for index in Order.__table__.indexes}
+
+    active = str(CreateIndex(indexes['ix_order_active_start']).compile(dialect=postgresql.dialect()))
+    completed = str(CreateIndex(indexes['ix_order_completed_end']).compile(dialect=postgresql.dialect()))
+
+    assert 'WHERE end_time IS NULL' in active
+    assert 'WHERE end_time IS NOT NULL' in completed
+
+
+if __name__ == "__main__":
+    test_database_url_from_environment()
+    test_postgresql_day_grouping()
+    test_week_grouping()
+    test_postgresql_partial_indexes()
+    print("✅ PostgreSQL configuration checks passed!")
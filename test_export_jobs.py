@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test background export jobs: identical in-flight requests share a job,
+failures are reported, finished files expire, and the API runs an export
+end to end (queue, poll, download).
+"""
+
+import io
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from openpyxl import load_workbook
+
+import app as app_module
+from app import app, db, Order
+from export_jobs import ExportJobQueue
+
+
+def wait_for(job, timeout=10):
+    deadline = time.time() + timeout
+    while job.in_flight and time.time() < deadline:
+        time.sleep(0.02)
+    return job.status
+
+
+def test_queue_dedupe_failure_and_retention(tmp_path):
+    """Same key while running -> same job; errors mark the job failed; expired files are deleted"""
+    queue = ExportJobQueue(str(tmp_path), workers=1, retention=3600)
+    release = threading.Event()
+
+    def slow_build(job, path):
+        release.wait(5)
+        with open(path, 'w') as output:
+            output.write('done')
+        job.progress(1)
+        return 'slow.csv'
+
+    def failing_build(job, path):
+        raise RuntimeError('no data')
+
+    first, created = queue.submit('key', 1, 'csv', 'text/csv', slow_build)
+    second, created_again = queue.submit('key', 1, 'csv', 'text/csv', slow_build)
+    assert created and not created_again and second is first
+
+    failed, _ = queue.submit('other', 1, 'csv', 'text/csv', failing_build)
+    release.set()
+    assert wait_for(first) == 'done' and first.filename == 'slow.csv' and first.rows == 1
+    assert open(first.path).read() == 'done'
+    assert wait_for(failed) == 'failed' and failed.error == 'no data'
+
+    # Once finished, the same key starts a fresh job
+    third, created = queue.submit('key', 1, 'csv', 'text/csv', slow_build)
+    assert created and third is not first
+    wait_for(third)
+
+    queue.retention = 0
+    time.sleep(0.01)
+    assert queue.cleanup() == 3
+    assert not os.listdir(tmp_path) and queue.get(first.id) is None
+
+
+def test_export_job_api(client, monkeypatch, tmp_path):
+    """A queued Excel export can be polled and downloaded once done"""
+    monkeypatch.setattr(app_module.export_jobs, 'directory', str(tmp_path))
+
+    base = datetime(2005, 4, 4, 9)
+    with app.app_context():
+        db.session.execute(Order.__table__.insert(), [{
+            'order_number': f'JOB-{i}', 'employee_name': 'Job Tester', 'entry_type': 'service_order',
+            'start_time': base + timedelta(hours=i), 'end_time': base + timedelta(hours=i, minutes=45),
+            'duration_seconds': 2700, 'created_at': base
+        } for i in range(3)])
+        db.session.commit()
+
+    try:
+        response = client.post('/api/exports', data={'kind': 'weekly_report', 'start_date': '2005-04-04',
+                                                     'end_date': '2005-04-10', 'employee': 'Job Tester'})
+        assert response.status_code in (200, 202)
+        job = response.get_json()
+
+        deadline = time.time() + 10
+        while job['status'] in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.05)
+            job = client.get(job['status_url']).get_json()
+        assert job['status'] == 'done' and job['rows'] == 5  # Summary: one day + TOTAL; Details: three orders
+        assert job['filename'] == 'timetracker_report_20050404-20050410_Job Tester.xlsx'
+
+        download = client.get(job['download_url'])
+        workbook = load_workbook(io.BytesIO(download.data))
+        assert [row[3] for row in workbook['Details'].iter_rows(min_row=2, values_only=True)] == ['JOB-0', 'JOB-1', 'JOB-2']
+
+        assert client.post('/api/exports', data={'kind': 'nope'}).status_code == 400
+        assert client.get('/api/exports/missing').status_code == 404
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Job Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the labor collection import: CSV/XLSX parsing with per-row errors, and
+the batched endpoint keeping the daily_hours rollup in step and skipping
+rows that were already imported.
+"""
+
+import io
+import json
+from datetime import datetime
+
+from openpyxl import Workbook
+
+from app import app, db, Order, DailyHours, Employee
+from labor_import import iter_labor_entries
+
+REPORT = """Labor Collection Report
+Dear Pat Importer,
+Order Number,Labor Type,Start Time,End Time,Hours
+SO24-02365-21800,RegularTime,6/6/2025 10:23:00 AM,6/6/2025 2:33:00 PM,4 Hours 10 Minutes
+SO24-02365-21801,Overtime,6/6/2025 3:00:00 PM,,1 Hours 30 Minutes
+SO24-02365-21802,RegularTime,not a date,6/7/2025 9:00:00 AM,1 Hours 0 Minutes
+,RegularTime,6/7/2025 8:00:00 AM,6/7/2025 9:00:00 AM,1 Hours 0 Minutes
+SO24-02365-21803,RegularTime,6/7/2025 8:00:00 AM,6/7/2025 9:00:00 AM,1 Hours 0 Minutes
+
+,,,Total Hours,6 Hours 40 Minutes
+"""
+
+
+def test_parse_csv_and_xlsx():
+    """Both formats yield the same entries, with readable errors for bad rows"""
+    csv_rows = list(iter_labor_entries(io.BytesIO(REPORT.encode()), 'csv'))
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Order Number', 'Labor Type', 'Start Time', 'End Time', 'Hours', 'Employee'])
+    sheet.append(['SO24-02365-21800', 'RegularTime', datetime(2025, 6, 6, 10, 23), datetime(2025, 6, 6, 14, 33),
+                  '4 Hours 10 Minutes', 'Pat Importer'])
+    sheet.append(['SO24-02365-21801', 'Overtime', datetime(2025, 6, 6, 15), None, 1.5, 'Pat Importer'])
+    output = io.BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    xlsx_rows = list(iter_labor_entries(output, 'xlsx'))
+
+    entries = [entry for _, entry, _ in csv_rows if entry]
+    errors = [(line, error) for line, _, error in csv_rows if error]
+    print(f"CSV: {len(entries)} entries, errors: {errors}")
+
+    assert [entry['order_number'] for entry in entries] == ['SO24-02365-21800', 'SO24-02365-21801', 'SO24-02365-21803']
+    assert all(entry['employee_name'] == 'Pat Importer' for entry in entries)
+    assert entries[0]['end_time'] == datetime(2025, 6, 6, 14, 33)
+    assert entries[1]['end_time'] == datetime(2025, 6, 6, 16, 30)  # From the hours column
+    assert errors == [(6, 'Invalid start time: not a date'), (7, 'Missing order number')]
+
+    assert [entry for _, entry, _ in xlsx_rows] == entries[:2]
+
+
+def test_import_endpoint(client):
+    """Imports in batches, updates the rollup like a rebuild would, and skips re-imported rows"""
+    def upload():
+        response = client.post('/api/import/labor', data={
+            'report_file': (io.BytesIO(REPORT.encode()), 'labor.csv')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert lines[-1]['status'] == 'done'
+        return lines[-1]
+
+    try:
+        first = upload()
+        print(f"First import: {first}")
+        assert (first['imported'], first['duplicates'], first['failed']) == (3, 0, 2)
+        assert [error['line'] for error in first['errors']] == [6, 7]
+
+        with app.app_context():
+            rollup = DailyHours.query.filter_by(employee_name='Pat Importer').order_by(DailyHours.day).all()
+            assert [(row.day.isoformat(), row.seconds, row.order_count) for row in rollup] == [
+                ('2025-06-06', 4 * 3600 + 600 + 5400, 2), ('2025-06-07', 3600, 1)
+            ]
+
+        second = upload()
+        assert (second['imported'], second['duplicates']) == (0, 3)
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Pat Importer').delete()
+            DailyHours.query.filter_by(employee_name='Pat Importer').delete()
+            Employee.query.filter_by(name='Pat Importer').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
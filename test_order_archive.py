@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test the order archive: archived orders stay in the daily rollup when it is
+rebuilt, follow their employee when it is relinked to a user, and keep ids
+that new orders never reuse.
+"""
+
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from app import app, db, Order, ArchivedOrder, DailyHours, Employee, User, AppSetting, AppSettingVersion, \
+    after_order_write, archive_completed_orders
+from migrate_database import ensure_order_autoincrement
+
+
+def rollup_totals(employee_name):
+    """{day: (seconds, order_count)} of an employee's rollup rows"""
+    rows = db.session.query(DailyHours.day, db.func.sum(DailyHours.seconds), db.func.sum(DailyHours.order_count)) \
+        .filter(DailyHours.employee_name == employee_name).group_by(DailyHours.day)
+    return {day: (seconds, count) for day, seconds, count in rows}
+
+
+def test_rebuild_and_relink_include_archive():
+    """A rebuild after archiving gives the same rollup; relinking updates archived orders too"""
+    old = datetime(2000, 6, 5, 8)
+    recent = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=8)
+
+    with app.app_context():
+        original_cutoff = AppSetting.get('archive_cutoff')
+        for start, hours in [(old, 2), (old, 1.5), (old + timedelta(days=1), 3), (recent, 1)]:
+            order = Order(employee_name='Archive Tester', entry_type='service_order', order_number='AR-1',
+                          start_time=start, end_time=start + timedelta(hours=hours))
+            db.session.add(order)
+            after_order_write(order)
+        db.session.commit()
+
+        try:
+            before = rollup_totals('Archive Tester')
+            assert archive_completed_orders(30) >= 3
+            assert ArchivedOrder.query.filter_by(employee_name='Archive Tester').count() == 3
+
+            DailyHours.rebuild()
+            assert rollup_totals('Archive Tester') == before
+            assert before[old.date()] == (12600, 2)
+
+            user = User(username='archiver', email='archiver@example.com', first_name='Archive', last_name='Tester')
+            user.set_password('archiver')
+            db.session.add(user)
+            db.session.flush()
+            Employee.relink()
+            db.session.commit()
+            for model in (Order, ArchivedOrder, DailyHours):
+                assert {user_id for (user_id,) in db.session.query(model.user_id).filter(
+                    model.employee_name == 'Archive Tester')} == {user.id}
+        finally:
+            for model in (Order, ArchivedOrder, DailyHours, Employee):
+                name_column = model.name if model is Employee else model.employee_name
+                model.query.filter(name_column == 'Archive Tester').delete()
+            User.query.filter_by(username='archiver').delete()
+            restore_cutoff(original_cutoff)
+            db.session.commit()
+
+
+def restore_cutoff(original_cutoff):
+    if original_cutoff is None:
+        AppSetting.query.filter_by(key='archive_cutoff').delete()
+        AppSettingVersion.bump()
+    else:
+        AppSetting.set('archive_cutoff', original_cutoff, section='backup')
+
+
+def test_archived_ids_are_not_reused():
+    """Archiving the newest orders doesn't free their ids, so a second archive run can't collide"""
+    old = datetime(2000, 7, 3, 8)
+
+    def add_old_order(number):
+        order = Order(employee_name='Reuse Tester', entry_type='service_order', order_number=number,
+                      start_time=old, end_time=old + timedelta(hours=1))
+        db.session.add(order)
+        after_order_write(order)
+        db.session.commit()
+        return order.id
+
+    with app.app_context():
+        original_cutoff = AppSetting.get('archive_cutoff')
+        try:
+            archived_id = add_old_order('RE-1')
+            archive_completed_orders(30)
+            assert db.session.get(Order, archived_id) is None
+
+            reused_id = add_old_order('RE-2')
+            assert reused_id > archived_id
+            archive_completed_orders(30)
+            assert ArchivedOrder.query.filter_by(employee_name='Reuse Tester').count() == 2
+        finally:
+            for model in (Order, ArchivedOrder, DailyHours):
+                model.query.filter(model.employee_name == 'Reuse Tester').delete()
+            Employee.query.filter_by(name='Reuse Tester').delete()
+            restore_cutoff(original_cutoff)
+            db.session.commit()
+
+
+def test_migration_adds_autoincrement(tmp_path):
+    """Existing order tables are rebuilt with AUTOINCREMENT, keeping rows, indexes and triggers,
+    and new ids start past the archive's"""
+    connection = sqlite3.connect(tmp_path / 'old.db')
+    connection.executescript("""
+        CREATE TABLE user (id INTEGER PRIMARY KEY);
+        CREATE TABLE "order" (id INTEGER NOT NULL, employee_name VARCHAR(100) NOT NULL,
+                              entry_type VARCHAR(20) DEFAULT 'service_order', user_id INTEGER,
+                              PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id));
+        CREATE INDEX ix_order_employee ON "order" (employee_name);
+        CREATE TABLE order_archive (id INTEGER PRIMARY KEY, employee_name VARCHAR(100));
+        INSERT INTO "order" (id, employee_name) VALUES (1, 'Ann'), (2, 'Bob');
+        INSERT INTO order_archive VALUES (3, 'Cid'), (4, 'Dee');
+        CREATE TABLE order_log (id INTEGER);
+        CREATE TRIGGER order_logged AFTER INSERT ON "order" BEGIN INSERT INTO order_log VALUES (new.id); END;
+    """)
+    cursor = connection.cursor()
+    assert ensure_order_autoincrement(cursor) is True
+    assert ensure_order_autoincrement(cursor) is False
+
+    cursor.execute('INSERT INTO "order" (employee_name) VALUES (\'Eve\')')
+    assert cursor.lastrowid == 5
+    assert cursor.execute('SELECT id, employee_name, entry_type FROM "order" ORDER BY id').fetchall() == [
+        (1, 'Ann', 'service_order'), (2, 'Bob', 'service_order'), (5, 'Eve', 'service_order')]
+    assert cursor.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'order' AND type != 'table' "
+                          "ORDER BY name").fetchall() == [('ix_order_employee',), ('order_logged',)]
+    assert cursor.execute('SELECT id FROM order_log').fetchall() == [(5,)]
+    assert cursor.execute("PRAGMA foreign_key_list('order')").fetchone()[2:5] == ('user', 'user_id', 'id')
+    connection.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
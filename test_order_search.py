@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the full-text order search: prefix matching on order numbers, ranking,
+date filters and trigger sync on insert/update/delete.
+
+Runs against an in-memory SQLite database built from the app's models, except
+for the restore test, which restores a backup without search indexes into the
+test database.
+"""
+
+import sqlite3
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import app, db, Order, backup_database, restore_database
+from order_search import install_search_index, search_order_ids, build_match_query, fts_table
+
+
+def add_order(connection, order_id, order_number, employee, notes, start):
+    connection.execute(text(
+        'INSERT INTO "order" (id, order_number, employee_name, entry_type, category, notes, start_time, created_at) '
+        "VALUES (:id, :order_number, :employee, 'service_order', '', :notes, :start, :start)"
+    ), {'id': order_id, 'order_number': order_number, 'employee': employee, 'notes': notes, 'start': start})
+
+
+def test_build_match_query():
+    """Words become prefix phrases split like the FTS tokenizer splits them"""
+    assert build_match_query('SO24-023', 'sqlite') == '"SO24 023"*'
+    assert build_match_query('pump "greg', 'sqlite') == '"pump"* "greg"*'
+    assert build_match_query('SO24-023 pump', 'postgresql') == 'SO24-023:* & pump:*'
+    assert build_match_query(' -- ', 'sqlite') is None
+
+
+def test_order_search():
+    """Search finds prefixes, ranks order numbers first, filters dates and follows writes"""
+    engine = create_engine('sqlite://')
+
+    with app.app_context():
+        db.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        add_order(connection, 1, 'SO24-0231', 'Greg Clark', 'Replaced pump seal', datetime(2024, 5, 1, 8))
+        add_order(connection, 2, 'SO24-0232', 'John Smith', None, datetime(2024, 6, 1, 8))
+        add_order(connection, 3, 'SO24-0999', 'Sarah Johnson', 'Follow-up on SO24-0231 pump', datetime(2024, 6, 2, 8))
+
+        # Rows inserted before the index existed are picked up by the initial rebuild
+        assert install_search_index(connection, 'order') is True
+        assert install_search_index(connection, 'order') is False
+
+        ids = [order_id for order_id, _ in search_order_ids(connection, 'order', 'SO24-023')]
+        print(f"SO24-023 -> {ids}")
+        assert set(ids) == {1, 2, 3}
+        assert ids[-1] == 3  # matched only in notes, so ranked last
+
+        june = search_order_ids(connection, 'order', 'SO24-023',
+                                start=datetime(2024, 6, 1), end=datetime(2024, 7, 1))
+        assert {order_id for order_id, _ in june} == {2, 3}
+
+        assert [order_id for order_id, _ in search_order_ids(connection, 'order', 'greg pump')] == [1]
+
+        # Triggers keep the index in sync with inserts, edits and deletes
+        add_order(connection, 4, 'SO25-0001', 'Greg Clark', 'Compressor install', datetime(2025, 1, 6, 8))
+        connection.execute(text('UPDATE "order" SET notes = \'Gearbox rebuild\' WHERE id = 1'))
+        connection.execute(text('DELETE FROM "order" WHERE id = 2'))
+
+        assert [order_id for order_id, _ in search_order_ids(connection, 'order', 'compress')] == [4]
+        assert [order_id for order_id, _ in search_order_ids(connection, 'order', 'gearbox')] == [1]
+        assert [order_id for order_id, _ in search_order_ids(connection, 'order', 'SO24-0232')] == []
+
+
+def test_restore_reinstalls_search_index(tmp_path):
+    """A restored backup from before full-text search gets its index and sync triggers back"""
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            pytest.skip('Restoring a pg_dump archive needs the PostgreSQL client tools')
+
+        db.session.add(Order(order_number='SO-RESTORE-1', employee_name='Restore Tester', entry_type='service_order',
+                             notes='restoredtoken', start_time=datetime(2007, 3, 5, 8)))
+        db.session.commit()
+        backup_path = str(tmp_path / 'backup.db')
+        backup_database(backup_path)
+
+        backup = sqlite3.connect(backup_path)
+        for table in ('order', 'order_archive'):
+            for trigger in ('insert', 'delete', 'update'):
+                backup.execute(f'DROP TRIGGER {fts_table(table)}_{trigger}')
+            backup.execute(f'DROP TABLE {fts_table(table)}')
+        backup.commit()
+        backup.close()
+
+        try:
+            restore_database(backup_path)
+            connection = db.session.connection()
+            restored_id = Order.query.filter_by(order_number='SO-RESTORE-1').one().id
+            assert [order_id for order_id, _ in search_order_ids(connection, 'order', 'restoredtoken')] == [restored_id]
+
+            # Orders written after the restore are indexed by the reinstalled triggers
+            order = Order(order_number='SO-RESTORE-2', employee_name='Restore Tester', entry_type='service_order',
+                          notes='afterrestore', start_time=datetime(2007, 3, 6, 8))
+            db.session.add(order)
+            db.session.commit()
+            assert [order_id for order_id, _ in search_order_ids(db.session.connection(), 'order', 'afterrestore')] \
+                == [order.id]
+        finally:
+            Order.query.filter_by(employee_name='Restore Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the analytics snapshot: incremental refresh from reported writes,
+dense (bincount) and sparse (reduceat) group-bys, the /api/pivot endpoint,
+and report routes giving the same answers from the snapshot as from the rollup.
+"""
+
+from datetime import date, datetime, timedelta
+
+import app as app_module
+from app import (app, db, Order, after_order_write, before_order_write, order_snapshot,
+                 employee_productivity_data, time_trends_data)
+from order_snapshot import OrderSnapshot, EPOCH
+
+
+def epoch(moment):
+    return int((moment - datetime.combine(EPOCH, datetime.min.time())).total_seconds())
+
+
+def test_incremental_refresh_and_group_paths(monkeypatch):
+    """Only changed and newer rows are re-read; both grouping paths agree"""
+    base = datetime(2003, 1, 6, 9)
+    rows = {i: (i, 'Ann' if i % 2 else 'Bob', None, 'service_order', None,
+                epoch(base + timedelta(days=i)), epoch(base + timedelta(days=i, hours=1)), 3600) for i in range(1, 11)}
+    fetches = []
+
+    def fetch(ids, after_id):
+        fetches.append((ids, after_id))
+        if ids is None and after_id is None:
+            return list(rows.values())
+        return [row for order_id, row in rows.items() if order_id in ids or order_id > after_id]
+
+    snapshot = OrderSnapshot(fetch)
+    result = snapshot.pivot(('employee',))
+    assert dict(zip(result.keys[0], result.seconds.tolist())) == {'Ann': 5 * 3600, 'Bob': 5 * 3600}
+
+    # Edit order 2 and delete order 4, add order 11: one small fetch, starts stay sorted
+    rows[2] = rows[2][:7] + (7200,)
+    del rows[4]
+    rows[11] = (11, 'Cid', None, 'other_time', 'Meeting', epoch(base - timedelta(days=1)), epoch(base), 1800)
+    snapshot.invalidate({2, 4})
+    result = snapshot.pivot(('employee',))
+    assert fetches[-1] == ({2, 4}, 10)
+    assert dict(zip(result.keys[0], result.seconds.tolist())) == {'Ann': 5 * 3600, 'Bob': 4 * 3600 + 3600, 'Cid': 1800}
+    assert (snapshot.arrays.start[:-1] <= snapshot.arrays.start[1:]).all()
+
+    weekly = snapshot.pivot(('week', 'entry_type'), start_day=date(2003, 1, 1), end_day=date(2003, 1, 13))
+    assert weekly.keys == [[date(2002, 12, 30), date(2003, 1, 6)], ['other_time', 'service_order']]
+    assert weekly.counts.tolist() == [1, 5]
+
+    monkeypatch.setattr('order_snapshot.DENSE_GROUP_LIMIT', 0)
+    sparse = snapshot.pivot(('week', 'entry_type'), start_day=date(2003, 1, 1), end_day=date(2003, 1, 13))
+    assert sparse.keys == weekly.keys and sparse.seconds.tolist() == weekly.seconds.tolist()
+
+
+def test_pivot_api_and_report_opt_in(client):
+    """/api/pivot follows ORM writes; opted-in reports match the rollup"""
+    base = datetime(2003, 2, 3, 8)
+    with app.app_context():
+        for i in range(6):
+            order = Order(order_number=f'PV-{i}', employee_name='Pivot Tester', entry_type='service_order',
+                          start_time=base + timedelta(days=i % 3), end_time=base + timedelta(days=i % 3, hours=2))
+            db.session.add(order)
+            after_order_write(order)
+        db.session.commit()
+
+    try:
+        response = client.get('/api/pivot?group_by=employee,day&start_date=2003-02-03&end_date=2003-02-09'
+                              '&employee=Pivot Tester')
+        assert response.status_code == 200
+        columns = response.get_json()['columns']
+        assert columns['day'] == ['2003-02-03', '2003-02-04', '2003-02-05']
+        assert columns['hours'] == [4.0, 4.0, 4.0] and columns['orders'] == [2, 2, 2]
+
+        with app.app_context():
+            order = Order.query.filter_by(order_number='PV-0').first()
+            before_order_write(order)
+            order.end_time = order.start_time + timedelta(hours=5)
+            after_order_write(order)
+            db.session.commit()
+        data = client.get('/api/pivot?group_by=month&employee=Pivot Tester').get_json()
+        assert data['columns'] == {'month': ['2003-02-01'], 'hours': [15.0], 'orders': [6]}
+        assert client.get('/api/pivot?group_by=day,week').status_code == 400
+        assert client.get('/api/pivot?group_by=colour').status_code == 400
+        assert client.get('/api/pivot?end_date=9999-12-31').status_code == 400
+
+        start, end = date(2003, 2, 1), date(2003, 2, 10)
+        with app.test_request_context():
+            app_module.login_user(app_module.User.query.filter_by(username='admin').first())
+            rollup = (time_trends_data(start, end), employee_productivity_data(start, end, 'week')[:2])
+            app.config['REPORTS_USE_SNAPSHOT'] = True
+            try:
+                assert (time_trends_data(start, end), employee_productivity_data(start, end, 'week')[:2]) == rollup
+            finally:
+                app.config['REPORTS_USE_SNAPSHOT'] = False
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Pivot Tester').delete()
+            app_module.DailyHours.query.filter_by(employee_name='Pivot Tester').delete()
+            db.session.commit()
+            order_snapshot.invalidate()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the order times report's bounded output: the chart mode follows the
+data's cardinality and the order table is paged through the API.
+"""
+
+import json
+import re
+from datetime import datetime, timedelta
+
+from app import app, db, Order, ORDER_TIMES_TOP_N
+
+
+def chart(html):
+    """(bar count, subtitle) of the rendered chart"""
+    data = json.loads(re.search(r'const graphData = (.*);', html).group(1))
+    return sum(len(trace['x']) for trace in data['data']), re.search(r'completed orders &middot; ([^<]+)<', html).group(1)
+
+
+def test_order_times_modes_and_paging(client):
+    """Small ranges chart each order, large ones fall back to top order numbers plus "Other"; the table pages"""
+    base = datetime(2002, 1, 7, 8, 3)
+    with app.app_context():
+        db.session.execute(Order.__table__.insert(), [{
+            'order_number': f'TIMES-{i % 120:03d}', 'employee_name': 'Times Tester', 'entry_type': 'service_order',
+            'start_time': base + timedelta(minutes=10 * i), 'end_time': base + timedelta(minutes=10 * i + 5),
+            'duration_seconds': 300, 'created_at': base
+        } for i in range(600)])
+        db.session.commit()
+
+    try:
+        bars, mode = chart(client.get('/reports/order_times?start_date=2002-01-07&end_date=2002-01-07').get_data(as_text=True))
+        print(f"One day: {bars} bars, {mode}")
+        assert mode == 'Each order' and bars == 96
+
+        bars, mode = chart(client.get('/reports/order_times?start_date=2002-01-07&end_date=2002-01-13').get_data(as_text=True))
+        print(f"One week: {bars} bars, {mode}")
+        assert mode == 'Top order numbers + other' and bars == ORDER_TIMES_TOP_N + 1
+
+        rows, cursor = [], None
+        while True:
+            page = client.get('/api/reports/order_times?start_date=2002-01-07&end_date=2002-01-13&limit=100'
+                              + (f'&cursor={cursor}' if cursor else '')).get_json()
+            rows.extend(page['orders'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        assert len(rows) == 600
+        assert [row['start_time'] for row in rows] == sorted(row['start_time'] for row in rows)
+
+        for query in ('start_date=garbage', 'end_date=9999-12-31', 'start_date=99999999999999999999'):
+            assert client.get(f'/reports/order_times?{query}').status_code == 400
+            assert client.get(f'/api/reports/order_times?{query}').status_code == 400
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Times Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Check that the hot route queries are served by indexes.
+
+Runs EXPLAIN QUERY PLAN for the queries behind the index page, the weekly
+report/export and the dashboard APIs, and fails if SQLite falls back to a
+full scan of the order, daily_hours or user_access table.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+
+from app import app, db, Order, DailyHours, day_start, order_page_query, completed_orders_between, rollup_query, \
+    rollup_window_query, dashboard_windows, team_orders_query
+from database_config import month_expression
+
+
+def get_route_queries():
+    """Build the queries each hot route runs, keyed by route name"""
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    user_id = 1
+    cursor = (day_start(today), 1000)  # (start_time, id) of the last row on the previous page
+    daily_totals = [DailyHours.day, db.func.sum(DailyHours.seconds)]
+
+    return {
+        'index (active)': order_page_query(Order, 'active'),
+        'index (active, deep page)': order_page_query(Order, 'active', after=cursor),
+        'index (completed, deep page)': order_page_query(Order, 'completed', after=cursor),
+        'index (employee, deep page)': order_page_query(Order, 'all', employee='John Doe', after=cursor),
+        'index (team, deep page)': order_page_query(Order, 'all', after=cursor, user_id=user_id),
+        'weekly_report': completed_orders_between(week_start, week_start + timedelta(days=7)).order_by(Order.start_time),
+        'weekly_report (employee)': completed_orders_between(
+            week_start, week_start + timedelta(days=7), 'John Doe'
+        ).order_by(Order.start_time),
+        'export_weekly_report': completed_orders_between(
+            week_start, week_start + timedelta(days=7), 'John Doe'
+        ).order_by(Order.start_time),
+        'api_dashboard_stats (admin)': rollup_window_query(dashboard_windows(today, include_months=True)),
+        'api_dashboard_stats (user)': rollup_window_query(dashboard_windows(today, include_months=True), user_id),
+        'api_calendar_heatmap (user)': rollup_query(
+            daily_totals, today - timedelta(days=365), today + timedelta(days=1), user_id
+        ).group_by(DailyHours.day),
+        'api_time_trends (user)': rollup_query(
+            daily_totals, today - timedelta(days=30), today + timedelta(days=1), user_id
+        ).group_by(DailyHours.day),
+        'api_time_trends (user, month)': rollup_query(
+            [month_expression(DailyHours.day, 'sqlite'), db.func.sum(DailyHours.seconds)],
+            today - timedelta(days=1825), today + timedelta(days=1), user_id
+        ).group_by(month_expression(DailyHours.day, 'sqlite')),
+        'team orders (manager)': team_orders_query(user_id).filter(
+            Order.start_time >= day_start(week_start)
+        ).order_by(Order.start_time),
+    }
+
+
+def explain(connection, query):
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    compiled = query.statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def is_table_scan(detail):
+    """A plan step that reads a whole hot table without an index"""
+    detail = detail.replace('"', '')
+    return detail.startswith(('SCAN order', 'SCAN daily_hours', 'SCAN user_access')) and 'INDEX' not in detail
+
+
+def test_route_queries_use_indexes():
+    """Every hot route query must SEARCH (or walk an index), never SCAN a hot table"""
+    engine = create_engine('sqlite://')
+
+    with app.app_context():
+        db.metadata.create_all(engine)
+        queries = get_route_queries()
+
+        with engine.connect() as connection:
+            failures = []
+            for route, query in queries.items():
+                plan = explain(connection, query)
+                print(f"{route}: {' | '.join(plan)}")
+                if any(is_table_scan(detail) for detail in plan):
+                    failures.append(route)
+
+    assert not failures, f"Full table scan for: {', '.join(failures)}"
+
+
+if __name__ == "__main__":
+    test_route_queries_use_indexes()
+    print("✅ All route queries use indexes!")
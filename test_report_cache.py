@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the report result cache: repeated report requests are served from the
+cache, and committing an order write drops exactly the results it affects.
+"""
+
+from app import app, db, Order, DailyHours, Employee, report_cache, invalidate_report_cache
+
+
+def add_order(client, day, employee='Cache Tester'):
+    """Add a completed one-hour order through the form, like a user would"""
+    response = client.post('/add_order', data={
+        'entry_type': 'service_order', 'order_number': f'CACHE-{day}', 'employee_name': employee,
+        'manual_time': 'on', 'completed': 'on',
+        'start_date': day, 'start_time': '08:00', 'end_date': day, 'end_time': '09:00'
+    })
+    assert response.status_code == 302
+
+
+def test_report_cache_hits_and_invalidation(client):
+    """Identical requests hit; an order write only invalidates reports covering its day and employee"""
+    invalidate_report_cache()
+
+    def stats():
+        return client.get('/admin/report-cache').get_json()
+
+    week = '/weekly_report?start_date=2003-02-03&end_date=2003-02-09'
+    other_week = '/weekly_report?start_date=2003-02-10&end_date=2003-02-16'
+    other_employee = week + '&employee=Someone Else'
+    productivity = '/reports/employee_productivity?start_date=2003-02-01&end_date=2003-02-28'
+
+    try:
+        add_order(client, '2003-02-04')
+        for url in (week, other_week, other_employee, productivity):
+            client.get(url)
+        before = stats()
+        assert client.get(week).get_data(as_text=True).count('CACHE-2003-02-04') > 0
+        assert stats()['hits'] == before['hits'] + 1
+        assert before['entries'] == len(report_cache) == 4
+
+        # A write on 2003-02-05 stales the first week and the month, but not the next week or another employee
+        add_order(client, '2003-02-05')
+        after = stats()
+        print(f"Before: {before}, after: {after}")
+        assert after['invalidated'] - before['invalidated'] == 2
+        assert {key[0] for key in report_cache} == {'weekly_report'}
+        assert 'CACHE-2003-02-05' in client.get(week).get_data(as_text=True)
+        assert stats()['misses'] == after['misses'] + 1
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Cache Tester').delete()
+            DailyHours.query.filter_by(employee_name='Cache Tester').delete()
+            Employee.query.filter_by(name='Cache Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the streaming export pipeline: the CSV/JSONL writers yield in chunks,
+the XLSX writer produces typed cells, and the export routes stream rows
+(with the weekly CSV's daily and grand total rows).
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+
+from openpyxl import load_workbook
+
+from app import app, db, Order
+from report_export import ExportColumn, csv_chunks, jsonl_chunks, xlsx_file
+
+COLUMNS = [ExportColumn('day', 'Day'), ExportColumn('hours', 'Hours', num_format='0.00'), ExportColumn('note', 'Note')]
+ROWS = [(date(2004, 3, 1), 1.5, '=SUM(A1)'), (date(2004, 3, 2), 2.25, None), (datetime(2004, 3, 3, 8, 30), 0.5, 'x')]
+
+
+def test_writers():
+    """Each writer renders the same rows; CSV/JSONL come out in chunks"""
+    chunks = list(csv_chunks(COLUMNS, ROWS, chunk_rows=2))
+    assert len(chunks) == 2
+    assert list(csv.reader(io.StringIO(''.join(chunks)))) == [
+        ['Day', 'Hours', 'Note'], ['2004-03-01', '1.5', '=SUM(A1)'], ['2004-03-02', '2.25', ''],
+        ['2004-03-03 08:30:00', '0.5', 'x']
+    ]
+
+    lines = ''.join(jsonl_chunks(COLUMNS, ROWS, chunk_rows=2)).splitlines()
+    assert json.loads(lines[0]) == {'day': '2004-03-01', 'hours': 1.5, 'note': '=SUM(A1)'}
+    assert json.loads(lines[2])['day'] == '2004-03-03T08:30:00'
+
+    sheet = load_workbook(xlsx_file([('Sheet', COLUMNS, iter(ROWS))])).active
+    values = list(sheet.iter_rows(values_only=True))
+    print(values)
+    assert values[0] == ('Day', 'Hours', 'Note')
+    assert values[1] == (datetime(2004, 3, 1), 1.5, '=SUM(A1)')  # Formulas stay text
+    assert values[2] == (datetime(2004, 3, 2), 2.25, None)
+
+
+def test_export_routes(client):
+    """The weekly CSV streams entries with total rows; export_data honours the format"""
+    base = datetime(2004, 3, 1, 8)
+    with app.app_context():
+        db.session.execute(Order.__table__.insert(), [{
+            'order_number': f'EXPORT-{i}', 'employee_name': 'Export Tester', 'entry_type': 'service_order',
+            'start_time': base + timedelta(days=i // 2, hours=i % 2), 'end_time': base + timedelta(days=i // 2, hours=i % 2, minutes=30),
+            'duration_seconds': 1800, 'created_at': base
+        } for i in range(4)])
+        db.session.commit()
+
+    try:
+        response = client.get('/export_weekly_report?start_date=2004-03-01&end_date=2004-03-07'
+                              '&employee=Export Tester&format=csv')
+        assert response.is_streamed
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        print(rows)
+        assert [row[1] or row[5] for row in rows[1:]] == ['Export Tester', 'Export Tester', 'Daily Total:',
+                                                         'Export Tester', 'Export Tester', 'Daily Total:', 'GRAND TOTAL:']
+        assert rows[-1][6] == '2.0'
+
+        response = client.get('/export_weekly_report?start_date=2004-03-01&end_date=2004-03-07'
+                              '&employee=Export Tester&format=excel')
+        workbook = load_workbook(io.BytesIO(response.data))
+        assert workbook.sheetnames == ['Summary', 'Details']
+        assert list(workbook['Summary'].iter_rows(values_only=True))[-1] == ('TOTAL', 2)
+        assert workbook['Details'].max_row == 5
+
+        lines = client.get('/export_data?start_date=2004-03-01&end_date=2004-03-01&format=jsonl').get_data(as_text=True)
+        records = [json.loads(line) for line in lines.splitlines()]
+        assert [record['order_number'] for record in records] == ['EXPORT-0', 'EXPORT-1']
+        assert records[0]['elapsed_hours'] == 0.5 and records[0]['status'] == 'Completed'
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Export Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test the read-only report rows: live and archived orders stream as plain
+OrderRow tuples in start_time order without loading Order instances.
+"""
+
+from datetime import datetime, timedelta
+
+import app as app_module
+from app import app, db, Order, ArchivedOrder, OrderRow, partitioned_order_rows
+
+
+def test_partitioned_order_rows(monkeypatch):
+    """Rows from both tables merge by start time and never enter the session"""
+    monkeypatch.setattr(app_module, 'order_partitions', lambda start_day=None: [Order, ArchivedOrder])
+    base = datetime(2001, 3, 5, 8)
+
+    with app.app_context():
+        for hours, model in [(0, ArchivedOrder), (1, Order), (2, ArchivedOrder), (3, Order)]:
+            db.session.add(model(order_number=f'ROWS-{hours}', employee_name='Row Tester', entry_type='service_order',
+                                 start_time=base + timedelta(hours=hours),
+                                 end_time=base + timedelta(hours=hours, minutes=30), duration_seconds=1800))
+        db.session.commit()
+        db.session.expunge_all()
+
+        try:
+            rows = list(partitioned_order_rows(lambda model: model.query.filter(model.employee_name == 'Row Tester')))
+            print([row.order_number for row in rows])
+
+            assert [row.order_number for row in rows] == ['ROWS-0', 'ROWS-1', 'ROWS-2', 'ROWS-3']
+            assert all(isinstance(row, OrderRow) and row.hours == 0.5 for row in rows)
+            assert len(db.session.identity_map) == 0
+        finally:
+            for model in (Order, ArchivedOrder):
+                model.query.filter(model.employee_name == 'Row Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
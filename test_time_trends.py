@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test time trend bucketing: automatic and explicit day/week/month resolution,
+columnar series, and the cap on points per response.
+"""
+
+from datetime import date, datetime, timedelta
+
+from app import app, db, Order, DailyHours, after_order_write, TREND_MAX_POINTS
+
+
+def test_time_trend_resolutions(client):
+    """Long ranges fall back to weeks/months, totals survive bucketing, and points are capped"""
+    today = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=8)
+    before = client.get('/api/time-trends?days=1000&resolution=month').get_json()
+    with app.app_context():
+        for days_ago, hours, category in [(1, 2, None), (3, 1, 'Meeting'), (200, 4, None), (900, 3, 'Meeting')]:
+            order = Order(employee_name='Trend Tester', start_time=today - timedelta(days=days_ago),
+                          end_time=today - timedelta(days=days_ago) + timedelta(hours=hours),
+                          entry_type='other_time' if category else 'service_order',
+                          order_number=None if category else 'TR-1', category=category)
+            db.session.add(order)
+            after_order_write(order)
+        db.session.commit()
+
+    try:
+        daily = client.get('/api/time-trends').get_json()
+        assert daily['resolution'] == 'day' and len(daily['dates']) == 31
+        assert len(daily['totals']) == len(daily['series']['service_order']) == 31
+        assert daily['dates'][-1] == date.today().isoformat()
+
+        assert client.get('/api/time-trends?days=365').get_json()['resolution'] == 'week'
+        monthly = client.get('/api/time-trends?days=1000&resolution=month').get_json()
+        assert monthly['dates'][0].endswith('-01') and len(monthly['dates']) <= 35
+        assert round(sum(monthly['totals']) - sum(before['totals']), 2) == 10.0
+        assert round(sum(monthly['series']['Meeting']) - sum(before['series'].get('Meeting', [0])), 2) == 4.0
+        assert client.get('/api/time-trends?days=1825').get_json()['resolution'] == 'month'
+
+        capped = client.get('/api/time-trends?days=1825&resolution=day').get_json()
+        assert len(capped['dates']) == TREND_MAX_POINTS and capped['dates'][-1] == date.today().isoformat()
+        assert client.get('/api/time-trends?days=99999999').status_code == 200
+        assert client.get('/api/time-trends?resolution=hour').status_code == 400
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Trend Tester').delete()
+            DailyHours.query.filter_by(employee_name='Trend Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
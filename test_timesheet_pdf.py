@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the in-process weekly timesheet PDF: the renderer copes with long and
+markup-like notes and big days, and the export route returns it directly.
+"""
+
+from datetime import date, datetime, timedelta
+
+from app import app, db, Order, OrderRow
+from timesheet_pdf import render_weekly_timesheet, timesheet_styles
+
+
+def entry(start, notes=None, entry_type='service_order'):
+    return OrderRow(1, 'SO24-1', 'Meeting', entry_type, 'Pdf Tester', start, start + timedelta(hours=1), notes, 3600)
+
+
+def test_render_weekly_timesheet():
+    """Renders a multi-page PDF, reusing the cached styles"""
+    base = datetime(2006, 5, 1, 7)
+    entries = [entry(base, 'short note'), entry(base + timedelta(hours=1), '<b>not markup</b> & more ' * 20, 'other_time')]
+    entries += [entry(base + timedelta(days=1, minutes=i)) for i in range(120)]  # Splits across pages
+    day_totals = {date(2006, 5, 1): 2.0, date(2006, 5, 2): 120.0}
+
+    pdf = render_weekly_timesheet(iter(entries), day_totals, '2006-05-01', '2006-05-07', 'Pdf Tester')
+    assert pdf.startswith(b'%PDF')
+    assert pdf.count(b'/Type /Page\n') >= 3
+    assert timesheet_styles() is timesheet_styles()
+
+
+def test_pdf_export_route(client):
+    """format=pdf answers with the PDF itself, no external binary needed"""
+    start = datetime(2006, 5, 1, 8)
+    with app.app_context():
+        db.session.add(Order(order_number='PDF-1', employee_name='Pdf Tester', entry_type='service_order',
+                             start_time=start, end_time=start + timedelta(hours=2)))
+        db.session.commit()
+
+    try:
+        response = client.get('/export_weekly_report?start_date=2006-05-01&end_date=2006-05-07'
+                              '&employee=Pdf Tester&format=pdf')
+        assert response.status_code == 200
+        assert response.headers['Content-Type'] == 'application/pdf'
+        assert response.data.startswith(b'%PDF')
+    finally:
+        with app.app_context():
+            Order.query.filter_by(employee_name='Pdf Tester').delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
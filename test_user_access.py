@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test team access through the user_access closure: managers list, search,
+complete and edit the orders of everyone below them and nobody else's, timers
+under names that match no user stay with whoever started them, and manager
+reassignments are checked against the edited manager chain.
+"""
+
+from datetime import datetime, timedelta
+
+from app import app, db, Order, DailyHours, Employee, User, UserAccess, after_order_write
+
+NAMES = {'boss': ('Team', 'Boss'), 'worker': ('Team', 'Worker'), 'outsider': ('Team', 'Outsider')}
+
+
+def login(username):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': username})
+    assert response.status_code == 302
+    return client
+
+
+def seed():
+    """boss manages worker; outsider reports to nobody. One active order each. Returns {username: order id}"""
+    users = {}
+    for username, (first_name, last_name) in NAMES.items():
+        user = User(username=username, email=f'{username}@example.com', first_name=first_name, last_name=last_name,
+                    is_manager=username == 'boss')
+        user.set_password(username)
+        db.session.add(user)
+        users[username] = user
+    db.session.flush()
+    users['worker'].manager_id = users['boss'].id
+    UserAccess.rebuild()
+
+    order_ids = {}
+    for username, user in users.items():
+        order = Order(employee_name=user.get_full_name(), entry_type='service_order', order_number=f'TEAM-{username}',
+                      notes='teamaccesstoken', start_time=datetime.now() - timedelta(hours=1))
+        db.session.add(order)
+        after_order_write(order)
+        db.session.flush()
+        order_ids[username] = order.id
+    db.session.commit()
+    return order_ids
+
+
+def cleanup():
+    names = [f'{first_name} {last_name}' for first_name, last_name in NAMES.values()] + ['Front Desk']
+    for model in (Order, DailyHours):
+        model.query.filter(model.employee_name.in_(names)).delete()
+    Employee.query.filter(Employee.name.in_(names)).delete()
+    User.query.filter(User.username.in_(NAMES)).delete()
+    UserAccess.rebuild()
+    db.session.commit()
+
+
+def test_manager_sees_only_their_team():
+    """Listing, search and order routes follow the closure; admins still see everything"""
+    with app.app_context():
+        order_ids = seed()
+    try:
+        boss = login('boss')
+        listed = {order['order_number'] for order in boss.get('/api/orders?limit=100').get_json()['orders']}
+        assert {'TEAM-boss', 'TEAM-worker'} <= listed and 'TEAM-outsider' not in listed
+        found = {order['order_number'] for order in boss.get('/api/search?q=teamaccesstoken').get_json()['results']}
+        assert found == {'TEAM-boss', 'TEAM-worker'}
+
+        assert boss.get(f"/edit_order/{order_ids['outsider']}").status_code == 404
+        assert boss.post(f"/complete_order/{order_ids['outsider']}").status_code == 404
+        assert boss.post(f"/complete_order/{order_ids['worker']}").status_code == 302
+
+        worker = login('worker')
+        listed = {order['order_number'] for order in worker.get('/api/orders?status=all&limit=100').get_json()['orders']}
+        assert 'TEAM-worker' in listed and not listed & {'TEAM-boss', 'TEAM-outsider'}
+        assert worker.get(f"/edit_order/{order_ids['boss']}").status_code == 404
+
+        admin = login('admin')
+        found = {order['order_number'] for order in admin.get('/api/search?q=teamaccesstoken').get_json()['results']}
+        assert found == {'TEAM-boss', 'TEAM-worker', 'TEAM-outsider'}
+        with app.app_context():
+            assert db.session.get(Order, order_ids['worker']).end_time is not None
+            assert db.session.get(Order, order_ids['outsider']).end_time is None
+    finally:
+        with app.app_context():
+            cleanup()
+
+
+def test_unlinked_timer_stays_with_its_starter():
+    """A timer started under a name that matches no user belongs to whoever started it, through its edits"""
+    with app.app_context():
+        seed()
+    try:
+        worker = login('worker')
+        response = worker.post('/add_order', data={'entry_type': 'service_order', 'order_number': 'TEAM-desk',
+                                                   'employee_name': 'Front Desk'})
+        assert response.status_code == 302
+        with app.app_context():
+            order = Order.query.filter_by(order_number='TEAM-desk').one()
+            order_id = order.id
+            assert Employee.query.filter_by(name='Front Desk').one().user_id is None
+
+        listed = {order['order_number'] for order in worker.get('/api/orders?limit=100').get_json()['orders']}
+        assert 'TEAM-desk' in listed
+        assert worker.post(f'/complete_order/{order_id}').status_code == 302
+        found = {order['order_number'] for order in worker.get('/api/search?q=TEAM-desk').get_json()['results']}
+        assert found == {'TEAM-desk'}
+
+        assert login('boss').get(f'/edit_order/{order_id}').status_code == 200
+        assert login('outsider').get(f'/edit_order/{order_id}').status_code == 404
+        with app.app_context():
+            order = db.session.get(Order, order_id)
+            assert order.end_time is not None
+            assert order.user_id == User.query.filter_by(username='worker').one().id
+    finally:
+        with app.app_context():
+            cleanup()
+
+
+def test_demote_and_reparent_in_one_edit(client):
+    """Demoting a manager releases their team first, so they may then report to a former employee"""
+    with app.app_context():
+        seed()
+        boss, worker = (User.query.filter_by(username=username).one() for username in ('boss', 'worker'))
+        form = {'user_id': boss.id, 'email': boss.email, 'first_name': boss.first_name, 'last_name': boss.last_name,
+                'department': '', 'position': ''}
+        boss_id, worker_id = boss.id, worker.id
+    try:
+        # Still a manager: worker is below boss, so boss can't report to them
+        client.post('/admin/users/edit', data=dict(form, role='manager', manager_id=worker_id))
+        with app.app_context():
+            assert db.session.get(User, boss_id).manager_id is None
+
+        client.post('/admin/users/edit', data=dict(form, role='employee', manager_id=worker_id))
+        with app.app_context():
+            assert db.session.get(User, boss_id).manager_id == worker_id
+            assert db.session.get(User, worker_id).manager_id is None
+            assert User.manager_chain(boss_id) == [boss_id, worker_id]
+    finally:
+        with app.app_context():
+            User.query.filter(User.username.in_(NAMES)).update({User.manager_id: None})
+            cleanup()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
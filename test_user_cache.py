@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the Flask-Login user cache: repeat requests skip the user lookup, and
+edits through the admin/account routes are visible on the next request.
+"""
+
+from sqlalchemy import event
+
+from app import app, db, User
+
+
+def count_user_selects(client, path):
+    """Make a request and count the SELECTs it runs against the user table"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM user' in statement.replace('"', ''):
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_user_cache(client):
+    """Cached users are reused across requests and refreshed after an edit"""
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        admin_id, original_first_name = admin.id, admin.first_name
+
+    count_user_selects(client, '/api/dashboard-stats')  # warm the cache
+    selects = count_user_selects(client, '/api/dashboard-stats')
+    print(f"User SELECTs on a cached request: {selects}")
+    assert selects == 0
+
+    # Editing through the admin route invalidates the cached copy
+    with app.app_context():
+        admin = db.session.get(User, admin_id)
+        form = {'user_id': admin_id, 'email': admin.email, 'first_name': 'Cached', 'last_name': admin.last_name or '',
+                'department': admin.department or '', 'position': admin.position or '', 'role': 'admin'}
+    client.post('/admin/users/edit', data=form)
+
+    page = client.get('/account/settings').get_data(as_text=True)
+    assert 'value="Cached"' in page
+
+    form['first_name'] = original_first_name or ''
+    client.post('/admin/users/edit', data=form)
+    print("✅ User cache test passed!")
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,145 @@
+"""
+Timesheet PDF Module
+Renders the weekly payroll report as a PDF in-process with ReportLab.
+
+Replaces rendering weekly_report_pdf.html through pdfkit, which started a
+wkhtmltopdf process for every download (and failed when the binary was
+missing). The layout follows that template: report details, a per-day
+summary, then one table per day with a daily total row.
+
+Paragraph and table styles are built once per process (timesheet_styles);
+the page fonts are the standard PDF Helvetica faces, whose metrics
+ReportLab loads once and keeps. Cells are plain strings except notes,
+which wrap, so a long report stays cheap to lay out.
+"""
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+DETAIL_COLUMN_WIDTHS = [1.3 * inch, 1.0 * inch, 1.2 * inch, 0.95 * inch, 0.6 * inch, 2.45 * inch]
+SUMMARY_COLUMN_WIDTHS = [3.0 * inch, 1.5 * inch]
+KEEP_TOGETHER_ROWS = 25  # Days up to this many entries are kept on one page, like the HTML template did
+CELL_FONT_SIZE = 9
+NOTE_WIDTH = DETAIL_COLUMN_WIDTHS[-1] - 12  # Notes column minus the default cell padding
+
+
+@lru_cache(maxsize=1)
+def timesheet_styles():
+    """Paragraph and table styles, built on first use and shared by every render"""
+    sample = getSampleStyleSheet()
+    header_fill = colors.HexColor('#f2f2f2')
+    grid = ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dddddd'))
+    total_row = [('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'), ('BACKGROUND', (0, -1), (-1, -1), header_fill)]
+    cells = [
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (-1, 0), header_fill),
+        ('FONTSIZE', (0, 0), (-1, -1), CELL_FONT_SIZE),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        grid,
+    ]
+    return {
+        'title': ParagraphStyle('TimesheetTitle', parent=sample['Heading1'], alignment=TA_CENTER, spaceAfter=12),
+        'heading': ParagraphStyle('TimesheetHeading', parent=sample['Heading3'], spaceBefore=6),
+        'day': ParagraphStyle('TimesheetDay', parent=sample['Heading4'], spaceBefore=10),
+        'text': sample['Normal'],
+        'note': ParagraphStyle('TimesheetNote', parent=sample['Normal'], fontSize=8, leading=10),
+        'summary': TableStyle(cells + total_row),
+        'detail': TableStyle(cells + total_row + [('SPAN', (0, -1), (3, -1))]),
+        'service_order': colors.HexColor('#1a73e8'),
+        'other_time': colors.HexColor('#6c757d'),
+    }
+
+
+def day_label(day):
+    return f"{day.strftime('%Y-%m-%d')} ({day.strftime('%A')})"
+
+
+def note_cell(note, styles):
+    """Notes that fit on one line stay a plain string; only longer ones pay for a wrapping Paragraph"""
+    if not note:
+        return ''
+    if '\n' not in note and stringWidth(note, 'Helvetica', CELL_FONT_SIZE) <= NOTE_WIDTH:
+        return note
+    return Paragraph(escape(note).replace('\n', '<br/>'), styles['note'])
+
+
+def day_table(entries, day_total, styles):
+    """Detail table for one day's OrderRows, ending in the daily total row"""
+    rows = [['Employee', 'Type', 'Details', 'Time', 'Hours', 'Notes']]
+    type_colors = []
+    for index, entry in enumerate(entries, 1):
+        service = entry.entry_type == 'service_order'
+        time_range = entry.start_time.strftime('%H:%M')
+        if entry.end_time:
+            time_range += ' - ' + entry.end_time.strftime('%H:%M')
+        rows.append([
+            entry.employee_name,
+            'Service Order' if service else 'Other Time',
+            (entry.order_number if service else entry.category) or '',
+            time_range,
+            f'{entry.hours:.2f}',
+            note_cell(entry.notes, styles),
+        ])
+        type_colors.append(('TEXTCOLOR', (1, index), (1, index), styles['service_order' if service else 'other_time']))
+    rows.append(['Daily Total', '', '', '', f'{day_total:.2f}', ''])
+
+    table = Table(rows, colWidths=DETAIL_COLUMN_WIDTHS, repeatRows=1)
+    table.setStyle(styles['detail'])
+    table.setStyle(TableStyle(type_colors))
+    return table
+
+
+def render_weekly_timesheet(entries, day_totals, start_date, end_date, employee=None, generated_at=None):
+    """PDF bytes for the weekly report.
+
+    entries are OrderRows in start_time order (e.g. a partitioned_order_rows
+    stream); day_totals maps each day to its total hours.
+    """
+    styles = timesheet_styles()
+    generated_at = generated_at or datetime.now()
+    total_hours = sum(day_totals.values())
+
+    story = [
+        Paragraph('Weekly Payroll Report', styles['title']),
+        Paragraph('Report Details', styles['heading']),
+        Paragraph(f'<b>Period:</b> {escape(str(start_date))} to {escape(str(end_date))}', styles['text']),
+        Paragraph(f'<b>Employee:</b> {escape(employee) if employee else "All employees"}', styles['text']),
+        Paragraph(f"<b>Generated on:</b> {generated_at.strftime('%Y-%m-%d %H:%M')}", styles['text']),
+        Spacer(1, 12),
+        Paragraph('Summary', styles['heading']),
+        Paragraph(f'<b>Total Hours:</b> {total_hours:.2f}', styles['text']),
+        Spacer(1, 6),
+    ]
+
+    summary = [['Date', 'Total Hours']]
+    summary.extend([day_label(day), f'{total:.2f}'] for day, total in sorted(day_totals.items()))
+    summary.append(['TOTAL', f'{total_hours:.2f}'])
+    summary_table = Table(summary, colWidths=SUMMARY_COLUMN_WIDTHS, hAlign='LEFT', repeatRows=1)
+    summary_table.setStyle(styles['summary'])
+    story.extend([summary_table, Spacer(1, 12), Paragraph('Detailed Report', styles['heading'])])
+
+    # One section per day (entries arrive in start_time order); longer days split with a repeated header
+    for day, day_entries in groupby(entries, key=lambda entry: entry.start_time.date()):
+        day_entries = list(day_entries)
+        section = [Paragraph(day_label(day), styles['day']), day_table(day_entries, day_totals.get(day, 0), styles)]
+        if len(day_entries) <= KEEP_TOGETHER_ROWS:
+            story.append(KeepTogether(section))
+        else:
+            story.extend(section)
+
+    output = BytesIO()
+    document = SimpleDocTemplate(output, pagesize=letter, title='Weekly Payroll Report',
+                                 leftMargin=0.5 * inch, rightMargin=0.5 * inch,
+                                 topMargin=0.6 * inch, bottomMargin=0.6 * inch)
+    document.build(story)
+    return output.getvalue()